@@ -1,7 +1,7 @@
 # admin.py
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, UserProfile, FoodProfile, Match, WeeklyFoodLog
+from .models import CustomUser, UserProfile, FoodProfile, Match, WeeklyFoodLog, GenerationJob, Ingredient, Allergen, RecipeCacheEntry
 
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
@@ -31,6 +31,7 @@ class UserProfileAdmin(admin.ModelAdmin):
     list_filter = ['diet_preferences', 'activity_level', 'profile_completed']
     search_fields = ['user__username', 'user__email']
     readonly_fields = ['created_at']
+    exclude = ['allergens']
 
 @admin.register(FoodProfile)
 class FoodProfileAdmin(admin.ModelAdmin):
@@ -38,6 +39,7 @@ class FoodProfileAdmin(admin.ModelAdmin):
     list_filter = ['meal_type', 'cuisine_type', 'diet_compatibility', 'generation_successful']
     search_fields = ['name', 'description', 'ingredients']
     readonly_fields = ['created_at']
+    exclude = ['ingredient_set']
 
 @admin.register(Match)
 class MatchAdmin(admin.ModelAdmin):
@@ -56,4 +58,28 @@ class WeeklyFoodLogAdmin(admin.ModelAdmin):
     list_display = ['user', 'food_profile', 'date_consumed', 'meal_type']
     list_filter = ['date_consumed', 'meal_type']
     search_fields = ['user__username', 'food_profile__name']
-    date_hierarchy = 'date_consumed'
\ No newline at end of file
+    date_hierarchy = 'date_consumed'
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = ['diet_compatibility', 'user', 'count', 'status', 'attempts', 'foods_created', 'created_at', 'finished_at']
+    list_filter = ['status', 'diet_compatibility']
+    search_fields = ['user__username', 'user__email']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
+
+@admin.register(Ingredient)
+class IngredientAdmin(admin.ModelAdmin):
+    list_display = ['name']
+    search_fields = ['name']
+
+@admin.register(Allergen)
+class AllergenAdmin(admin.ModelAdmin):
+    list_display = ['name']
+    search_fields = ['name']
+    filter_horizontal = ['ingredients']
+
+@admin.register(RecipeCacheEntry)
+class RecipeCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'calories', 'hits', 'created_at', 'last_used_at']
+    list_filter = ['diet', 'cuisine', 'meal_type']
+    readonly_fields = ['key', 'food', 'created_at', 'last_used_at']
@@ -0,0 +1,78 @@
+# dating/allergens.py
+import re
+
+# Allergen category -> ingredient words that belong to it, singular and lowercase
+ALLERGEN_TERMS = {
+    'dairy': [
+        'dairy', 'milk', 'buttermilk', 'cheese', 'butter', 'cream', 'yogurt', 'yoghurt', 'whey', 'casein', 'ghee',
+        'lactose', 'mozzarella', 'parmesan', 'cheddar', 'feta', 'ricotta', 'paneer', 'mascarpone', 'brie', 'kefir',
+    ],
+    'egg': ['egg', 'mayonnaise', 'mayo', 'meringue', 'aioli'],
+    'fish': ['fish', 'salmon', 'tuna', 'cod', 'anchovy', 'sardine', 'trout', 'halibut', 'mackerel', 'tilapia'],
+    'gluten': [
+        'gluten', 'wheat', 'flour', 'bread', 'breadcrumb', 'panko', 'pasta', 'spaghetti', 'noodle', 'barley', 'rye',
+        'couscous', 'seitan', 'bulgur', 'semolina', 'spelt',
+    ],
+    'nut': [
+        'nut', 'peanut', 'almond', 'cashew', 'walnut', 'pecan', 'hazelnut', 'pistachio', 'macadamia', 'praline',
+        'marzipan',
+    ],
+    'sesame': ['sesame', 'tahini'],
+    'shellfish': ['shellfish', 'shrimp', 'prawn', 'crab', 'lobster', 'clam', 'mussel', 'oyster', 'scallop', 'squid'],
+    'soy': ['soy', 'soya', 'soybean', 'tofu', 'tempeh', 'edamame', 'miso', 'tamari'],
+}
+# What people write for a category besides its own name
+ALLERGY_ALIASES = {
+    'milk': 'dairy', 'lactose': 'dairy', 'lactose intolerance': 'dairy',
+    'tree nut': 'nut',
+    'wheat': 'gluten', 'celiac': 'gluten', 'coeliac': 'gluten',
+    'seafood': 'shellfish', 'crustacean': 'shellfish',
+    'soya': 'soy', 'soybean': 'soy',
+}
+# Dairy words that are not dairy after one of these, as in "coconut milk" or "peanut butter"
+NON_DAIRY_PREFIXES = {'almond', 'cashew', 'cocoa', 'coconut', 'oat', 'peanut', 'rice', 'shea', 'soy', 'vegan'}
+
+_TERM_CATEGORIES = {term: category for category, terms in ALLERGEN_TERMS.items() for term in terms}
+
+
+def singular(word):
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith(('oes', 'shes', 'ches')):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith('ss') and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def words(name):
+    return re.findall(r'[a-z]+', name.lower())
+
+
+def allergen_category(name):
+    """The category an allergy is checked as, e.g. "Nuts" -> "nut" and "milk" -> "dairy".
+
+    Allergies outside the table keep their own singular name.
+    """
+    name = ' '.join(singular(word) for word in words(name))
+    return ALLERGY_ALIASES.get(name, name)
+
+
+def ingredient_categories(name):
+    """Categories from ALLERGEN_TERMS an ingredient name falls in"""
+    categories = set()
+    previous = None
+    for word in words(name):
+        category = _TERM_CATEGORIES.get(word) or _TERM_CATEGORIES.get(singular(word))
+        if category and not (category == 'dairy' and previous in NON_DAIRY_PREFIXES):
+            categories.add(category)
+        previous = singular(word)
+    return categories
+
+
+def contains_allergen(ingredient_name, allergen):
+    """Whether an ingredient must be avoided for an allergen category"""
+    if allergen in ALLERGEN_TERMS:
+        return allergen in ingredient_categories(ingredient_name)
+    # Anything else is a substring match, against singular words too so "strawberry" covers "strawberries"
+    return allergen in ingredient_name or allergen in ' '.join(singular(word) for word in words(ingredient_name))
@@ -1,9 +1,12 @@
 # dating/apps.py
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 class DatingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dating'
     
     def ready(self):
-        import dating.signals
\ No newline at end of file
+        import dating.signals
+        from dating.sqlite import apply_sqlite_pragmas
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid='dating.sqlite_pragmas')
@@ -0,0 +1,222 @@
+# dating/backends.py
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+BACKENDS = {
+    'g4f': 'dating.backends.G4FBackend',
+    'stub': 'dating.backends.StubBackend',
+    'replay': 'dating.backends.ReplayBackend',
+}
+
+
+class BackendError(Exception):
+    """A backend could not answer a prompt"""
+
+
+class GenerationBackend:
+    """Turns prompts into recipe JSON text and image URLs"""
+
+    def complete(self, system_prompt, prompt):
+        raise NotImplementedError
+
+    def image_url(self, prompt):
+        raise NotImplementedError
+
+
+class ClientBackend(GenerationBackend):
+    """Any OpenAI-shaped client with ``chat.completions.create`` and ``images.generate``"""
+
+    recipe_model = 'gpt-4o-mini'
+    image_model = 'flux'
+
+    def __init__(self, client):
+        self.client = client
+
+    def complete(self, system_prompt, prompt):
+        response = self.client.chat.completions.create(
+            model=self.recipe_model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            web_search=False
+        )
+        return response.choices[0].message.content
+
+    def image_url(self, prompt):
+        response = self.client.images.generate(model=self.image_model, prompt=prompt, response_format="url")
+        return response.data[0].url
+
+
+class G4FBackend(ClientBackend):
+    def __init__(self):
+        from g4f.client import Client
+        super().__init__(Client())
+
+
+# Per-cuisine building blocks for the stub; meat-free mains suit every diet
+STUB_DISHES = {
+    'Italian': ['Risotto', 'Penne', 'Frittata', 'Panzanella', 'Minestrone'],
+    'Mexican': ['Tacos', 'Burrito Bowl', 'Enchiladas', 'Pozole', 'Tostadas'],
+    'Asian': ['Stir-Fry', 'Noodle Bowl', 'Fried Rice', 'Curry', 'Dumplings'],
+    'American': ['Skillet', 'Sandwich', 'Chili', 'Hash', 'Cobb Salad'],
+    'Mediterranean': ['Mezze Plate', 'Grain Bowl', 'Shakshuka', 'Souvlaki Wrap', 'Stew'],
+}
+STUB_STYLES = ['Smoky', 'Zesty', 'Herbed', 'Roasted', 'Spiced', 'Golden', 'Rustic', 'Fresh']
+STUB_MAINS = {
+    'plant': ['chickpeas', 'tofu', 'lentils', 'mushrooms', 'black beans', 'tempeh'],
+    'meat': ['chicken', 'salmon', 'turkey', 'shrimp', 'beef'],
+}
+STUB_SIDES = [
+    'garlic', 'onion', 'tomato', 'spinach', 'bell pepper', 'lemon', 'cilantro', 'zucchini',
+    'olive oil', 'ginger', 'rice', 'quinoa', 'sweet potato', 'cucumber', 'avocado',
+]
+PLANT_DIETS = {'vegan', 'vegetarian'}
+PROMPT_SHAPE = re.compile(r'Create an? (\S+) (\S+) recipe from (.+?) cuisine')
+PROMPT_CALORIES = re.compile(r'Target calories: (\d+)')
+PROMPT_AVOID = re.compile(r'Avoid these allergies: (.*?)\.\s')
+
+
+class StubBackend(GenerationBackend):
+    """Offline recipes with configurable latency and failure rate.
+
+    Answers are derived from a hash of the seed, the prompt and how many
+    times that prompt has been asked, so a given sequence of prompts always
+    produces the same recipes and the same failures.
+    """
+
+    def __init__(self, latency=None, failure_rate=None, seed=None, image_latency=None):
+        self.latency = settings.GENERATION_STUB_LATENCY if latency is None else latency
+        self.image_latency = self.latency if image_latency is None else image_latency
+        self.failure_rate = settings.GENERATION_STUB_FAILURE_RATE if failure_rate is None else failure_rate
+        self.seed = settings.GENERATION_STUB_SEED if seed is None else seed
+        self.lock = threading.Lock()
+        self.asked = Counter()
+
+    def _rng(self, kind, prompt):
+        with self.lock:
+            self.asked[kind, prompt] += 1
+            attempt = self.asked[kind, prompt]
+        digest = hashlib.sha256(f'{self.seed}|{kind}|{attempt}|{prompt}'.encode()).hexdigest()
+        return random.Random(digest)
+
+    def _answer(self, rng, latency):
+        if latency:
+            time.sleep(latency)
+        if rng.random() < self.failure_rate:
+            raise BackendError('Simulated backend failure')
+
+    def complete(self, system_prompt, prompt):
+        rng = self._rng('recipe', prompt)
+        self._answer(rng, self.latency)
+
+        shape = PROMPT_SHAPE.search(prompt)
+        diet, meal_type, cuisine = shape.groups() if shape else ('omnivore', 'dinner', 'Mediterranean')
+        calories = PROMPT_CALORIES.search(prompt)
+        calories = int(calories.group(1)) if calories else 500
+        avoid = PROMPT_AVOID.search(prompt)
+        avoid = [a.strip().lower() for a in avoid.group(1).split(',')] if avoid else []
+
+        mains = STUB_MAINS['plant'] + ([] if diet in PLANT_DIETS else STUB_MAINS['meat'])
+        main = rng.choice([m for m in mains if not any(a and a in m for a in avoid)] or mains)
+        sides = [s for s in rng.sample(STUB_SIDES, 5) if not any(a and a in s for a in avoid)][:4]
+        dish = rng.choice(STUB_DISHES.get(cuisine, STUB_DISHES['Mediterranean']))
+        name = f'{rng.choice(STUB_STYLES)} {main.title()} {dish}'
+        return json.dumps({
+            'name': name,
+            'description': f'A {meal_type} {dish.lower()} of {main} with {" and ".join(sides[:2])}, {cuisine} style',
+            'calories': int(calories * rng.uniform(0.8, 1.2)) // 10 * 10,
+            'ingredients': ', '.join([main] + sides),
+        })
+
+    def image_url(self, prompt):
+        rng = self._rng('image', prompt)
+        self._answer(rng, self.image_latency)
+        return f'https://stub.invalid/images/{hashlib.sha256(prompt.encode()).hexdigest()[:16]}.png'
+
+
+class RecordingBackend(GenerationBackend):
+    """Wraps another backend and appends every answer to a JSONL file for ReplayBackend"""
+
+    def __init__(self, backend, path):
+        self.backend = backend
+        self.path = path
+        self.lock = threading.Lock()
+
+    def _record(self, kind, prompt, response):
+        line = json.dumps({'kind': kind, 'prompt': prompt, 'response': response})
+        with self.lock, open(self.path, 'a') as handle:
+            handle.write(line + '\n')
+        return response
+
+    def complete(self, system_prompt, prompt):
+        return self._record('recipe', prompt, self.backend.complete(system_prompt, prompt))
+
+    def image_url(self, prompt):
+        return self._record('image', prompt, self.backend.image_url(prompt))
+
+
+class ReplayBackend(GenerationBackend):
+    """Serves responses recorded by RecordingBackend.
+
+    A prompt recorded several times replays its answers in order, then
+    wraps around. An unseen prompt gets a recorded answer of the same kind,
+    picked by a hash of the prompt so runs stay reproducible.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or settings.GENERATION_REPLAY_PATH
+        self.recorded = {}
+        self.by_kind = {}
+        with open(self.path) as handle:
+            for line in handle:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.recorded.setdefault((entry['kind'], entry['prompt']), []).append(entry['response'])
+                    self.by_kind.setdefault(entry['kind'], []).append(entry['response'])
+        self.lock = threading.Lock()
+        self.served = Counter()
+
+    def _replay(self, kind, prompt):
+        answers = self.recorded.get((kind, prompt))
+        if answers:
+            with self.lock:
+                index = self.served[kind, prompt]
+                self.served[kind, prompt] += 1
+            return answers[index % len(answers)]
+        pool = self.by_kind.get(kind)
+        if not pool:
+            raise BackendError(f'No recorded {kind} responses in {self.path}')
+        return pool[int(hashlib.sha256(prompt.encode()).hexdigest(), 16) % len(pool)]
+
+    def complete(self, system_prompt, prompt):
+        return self._replay('recipe', prompt)
+
+    def image_url(self, prompt):
+        return self._replay('image', prompt)
+
+
+def get_backend(name=None):
+    """The backend named by GENERATION_BACKEND (an alias or dotted path), recording if configured"""
+    name = name or settings.GENERATION_BACKEND
+    backend = import_string(BACKENDS.get(name, name))()
+    if settings.GENERATION_RECORD_PATH:
+        backend = RecordingBackend(backend, settings.GENERATION_RECORD_PATH)
+    return backend
+
+
+def as_backend(client):
+    """A GenerationBackend for ``client``, wrapping bare OpenAI-shaped clients"""
+    if client is None:
+        return get_backend()
+    if isinstance(client, GenerationBackend):
+        return client
+    return ClientBackend(client)
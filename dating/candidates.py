@@ -0,0 +1,63 @@
+# dating/candidates.py
+from django.db.models import Exists, OuterRef
+
+from .models import FoodProfile, Ingredient, Match
+from .ranking import rank_candidates
+
+# What deck_card reads, in model field order so a row can become an instance with from_db
+DECK_FIELDS = [
+    field.attname for field in FoodProfile._meta.concrete_fields
+    if field.attname in {
+        'id', 'name', 'description', 'calories', 'meal_type', 'cuisine_type', 'diet_compatibility',
+        'ingredients', 'image_url', 'image_variants',
+    }
+]
+
+
+def candidate_foods(user_profile):
+    """Foods the user has not swiped on yet, in id order.
+
+    Seen foods are removed with a correlated ``NOT EXISTS`` on Match's
+    (user, food_profile) unique index instead of a ``NOT IN`` list, so the
+    cost per candidate stays constant as a user's swipe history grows.
+    Walking the (diet, id) index lets a LIMIT stop early; favourite cuisines
+    are weighed when ranking (see ranking.Taste), since ordering by them here
+    would sort every unseen food of the diet.
+    """
+    seen = Match.objects.filter(user_id=user_profile.user_id, food_profile_id=OuterRef('pk'))
+    foods = FoodProfile.objects.filter(
+        diet_compatibility=user_profile.diet_preferences
+    ).filter(~Exists(seen))
+
+    # Allergen -> ingredient links are precomputed, so this stays an indexed
+    # join instead of a LIKE per allergy over every ingredient string
+    if user_profile.get_allergies_list():
+        allergic = Ingredient.objects.filter(foods=OuterRef('pk'), allergens__profiles=user_profile.pk)
+        foods = foods.filter(~Exists(allergic))
+
+    return foods.order_by('id')
+
+
+def deck_card(food):
+    """JSON-ready subset of a FoodProfile for the swipe deck"""
+    return {
+        'id': food.id,
+        'name': food.name,
+        'description': food.description,
+        'calories': food.calories,
+        'image_url': food.card_image,
+        'image_webp': food.card_image_webp,
+        'ingredients': food.get_ingredients_list(),
+        'meal_type': food.get_meal_type_display(),
+        'cuisine_type': food.cuisine_type,
+        'diet_compatibility': food.get_diet_compatibility_display(),
+    }
+
+
+def next_deck(user_profile, limit, exclude_ids=()):
+    """Upcoming deck cards, best ranked first, skipping foods the client already holds"""
+    foods = candidate_foods(user_profile)
+    if exclude_ids:
+        foods = foods.exclude(id__in=exclude_ids)
+    rows = rank_candidates(user_profile, foods, limit, DECK_FIELDS)
+    return [deck_card(FoodProfile.from_db(foods.db, DECK_FIELDS, row)) for row in rows]
@@ -0,0 +1,92 @@
+# dating/catalog.py
+from .allergens import allergen_category, contains_allergen
+from .models import Allergen, FoodProfile, Ingredient
+
+
+def normalize_tag(name):
+    return ' '.join(name.lower().split())
+
+
+def split_tags(text):
+    """Normalized, de-duplicated entries of a comma-separated field"""
+    tags = []
+    for part in text.split(','):
+        tag = normalize_tag(part)
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def get_or_create_tags(model, names):
+    """Rows of ``model`` for every name, creating missing ones in one insert"""
+    if not names:
+        return []
+    existing = {tag.name: tag for tag in model.objects.filter(name__in=names)}
+    missing = [name for name in names if name not in existing]
+    if missing:
+        model.objects.bulk_create([model(name=name) for name in missing], ignore_conflicts=True)
+        existing.update({tag.name: tag for tag in model.objects.filter(name__in=missing)})
+        created = [existing[name] for name in missing]
+        if model is Ingredient:
+            link_new_ingredients(created)
+        elif model is Allergen:
+            link_new_allergens(created)
+    return [existing[name] for name in names]
+
+
+def link_new_ingredients(ingredients):
+    # Allergens are a short list, so matching in Python beats a LIKE per pair
+    links = [
+        Allergen.ingredients.through(allergen_id=allergen.pk, ingredient_id=ingredient.pk)
+        for allergen in Allergen.objects.all()
+        for ingredient in ingredients
+        if contains_allergen(ingredient.name, allergen.name)
+    ]
+    Allergen.ingredients.through.objects.bulk_create(links, ignore_conflicts=True)
+
+
+def link_new_allergens(allergens):
+    # Categories match on synonyms, not one substring, so the check runs in Python;
+    # a new allergy is rare enough for one pass over the ingredient names
+    ingredients = list(Ingredient.objects.values_list('pk', 'name'))
+    Allergen.ingredients.through.objects.bulk_create([
+        Allergen.ingredients.through(allergen_id=allergen.pk, ingredient_id=ingredient_id)
+        for allergen in allergens
+        for ingredient_id, name in ingredients
+        if contains_allergen(name, allergen.name)
+    ], ignore_conflicts=True)
+
+
+def allergy_categories(text):
+    """Allergen categories for an allergies field, de-duplicated"""
+    categories = []
+    for tag in split_tags(text):
+        category = allergen_category(tag)
+        if category and category not in categories:
+            categories.append(category)
+    return categories
+
+
+def sync_food_ingredients(food_profile):
+    food_profile.ingredient_set.set(get_or_create_tags(Ingredient, split_tags(food_profile.ingredients)))
+    food_profile._synced_ingredients = food_profile.ingredients
+
+
+def sync_foods_ingredients(foods):
+    """sync_food_ingredients for freshly bulk-created foods, in a few queries"""
+    tags = {food.pk: split_tags(food.ingredients) for food in foods}
+    names = sorted({name for food_tags in tags.values() for name in food_tags})
+    ingredient_ids = {tag.name: tag.pk for tag in get_or_create_tags(Ingredient, names)}
+    FoodIngredient = FoodProfile.ingredient_set.through
+    FoodIngredient.objects.bulk_create([
+        FoodIngredient(foodprofile_id=food_id, ingredient_id=ingredient_ids[name])
+        for food_id, food_tags in tags.items()
+        for name in food_tags
+    ], batch_size=1000, ignore_conflicts=True)
+    for food in foods:
+        food._synced_ingredients = food.ingredients
+
+
+def sync_profile_tags(user_profile):
+    user_profile.allergens.set(get_or_create_tags(Allergen, allergy_categories(user_profile.allergies)))
+    user_profile._synced_tags = user_profile._tag_source()
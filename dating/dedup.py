@@ -0,0 +1,216 @@
+# dating/dedup.py
+import hashlib
+import random
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .catalog import split_tags
+from .match_cache import bump_matches_for_foods
+from .meal_plan import invalidate_meal_plans
+from .models import FoodFingerprint, FoodProfile, Match, RecipeCacheEntry, WeeklyFoodLog
+from .variety import invalidate_weekly_variety
+
+# 32 MinHash values in 8 bands of 4: two foods share a band key with
+# probability 1 - (1 - s^4)^8, about 50% at similarity 0.6 and 96% at 0.8
+NUM_HASHES = 32
+BANDS = 8
+ROWS = NUM_HASHES // BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(MERSENNE_PRIME)) for _ in range(NUM_HASHES)]
+
+# Words LLMs sprinkle over the same dish ("Classic Margherita Pizza")
+FILLER_WORDS = {
+    'a', 'an', 'and', 'the', 'with', 'of', 'in', 'on', 'style', 'classic', 'easy', 'simple',
+    'homemade', 'traditional', 'authentic', 'delicious', 'perfect', 'quick', 'best',
+}
+WORD = re.compile(r'[a-z0-9]+')
+
+
+def normalize_name(name):
+    """Lowercased name words without filler, in sorted order"""
+    return ' '.join(sorted(set(WORD.findall(name.lower())) - FILLER_WORDS))
+
+
+def shingles(name, ingredients):
+    """Name words and normalized ingredients, the set MinHash and Jaccard compare"""
+    words = normalize_name(name).split()
+    return frozenset([f'n:{word}' for word in words] + [f'i:{tag}' for tag in split_tags(ingredients)])
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def _hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'big')
+
+
+def minhash(shingle_set):
+    hashes = [_hash(shingle) for shingle in shingle_set] or [0]
+    return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in PERMUTATIONS]
+
+
+def _key(*parts):
+    return hashlib.blake2b('|'.join(map(str, parts)).encode(), digest_size=16).hexdigest()
+
+
+class Fingerprint:
+    """What near-duplicate checks need from one food"""
+
+    def __init__(self, diet, name, ingredients):
+        self.diet = diet
+        self.name = normalize_name(name)
+        self.shingles = shingles(name, ingredients)
+
+    @classmethod
+    def of(cls, food):
+        """From a FoodProfile or a generated recipe dict"""
+        if isinstance(food, dict):
+            return cls(food['diet_compatibility'], food['name'], food['ingredients'])
+        return cls(food.diet_compatibility, food.name, food.ingredients)
+
+    def keys(self):
+        """Index keys; foods sharing none of them are never compared.
+
+        Keys are scoped to the diet, since each diet draws on its own foods.
+        """
+        signature = minhash(self.shingles)
+        keys = [_key('name', self.diet, self.name)]
+        keys += [_key('band', self.diet, band, *signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+        return keys
+
+    def matches(self, other):
+        return self.diet == other.diet and (
+            (self.name and self.name == other.name)
+            or jaccard(self.shingles, other.shingles) >= settings.DEDUP_THRESHOLD
+        )
+
+
+class LocalIndex:
+    """In-memory key -> fingerprints buckets, for a batch or a catalog scan"""
+
+    def __init__(self):
+        self.buckets = {}
+
+    def find(self, fingerprint, keys):
+        for key in keys:
+            for pk, other in self.buckets.get(key, ()):
+                if fingerprint.matches(other):
+                    return pk
+        return None
+
+    def add(self, pk, fingerprint, keys):
+        for key in keys:
+            self.buckets.setdefault(key, []).append((pk, fingerprint))
+
+
+def _chunks(values, size=900):
+    # Stay under SQLite's bound-parameter limit on large batches
+    return [values[start:start + size] for start in range(0, len(values), size)]
+
+
+def drop_duplicates(recipes):
+    """Recipes that duplicate neither the catalog nor an earlier recipe of the batch.
+
+    One indexed lookup covers the whole batch, so the cost grows with the
+    number of colliding foods rather than with the catalog.
+    """
+    if not settings.DEDUP_ENABLED or not recipes:
+        return list(recipes)
+
+    fingerprints = [Fingerprint.of(recipe) for recipe in recipes]
+    keys = [fingerprint.keys() for fingerprint in fingerprints]
+    catalog = LocalIndex()
+    collisions = {}
+    for chunk in _chunks(sorted({key for food_keys in keys for key in food_keys})):
+        for food_id, key in FoodFingerprint.objects.filter(key__in=chunk).values_list('food_id', 'key'):
+            collisions.setdefault(food_id, []).append(key)
+    for chunk in _chunks(list(collisions)):
+        for food in FoodProfile.objects.filter(pk__in=chunk).only('name', 'ingredients', 'diet_compatibility'):
+            catalog.add(food.pk, Fingerprint.of(food), collisions[food.pk])
+
+    batch = LocalIndex()
+    kept = []
+    for index, (recipe, fingerprint, food_keys) in enumerate(zip(recipes, fingerprints, keys)):
+        if catalog.find(fingerprint, food_keys) is None and batch.find(fingerprint, food_keys) is None:
+            batch.add(index, fingerprint, food_keys)
+            kept.append(recipe)
+    return kept
+
+
+def index_foods(foods, replace=True):
+    """(Re)write the fingerprint keys of ``foods``"""
+    foods = list(foods)
+    if replace:
+        FoodFingerprint.objects.filter(food__in=foods).delete()
+    FoodFingerprint.objects.bulk_create([
+        FoodFingerprint(food_id=food.pk, key=key)
+        for food in foods
+        for key in Fingerprint.of(food).keys()
+    ], batch_size=1000)
+
+
+def rebuild_index(chunk_size=2000):
+    """Rewrite the keys of every food, e.g. after bulk inserts that skipped the signals"""
+    FoodFingerprint.objects.all().delete()
+    foods = FoodProfile.objects.order_by('pk').only('name', 'ingredients', 'diet_compatibility')
+    chunk = []
+    for food in foods.iterator(chunk_size=chunk_size):
+        chunk.append(food)
+        if len(chunk) == chunk_size:
+            index_foods(chunk, replace=False)
+            chunk = []
+    index_foods(chunk, replace=False)
+
+
+def find_catalog_duplicates(chunk_size=2000):
+    """``{duplicate_id: kept_id}`` over the whole catalog, keeping the oldest food of each group"""
+    index = LocalIndex()
+    duplicates = {}
+    foods = FoodProfile.objects.order_by('pk').only('name', 'ingredients', 'diet_compatibility')
+    for food in foods.iterator(chunk_size=chunk_size):
+        fingerprint = Fingerprint.of(food)
+        keys = fingerprint.keys()
+        kept_id = index.find(fingerprint, keys)
+        if kept_id is None:
+            index.add(food.pk, fingerprint, keys)
+        else:
+            duplicates[food.pk] = kept_id
+    return duplicates
+
+
+def merge_foods(duplicates):
+    """Move swipes and meal logs from each duplicate to the food it duplicates, then delete it.
+
+    Where the user already swiped or logged the kept food, the duplicate's
+    row is dropped rather than moved.
+    """
+    logged = set()
+    # Match grids showing a duplicate will show the kept food instead
+    bump_matches_for_foods(list(duplicates))
+    with transaction.atomic():
+        for duplicate_id, kept_id in duplicates.items():
+            matches = Match.objects.filter(food_profile_id=duplicate_id).exclude(
+                Exists(Match.objects.filter(food_profile_id=kept_id, user_id=OuterRef('user_id')))
+            )
+            matches.update(food_profile_id=kept_id)
+            logs = WeeklyFoodLog.objects.filter(food_profile_id=duplicate_id)
+            logged.update(logs.values_list('user_id', 'date_consumed'))
+            logs.exclude(
+                Exists(WeeklyFoodLog.objects.filter(
+                    food_profile_id=kept_id, user_id=OuterRef('user_id'), date_consumed=OuterRef('date_consumed')
+                ))
+            ).update(food_profile_id=kept_id)
+            # Cached recipes now stand for the kept food
+            RecipeCacheEntry.objects.filter(food_id=duplicate_id).update(food_id=kept_id)
+        for chunk in _chunks(list(duplicates)):
+            FoodProfile.objects.filter(pk__in=chunk).delete()
+    # Queryset updates skip the signals that keep these summaries fresh
+    for user_id in {user_id for user_id, _ in logged}:
+        invalidate_weekly_variety(user_id)
+    for user_id, day in logged:
+        invalidate_meal_plans(user_id, day)
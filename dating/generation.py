@@ -0,0 +1,189 @@
+# dating/generation.py
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+
+from django.conf import settings
+from django.db import transaction
+
+from . import metrics
+from .backends import as_backend
+from .catalog import sync_foods_ingredients
+from .dedup import drop_duplicates, index_foods
+from .models import FoodProfile
+from .recipe_cache import store_recipes, take_cached
+
+DEFAULT_CUISINES = ['Italian', 'Mexican', 'Asian', 'American', 'Mediterranean']
+GENERATED_MEAL_TYPES = ['breakfast', 'lunch', 'dinner', 'snack']
+RECIPE_SYSTEM_PROMPT = "You are a professional chef creating recipes. Return only valid JSON."
+
+
+def build_recipe_prompt(user_profile, cuisine, meal_type):
+    allergies = user_profile.get_allergies_list()
+    return f"""Create a {user_profile.diet_preferences} {meal_type} recipe from {cuisine} cuisine.
+            Avoid these allergies: {', '.join(allergies) if allergies else 'none'}.
+            Target calories: {user_profile.daily_calorie_goal // 4} calories.
+
+            Respond in this exact JSON format:
+            {{
+                "name": "Recipe Name",
+                "description": "Brief appetizing description",
+                "calories": 450,
+                "ingredients": "ingredient1, ingredient2, ingredient3"
+            }}"""
+
+
+def parse_recipe(content, cuisine, meal_type):
+    try:
+        return json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        # Fallback if JSON parsing fails
+        return {
+            "name": f"{cuisine} {meal_type.title()}",
+            "description": f"A delicious {cuisine} {meal_type}",
+            "calories": random.randint(200, 800),
+            "ingredients": "fresh ingredients"
+        }
+
+
+def build_image_prompt(food_data):
+    return f"professional food photography of {food_data['name']}, {food_data['description']}, appetizing, well-lit, restaurant quality"
+
+
+class GenerationEngine:
+    """Fans recipe and image calls out over a bounded thread pool.
+
+    Each recipe runs as its own pipeline, so its image request starts as soon
+    as its JSON has been parsed rather than after the whole batch. Every
+    client call is bounded by ``timeout`` seconds; a timed-out recipe call
+    drops that recipe, a timed-out image call just leaves ``image_url`` empty.
+    """
+
+    def __init__(self, client=None, concurrency=None, timeout=None):
+        # ``client`` is a GenerationBackend or a bare OpenAI-shaped client;
+        # by default GENERATION_BACKEND decides
+        self.backend = as_backend(client)
+        self.concurrency = max(1, concurrency or settings.GENERATION_CONCURRENCY)
+        self.timeout = timeout or settings.GENERATION_CALL_TIMEOUT
+
+    def generate(self, user_profile, count):
+        """Return recipe dicts ready to become FoodProfiles, one per pick the recipe cache could not serve"""
+        return self.generate_batch(user_profile, count)[1]
+
+    def generate_batch(self, user_profile, count):
+        """``(food_ids, recipes)``: unseen catalog foods the recipe cache served, and fresh recipes for the rest"""
+        cuisines = user_profile.get_cuisines_list() or DEFAULT_CUISINES
+        picks = [(random.choice(cuisines), random.choice(GENERATED_MEAL_TYPES)) for _ in range(count)]
+        # Cache reads stay on this thread, like the FoodProfile inserts
+        cached, picks = take_cached(user_profile, picks)
+
+        # Calls run on their own pool so a hung call can be abandoned without
+        # holding up its pipeline slot; twice the slots leaves room for those.
+        calls = ThreadPoolExecutor(max_workers=self.concurrency * 2, thread_name_prefix='llm-call')
+        recipes = []
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='llm-recipe') as pipelines:
+                futures = [
+                    pipelines.submit(self._generate_one, calls, user_profile, cuisine, meal_type)
+                    for cuisine, meal_type in picks
+                ]
+                for future in as_completed(futures):
+                    try:
+                        recipes.append(future.result())
+                    except Exception as e:
+                        print(f"Error generating food profile: {e}")
+        finally:
+            calls.shutdown(wait=False, cancel_futures=True)
+        return cached, recipes
+
+    def _call(self, calls, kind, fn, **kwargs):
+        start = time.perf_counter()
+        outcome = 'error'
+        future = calls.submit(fn, **kwargs)
+        try:
+            result = future.result(timeout=self.timeout)
+            outcome = 'ok'
+            return result
+        except FutureTimeoutError:
+            outcome = 'timeout'
+            future.cancel()
+            raise TimeoutError(f"LLM call timed out after {self.timeout}s")
+        finally:
+            metrics.store.observe_llm_call(kind, outcome, time.perf_counter() - start)
+
+    def _generate_one(self, calls, user_profile, cuisine, meal_type):
+        prompt = build_recipe_prompt(user_profile, cuisine, meal_type)
+        content = self._call(calls, 'recipe', self.backend.complete, system_prompt=RECIPE_SYSTEM_PROMPT, prompt=prompt)
+        food_data = parse_recipe(content, cuisine, meal_type)
+
+        try:
+            image_url = self._call(calls, 'image', self.backend.image_url, prompt=build_image_prompt(food_data))
+        except Exception:
+            image_url = ""
+
+        return {
+            'name': food_data['name'],
+            'description': food_data['description'],
+            'calories': food_data['calories'],
+            'meal_type': meal_type,
+            'cuisine_type': cuisine,
+            'diet_compatibility': user_profile.diet_preferences,
+            'ingredients': food_data['ingredients'],
+            'image_url': image_url,
+            'generated_prompt': prompt,
+        }
+
+
+def generate_food_profiles(user_profile, count=10, client=None, concurrency=None, dedup=True):
+    """Generate new food profiles using AI, returning how many were created"""
+    engine = GenerationEngine(client=client, concurrency=concurrency)
+    # Cache hits are foods already in the catalog that the user has not seen,
+    # so they fill their picks without a new row
+    _, recipes = engine.generate_batch(user_profile, count)
+    if dedup:
+        unique = drop_duplicates(recipes)
+        metrics.store.observe_duplicates(len(recipes) - len(unique))
+        recipes = unique
+
+    # Rows are written from the calling thread so worker threads never need
+    # their own database connections.
+    saved = save_food_profiles(recipes)
+    store_recipes(user_profile, saved)
+    return len(saved)
+
+
+def save_food_profiles(recipes):
+    """Insert recipes as FoodProfiles in one transaction, returning the saved rows.
+
+    The batch goes in with a single bulk_create; if that fails, each recipe
+    is retried under its own savepoint so one bad row only loses itself.
+    bulk_create skips the post_save signals, so the ingredient links and
+    duplicate index they maintain are written here for the whole batch.
+    """
+    foods = [
+        FoodProfile(
+            generation_successful=True,
+            image_status=FoodProfile.IMAGE_PENDING if recipe['image_url'] else '',
+            **recipe
+        )
+        for recipe in recipes
+    ]
+    if not foods:
+        return []
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                saved = FoodProfile.objects.bulk_create(foods)
+        except Exception:
+            saved = []
+            for food in foods:
+                try:
+                    with transaction.atomic():
+                        FoodProfile.objects.bulk_create([food])
+                    saved.append(food)
+                except Exception as e:
+                    print(f"Error saving food profile: {e}")
+        sync_foods_ingredients(saved)
+        index_foods(saved, replace=False)
+    return saved
@@ -0,0 +1,171 @@
+# dating/images.py
+import hashlib
+import io
+import ipaddress
+import socket
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import F
+from PIL import Image, ImageOps
+
+from .match_cache import bump_matches_for_foods
+from .models import FoodProfile
+
+# Crop sizes at twice the CSS size, for high-density screens: the card on
+# discover and the meal plan page, the thumbnail in the matches grid
+VARIANTS = {
+    'card': (896, 768),
+    'thumb': (600, 384),
+}
+FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+class ImageError(Exception):
+    """An image could not be downloaded or decoded"""
+
+
+def check_url(url):
+    """Refuse anything but http(s) URLs whose host resolves only to public addresses"""
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ImageError(f'Refusing to fetch {url!r}: only http and https URLs are allowed')
+    if settings.IMAGE_ALLOW_PRIVATE_HOSTS:
+        return
+    try:
+        infos = socket.getaddrinfo(parts.hostname, parts.port or None, proto=socket.IPPROTO_TCP)
+    except (OSError, UnicodeError, ValueError) as e:
+        raise ImageError(f'Could not resolve {url}: {e}') from e
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split('%')[0])
+        if not address.is_global:
+            raise ImageError(f'Refusing to fetch {url}: {address} is not a public address')
+
+
+class CheckedRedirectHandler(urllib.request.HTTPRedirectHandler):
+    # A public host must not be able to bounce the download to an internal one
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        check_url(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+# Only the handlers an http(s) download needs; no file:, ftp: or data: openers
+opener = urllib.request.OpenerDirector()
+for handler in [
+    urllib.request.HTTPHandler, urllib.request.HTTPSHandler, CheckedRedirectHandler,
+    urllib.request.HTTPDefaultErrorHandler, urllib.request.HTTPErrorProcessor,
+]:
+    opener.add_handler(handler())
+
+
+def download(url):
+    """The image at ``url``, at most IMAGE_MAX_BYTES, fetched within IMAGE_FETCH_TIMEOUT"""
+    check_url(url)
+    request = urllib.request.Request(url, headers={'User-Agent': 'foodmatch-images'})
+    try:
+        with opener.open(request, timeout=settings.IMAGE_FETCH_TIMEOUT) as response:
+            length = response.headers.get('Content-Length')
+            if length and length.isdigit() and int(length) > settings.IMAGE_MAX_BYTES:
+                raise ImageError(f'{url} is larger than {settings.IMAGE_MAX_BYTES} bytes')
+            data = response.read(settings.IMAGE_MAX_BYTES + 1)
+    except (OSError, ValueError) as e:
+        raise ImageError(f'Could not download {url}: {e}') from e
+    if len(data) > settings.IMAGE_MAX_BYTES:
+        raise ImageError(f'{url} is larger than {settings.IMAGE_MAX_BYTES} bytes')
+    return data
+
+
+def render_variants(data):
+    """``{(variant, format): bytes}`` cropped and resized from the original image"""
+    try:
+        with Image.open(io.BytesIO(data)) as original:
+            image = ImageOps.exif_transpose(original).convert('RGB')
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ImageError(f'Could not decode image: {e}') from e
+
+    rendered = {}
+    for variant, size in VARIANTS.items():
+        resized = ImageOps.fit(image, size, Image.LANCZOS)
+        for name, (pil_format, _, options) in FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, **options)
+            rendered[variant, name] = buffer.getvalue()
+    return rendered
+
+
+def store_variants(rendered):
+    """Save rendered variants under content-hashed names, returning what to record on the food.
+
+    A name only ever holds one content, so nginx can serve /media/ as
+    immutable and identical images are stored once.
+    """
+    variants = {}
+    for (variant, name), data in rendered.items():
+        digest = hashlib.sha256(data).hexdigest()
+        path = f'foods/{digest[:2]}/{digest[:32]}.{FORMATS[name][1]}'
+        if not default_storage.exists(path):
+            saved = default_storage.save(path, ContentFile(data))
+            # Another download of the same image got there first; storage
+            # renamed this copy, but the hashed name already holds the content
+            if saved != path:
+                default_storage.delete(saved)
+        width, height = VARIANTS[variant]
+        variants.setdefault(variant, {'width': width, 'height': height})[name] = path
+    return variants
+
+
+def fetch_variants(url):
+    return store_variants(render_variants(download(url)))
+
+
+def _fetch(food):
+    try:
+        return fetch_variants(food.image_url), None
+    except ImageError as e:
+        return None, e
+
+
+def ingest_pending_images(limit=None, concurrency=None):
+    """Download and store the next batch of queued images, returning ``(stored, failed)``.
+
+    Downloads run on a thread pool; the rows are updated from the calling
+    thread, like generated foods are inserted. A food whose download fails
+    stays queued until it has failed IMAGE_MAX_ATTEMPTS times.
+    """
+    foods = list(
+        FoodProfile.objects.filter(image_status=FoodProfile.IMAGE_PENDING)
+        .order_by('id').only('image_url', 'image_attempts')[:limit or settings.IMAGE_BATCH_SIZE]
+    )
+    if not foods:
+        return 0, 0
+
+    workers = max(1, concurrency or settings.IMAGE_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-fetch') as pool:
+        results = list(pool.map(_fetch, foods))
+
+    ready, failed = [], 0
+    for food, (variants, error) in zip(foods, results):
+        # Queryset updates keep the ingredient and dedup signals out of it
+        updates = {'image_attempts': F('image_attempts') + 1}
+        if variants:
+            FoodProfile.objects.filter(pk=food.pk).update(
+                image_status=FoodProfile.IMAGE_READY, image_variants=variants, **updates
+            )
+            ready.append(food.pk)
+            continue
+        print(f"Error storing image for food {food.pk}: {error}")
+        if food.image_attempts + 1 >= settings.IMAGE_MAX_ATTEMPTS:
+            updates['image_status'] = FoodProfile.IMAGE_FAILED
+            failed += 1
+        FoodProfile.objects.filter(pk=food.pk).update(**updates)
+    # Cached match grids still point at the remote images
+    if ready:
+        bump_matches_for_foods(ready)
+    return len(ready), failed
@@ -0,0 +1,112 @@
+# dating/jobs.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .generation import generate_food_profiles
+from .models import GenerationJob, UserProfile
+
+
+def enqueue_generation(user_profile, count=None):
+    """Queue food generation for a user, reusing any job that is still active"""
+    count = count or settings.GENERATION_BATCH_SIZE
+    # From the primary even inside a replica view: a job queued moments ago may
+    # not have replicated yet, and missing it would queue a duplicate
+    existing = GenerationJob.objects.using('default').filter(
+        user=user_profile.user,
+        status__in=GenerationJob.ACTIVE_STATUSES
+    ).first()
+    if existing:
+        return existing
+
+    return GenerationJob.objects.create(
+        user=user_profile.user,
+        diet_compatibility=user_profile.diet_preferences,
+        count=count
+    )
+
+
+def retry_generation(user_profile, job):
+    """Queue another job when ``job`` ended without refilling the deck.
+
+    Called while the deck is empty; a job that is still active is returned
+    as is, and a finished one is only retried GENERATION_RETRY_COOLDOWN
+    seconds after it ended, so an empty LLM reply is not retried in a loop.
+    """
+    if job is not None:
+        if job.status in GenerationJob.ACTIVE_STATUSES:
+            return job
+        ended = job.finished_at or job.created_at
+        if ended > timezone.now() - timedelta(seconds=settings.GENERATION_RETRY_COOLDOWN):
+            return job
+    return enqueue_generation(user_profile)
+
+
+def claim_next_job():
+    """Atomically mark the oldest runnable job as running and return it"""
+    stale_before = timezone.now() - timedelta(seconds=settings.GENERATION_JOB_TIMEOUT)
+    runnable = GenerationJob.objects.filter(
+        Q(status=GenerationJob.STATUS_PENDING) |
+        Q(status=GenerationJob.STATUS_RUNNING, started_at__lt=stale_before)
+    ).order_by('created_at')
+
+    for job in runnable[:10]:
+        # Compare-and-set so two workers never pick up the same job
+        claimed = GenerationJob.objects.filter(
+            pk=job.pk, status=job.status, started_at=job.started_at
+        ).update(
+            status=GenerationJob.STATUS_RUNNING,
+            started_at=timezone.now(),
+            attempts=job.attempts + 1
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def job_profile(job):
+    """Profile the job generates for; an unsaved stand-in when the job has no user"""
+    if job.user_id:
+        try:
+            return UserProfile.objects.get(user_id=job.user_id)
+        except UserProfile.DoesNotExist:
+            pass
+    return UserProfile(diet_preferences=job.diet_compatibility, favorite_cuisines=job.cuisine_type)
+
+
+def run_job(job, client=None):
+    """Run a claimed job to completion and record the outcome"""
+    try:
+        created = generate_food_profiles(job_profile(job), job.count, client=client)
+    except Exception as e:
+        job.status = (
+            GenerationJob.STATUS_FAILED
+            if job.attempts >= settings.GENERATION_JOB_MAX_ATTEMPTS
+            else GenerationJob.STATUS_PENDING
+        )
+        job.error = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        return job
+
+    job.status = GenerationJob.STATUS_DONE
+    job.foods_created = created
+    job.error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'foods_created', 'error', 'finished_at'])
+    return job
+
+
+def process_jobs(max_jobs=None, client=None):
+    """Drain the queue, returning the number of jobs processed"""
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job, client=client)
+        processed += 1
+    return processed
@@ -0,0 +1,199 @@
+# dating/loadtest.py
+import http.cookiejar
+import json
+import random
+import re
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date
+
+from django.db import connections
+from django.urls import reverse
+
+from .metrics import QueryTimer
+
+MATCH_LINK = re.compile(r'/add-to-meal-plan/(\d+)/')
+METRIC_LINE = re.compile(r'^(foodmatch_request_queries_total|foodmatch_request_duration_seconds_count)\{view="([^"]+)"\} (\S+)$')
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class TestClientDriver:
+    """Drives the app in-process through Django's test client, counting queries"""
+
+    def __init__(self):
+        from django.test import Client
+        self.client = Client()
+
+    def request(self, method, path, data=None, json_body=None):
+        queries = QueryTimer()
+        kwargs = {}
+        if json_body is not None:
+            kwargs = {'data': json.dumps(json_body), 'content_type': 'application/json'}
+        elif data is not None:
+            kwargs = {'data': data}
+        with connections['default'].execute_wrapper(queries):
+            response = getattr(self.client, method.lower())(path, **kwargs)
+        return response.status_code, response.content.decode(), queries.count
+
+
+class _NoRedirects(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HTTPDriver:
+    """Drives a running server (e.g. a local gunicorn) over HTTP.
+
+    Queries are not visible from here; the runner diffs the server's
+    metrics export instead.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirects)
+
+    def request(self, method, path, data=None, json_body=None):
+        headers = {'Referer': self.base_url + path}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            body = urllib.parse.urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        csrf = next((cookie.value for cookie in self.cookies if cookie.name == 'csrftoken'), None)
+        if csrf:
+            headers['X-CSRFToken'] = csrf
+
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(request) as response:
+                return response.status, response.read().decode(), None
+        except urllib.error.HTTPError as e:
+            # Redirects land here too since they are not followed
+            return e.code, e.read().decode(errors='replace'), None
+
+
+class Funnel:
+    """One new user's trip from sign-up to planning a matched meal"""
+
+    def __init__(self, driver, username, swipes=10, diet='omnivore'):
+        self.driver = driver
+        self.username = username
+        self.swipes = swipes
+        self.diet = diet
+        self.samples = []
+
+    def step(self, view, method, path=None, **kwargs):
+        start = time.perf_counter()
+        status, body, queries = self.driver.request(method, path or reverse(view), **kwargs)
+        self.samples.append((view, (time.perf_counter() - start) * 1000, queries, status))
+        return status, body
+
+    def run(self):
+        password = 'Bench-pass-123!'
+        self.step('dating:register', 'GET')
+        self.step('dating:register', 'POST', data={
+            'username': self.username, 'email': f'{self.username}@example.com',
+            'first_name': 'Bench', 'last_name': 'User', 'password1': password, 'password2': password,
+        })
+        self.step('dating:setup_profile', 'GET')
+        self.step('dating:setup_profile', 'POST', data={
+            'diet_preferences': self.diet, 'allergies': '', 'daily_calorie_goal': 2000,
+            'activity_level': 'moderately_active', 'favorite_cuisines': 'Italian, Mexican',
+        })
+        self.step('dating:discover', 'GET')
+
+        status, body = self.step('dating:deck', 'GET', f'{reverse("dating:deck")}?limit={self.swipes}')
+        foods = json.loads(body)['foods'] if status == 200 else []
+        for food in foods:
+            self.step('dating:swipe_food', 'POST', json_body={
+                'food_id': food['id'], 'action': random.choice(['like', 'like', 'pass'])
+            })
+
+        status, body = self.step('dating:matches', 'GET')
+        match_ids = MATCH_LINK.findall(body)
+        if match_ids:
+            path = reverse('dating:add_to_meal_plan', args=[match_ids[0]])
+            self.step('dating:add_to_meal_plan', 'GET', path)
+            self.step('dating:add_to_meal_plan', 'POST', path, data={
+                'meal_type': 'dinner', 'date': date.today().isoformat()
+            })
+        return self.samples
+
+
+def scrape_query_counts(base_url, token):
+    """``{view: [requests, queries]}`` from a server's metrics export"""
+    request = urllib.request.Request(
+        base_url.rstrip('/') + reverse('dating:metrics'), headers={'Authorization': f'Bearer {token}'}
+    )
+    with urllib.request.urlopen(request) as response:
+        text = response.read().decode()
+    counts = {}
+    for line in text.splitlines():
+        found = METRIC_LINE.match(line)
+        if found:
+            family, view, value = found.groups()
+            column = 1 if family == 'foodmatch_request_queries_total' else 0
+            counts.setdefault(view, [0, 0])[column] = float(value)
+    return counts
+
+
+def summarize(samples, seconds):
+    """Throughput plus per-view latency percentiles and queries per request"""
+    views = {}
+    for view in sorted({sample[0] for sample in samples}):
+        rows = [sample for sample in samples if sample[0] == view]
+        latencies = [ms for _, ms, _, _ in rows]
+        queries = [count for _, _, count, _ in rows if count is not None]
+        views[view] = {
+            'requests': len(rows),
+            'errors': sum(1 for *_, status in rows if status >= 400),
+            'p50': round(percentile(latencies, 0.50), 2),
+            'p95': round(percentile(latencies, 0.95), 2),
+            'p99': round(percentile(latencies, 0.99), 2),
+            'queries': round(sum(queries) / len(queries), 2) if queries else None,
+        }
+    latencies = [ms for _, ms, _, _ in samples]
+    return {
+        'requests': len(samples),
+        'seconds': round(seconds, 3),
+        'throughput': round(len(samples) / seconds, 2) if seconds else 0.0,
+        'p50': round(percentile(latencies, 0.50), 2),
+        'p95': round(percentile(latencies, 0.95), 2),
+        'p99': round(percentile(latencies, 0.99), 2),
+        'views': views,
+    }
+
+
+def compare(result, baseline, tolerance, min_delta_ms=5.0):
+    """Rows of ``(view, metric, before, after, regressed)`` against a saved baseline.
+
+    Latency regresses when p95 grows by more than ``tolerance`` and by at
+    least ``min_delta_ms``, so a few milliseconds of noise on a fast view do
+    not fail the run. Queries per request are deterministic enough that any
+    increase over half a query counts.
+    """
+    rows = []
+    for view, now in result['views'].items():
+        before = baseline.get('views', {}).get(view)
+        if not before:
+            continue
+        slower = now['p95'] > before['p95'] * (1 + tolerance) and now['p95'] - before['p95'] >= min_delta_ms
+        rows.append((view, 'p95', before['p95'], now['p95'], slower))
+        if now['queries'] is not None and before['queries'] is not None:
+            rows.append((view, 'queries', before['queries'], now['queries'], now['queries'] > before['queries'] + 0.5))
+    rows.append((
+        'total', 'throughput', baseline['throughput'], result['throughput'],
+        result['throughput'] < baseline['throughput'] * (1 - tolerance)
+    ))
+    return rows
@@ -0,0 +1,129 @@
+# management/commands/benchmark_candidates.py
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from dating.candidates import next_deck
+from dating.models import CustomUser, FoodProfile, Match, UserProfile
+from dating.ranking import swipe_history_key
+
+DIETS = [choice for choice, _ in UserProfile.DIET_CHOICES]
+CUISINES = ['Italian', 'Mexican', 'Asian', 'American', 'Mediterranean', 'Thai', 'Indian', 'French']
+
+
+class Rollback(Exception):
+    pass
+
+
+def legacy_next_food(user, user_profile):
+    """The pre-candidate-service discover lookup, kept for comparison"""
+    seen_food_ids = Match.objects.filter(user=user).values_list('food_profile_id', flat=True)
+    available_foods = FoodProfile.objects.filter(
+        diet_compatibility=user_profile.diet_preferences
+    ).exclude(id__in=seen_food_ids)
+    available_foods.exists()  # discover checked this before deciding to generate
+    return available_foods.first() if available_foods.exists() else None
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic foods and swipes in a rolled-back transaction and time deck selection as they grow'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--foods', type=int, default=100_000, help='Total foods to seed')
+        parser.add_argument('--matches', type=int, default=1_000_000, help='Total swipes to seed')
+        parser.add_argument('--users', type=int, default=1000, help='Users the swipes are spread over')
+        parser.add_argument('--steps', type=int, default=4, help='Growth steps to measure at')
+        parser.add_argument('--samples', type=int, default=50, help='Lookups timed per step')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback()
+        except Rollback:
+            self.stdout.write('Rolled back seeded data')
+
+    def run(self, options):
+        steps = options['steps']
+        users = self.seed_users(options['users'])
+        profiles = {p.user_id: p for p in UserProfile.objects.filter(user__in=users)}
+        food_ids = []
+
+        self.stdout.write(f'{"foods":>9} {"matches":>9} {"deck p50":>15} {"p95":>8} {"legacy p50":>11}')
+        for step in range(1, steps + 1):
+            food_target = options['foods'] * step // steps
+            match_target = options['matches'] * step // steps
+            food_ids += self.seed_foods(food_target - len(food_ids))
+            self.seed_matches(users, food_ids, match_target - Match.objects.count())
+
+            sample = random.sample(users, min(options['samples'], len(users)))
+            # Warm each user's cached taste first, as between a user's deck requests
+            cache.delete_many([swipe_history_key(u.pk) for u in sample])
+            for user in sample:
+                next_deck(profiles[user.pk], settings.DECK_SIZE)
+            fast = self.time_lookups(lambda u: next_deck(profiles[u.pk], settings.DECK_SIZE), sample)
+            slow = self.time_lookups(lambda u: legacy_next_food(u, profiles[u.pk]), sample[:10])
+            self.stdout.write(
+                f'{food_target:>9} {match_target:>9} {fast[0]:>13.2f}ms {fast[1]:>6.2f}ms {slow[0]:>9.2f}ms'
+            )
+
+    def time_lookups(self, lookup, users):
+        timings = []
+        for user in users:
+            start = time.perf_counter()
+            lookup(user)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+    def seed_users(self, count):
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f'bench{i}', email=f'bench{i}@example.com', password='!')
+            for i in range(count)
+        ], batch_size=1000)
+        users = list(CustomUser.objects.filter(username__startswith='bench', email__endswith='@example.com'))
+        # Everyone picks favourites during setup, so the benchmark users do too
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user, diet_preferences='omnivore', profile_completed=True,
+                favorite_cuisines=', '.join(random.sample(CUISINES, 2))
+            )
+            for user in users
+        ], batch_size=1000)
+        return users
+
+    def seed_foods(self, count):
+        first_new = (FoodProfile.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        FoodProfile.objects.bulk_create([
+            FoodProfile(
+                name=f'Bench food {i}',
+                description='Synthetic',
+                calories=random.randint(150, 900),
+                meal_type=random.choice(['breakfast', 'lunch', 'dinner', 'snack']),
+                cuisine_type=random.choice(CUISINES),
+                diet_compatibility=random.choice(DIETS),
+                ingredients='salt, pepper',
+                generation_successful=True,
+            )
+            for i in range(count)
+        ], batch_size=2000)
+        return list(FoodProfile.objects.filter(id__gte=first_new).values_list('id', flat=True))
+
+    def seed_matches(self, users, food_ids, count):
+        if count <= 0:
+            return
+        per_user = count // len(users)
+        batch = []
+        for user in users:
+            for food_id in random.sample(food_ids, min(per_user, len(food_ids))):
+                batch.append(Match(user=user, food_profile_id=food_id, user_liked=random.random() < 0.5))
+            if len(batch) >= 20_000:
+                Match.objects.bulk_create(batch, batch_size=5000, ignore_conflicts=True)
+                batch = []
+        Match.objects.bulk_create(batch, batch_size=5000, ignore_conflicts=True)
@@ -0,0 +1,106 @@
+# management/commands/benchmark_funnel.py
+import json
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from dating.loadtest import Funnel, HTTPDriver, TestClientDriver, compare, scrape_query_counts, summarize
+from dating.models import CustomUser
+
+class Command(BaseCommand):
+    help = (
+        'Run the register -> setup_profile -> discover -> swipe -> matches -> add_to_meal_plan funnel '
+        'through the test client or against a running server, and compare with a saved baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='New users sent through the funnel')
+        parser.add_argument('--swipes', type=int, default=10, help='Swipes per user')
+        parser.add_argument('--url', help='Base URL of a running server, e.g. http://127.0.0.1:8000 (needs DEBUG=True '
+                                          'so session cookies work over plain HTTP); the test client is used otherwise')
+        parser.add_argument('--concurrency', type=int, default=1, help='Parallel users (with --url only)')
+        parser.add_argument('--metrics-token', default=settings.METRICS_TOKEN,
+                            help='Token for the server metrics export, used for queries per request with --url')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for swipe decisions')
+        parser.add_argument('--save', help='Write the results to this JSON file as a baseline')
+        parser.add_argument('--compare', help='Compare with a baseline JSON file and fail on regressions')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed latency/throughput change')
+        parser.add_argument('--min-delta-ms', type=float, default=5.0, help='Ignore p95 increases smaller than this')
+        parser.add_argument('--keep', action='store_true', help='Keep the users the run created')
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        prefix = f'funnel-{uuid.uuid4().hex[:6]}-'
+        url = options['url']
+        if url:
+            make_driver = lambda: HTTPDriver(url)
+            workers = max(1, options['concurrency'])
+        else:
+            from django.test.utils import setup_test_environment
+            setup_test_environment()
+            make_driver = TestClientDriver
+            workers = 1  # the test client runs in this process and shares its connection
+
+        def run_user(i):
+            return Funnel(make_driver(), f'{prefix}{i}', swipes=options['swipes']).run()
+
+        before = self.query_counts(url, options['metrics_token'])
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            samples = [sample for user_samples in pool.map(run_user, range(options['users'])) for sample in user_samples]
+        result = summarize(samples, time.perf_counter() - start)
+        result.update({'mode': 'http' if url else 'test-client', 'users': options['users'], 'swipes': options['swipes']})
+
+        after = self.query_counts(url, options['metrics_token'])
+        for view, (requests, queries) in (after or {}).items():
+            done = requests - before.get(view, [0, 0])[0]
+            if view in result['views'] and done:
+                result['views'][view]['queries'] = round((queries - before.get(view, [0, 0])[1]) / done, 2)
+
+        if not options['keep']:
+            CustomUser.objects.filter(username__startswith=prefix).delete()
+
+        self.report(result)
+        if options['save']:
+            with open(options['save'], 'w') as handle:
+                json.dump(result, handle, indent=2)
+            self.stdout.write(f'Baseline written to {options["save"]}')
+        if options['compare']:
+            with open(options['compare']) as handle:
+                self.compare(result, json.load(handle), options['tolerance'], options['min_delta_ms'])
+
+    def query_counts(self, url, token):
+        if not (url and token):
+            return {}
+        # Other workers flush their counters every METRICS_FLUSH_INTERVAL seconds
+        time.sleep(settings.METRICS_FLUSH_INTERVAL)
+        return scrape_query_counts(url, token)
+
+    def report(self, result):
+        self.stdout.write(
+            f'{result["requests"]} requests from {result["users"]} users in {result["seconds"]:.2f}s '
+            f'({result["throughput"]:.1f} req/s, {result["mode"]})'
+        )
+        self.stdout.write(f'{"view":<26} {"reqs":>5} {"errors":>6} {"p50":>8} {"p95":>8} {"p99":>8} {"queries":>8}')
+        for view, row in result['views'].items():
+            queries = '-' if row['queries'] is None else f'{row["queries"]:.1f}'
+            self.stdout.write(
+                f'{view:<26} {row["requests"]:>5} {row["errors"]:>6} {row["p50"]:>6.1f}ms '
+                f'{row["p95"]:>6.1f}ms {row["p99"]:>6.1f}ms {queries:>8}'
+            )
+
+    def compare(self, result, baseline, tolerance, min_delta_ms):
+        rows = compare(result, baseline, tolerance, min_delta_ms)
+        self.stdout.write(f'\n{"view":<26} {"metric":<10} {"baseline":>9} {"now":>9} {"change":>8}')
+        for view, metric, before, now, regressed in rows:
+            change = f'{(now - before) / before:+.0%}' if before else '-'
+            line = f'{view:<26} {metric:<10} {before:>9.1f} {now:>9.1f} {change:>8}'
+            self.stdout.write(self.style.ERROR(line) if regressed else line)
+
+        regressions = sum(1 for *_, regressed in rows if regressed)
+        if regressions:
+            raise CommandError(f'{regressions} regressions against the baseline')
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
@@ -0,0 +1,38 @@
+# management/commands/benchmark_generation.py
+import time
+
+from django.core.management.base import BaseCommand
+from dating.backends import StubBackend
+from dating.generation import GenerationEngine
+from dating.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Compare serial and concurrent food generation against the offline stub backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10, help='Recipes per batch')
+        parser.add_argument('--concurrency', type=int, default=5, help='Concurrent recipe pipelines')
+        parser.add_argument('--chat-latency', type=float, default=0.2, help='Seconds per fake recipe call')
+        parser.add_argument('--image-latency', type=float, default=0.2, help='Seconds per fake image call')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        client = StubBackend(latency=options['chat_latency'], image_latency=options['image_latency'], failure_rate=0)
+        profile = UserProfile(diet_preferences='omnivore')
+
+        results = {}
+        for label, concurrency in [('serial', 1), ('concurrent', options['concurrency'])]:
+            engine = GenerationEngine(client=client, concurrency=concurrency, timeout=60)
+            start = time.perf_counter()
+            recipes = engine.generate(profile, count)
+            elapsed = time.perf_counter() - start
+            results[label] = elapsed
+            self.stdout.write(
+                f'{label:>10}: {len(recipes)} recipes in {elapsed:.2f}s '
+                f'(concurrency={concurrency})'
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Speedup: {results["serial"] / results["concurrent"]:.1f}x')
+        )
@@ -0,0 +1,83 @@
+# management/commands/benchmark_matches.py
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.urls import reverse
+from dating.match_cache import bump_matches_version
+from dating.models import CustomUser, FoodProfile, Match
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Time the matches page uncached, from the fragment cache and as a 304 for users with many matches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--matches', type=int, nargs='+', default=[100, 300, 600],
+                            help='Mutual match counts to measure at')
+        parser.add_argument('--samples', type=int, default=30, help='Requests timed per mode')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback()
+        except Rollback:
+            self.stdout.write('Rolled back seeded data')
+
+    def run(self, options):
+        self.stdout.write(
+            f'{"matches":>8} {"mode":<10} {"p50":>8} {"p95":>8} {"queries":>8} {"bytes":>8}'
+        )
+        for count in options['matches']:
+            client, user = self.seed_user(count)
+            url = reverse('dating:matches')
+            revalidate = lambda: {'HTTP_IF_NONE_MATCH': client.get(url)['ETag']}
+
+            modes = [
+                ('uncached', lambda: bump_matches_version(user.pk), dict),
+                ('fragment', lambda: None, dict),
+                ('304', lambda: None, revalidate),
+            ]
+            for mode, prepare, headers in modes:
+                timings, queries, size = [], 0, 0
+                headers = headers()
+                for _ in range(options['samples']):
+                    prepare()
+                    with CaptureQueriesContext(connection) as captured:
+                        start = time.perf_counter()
+                        response = client.get(url, **headers)
+                        timings.append((time.perf_counter() - start) * 1000)
+                    queries, size = len(captured), len(response.content)
+                timings.sort()
+                self.stdout.write(
+                    f'{count:>8} {mode:<10} {statistics.median(timings):>6.2f}ms '
+                    f'{timings[int(len(timings) * 0.95) - 1]:>6.2f}ms {queries:>8} {size:>8}'
+                )
+
+    def seed_user(self, count):
+        user = CustomUser.objects.create_user(
+            username=f'bench-matches-{count}', email=f'bench-matches-{count}@example.com', password='!',
+            first_name='Bench'
+        )
+        foods = FoodProfile.objects.bulk_create([
+            FoodProfile(
+                name=f'Bench match {i}', description='Synthetic benchmark dish ' * 4, calories=400,
+                meal_type='dinner', cuisine_type='Italian', diet_compatibility='omnivore',
+                ingredients='salt, pepper', image_url=f'https://img.example.com/{i}.png', generation_successful=True
+            )
+            for i in range(count)
+        ], batch_size=1000)
+        Match.objects.bulk_create([
+            Match(user=user, food_profile=food, user_liked=True, food_liked=True) for food in foods
+        ], batch_size=1000)
+        client = Client()
+        client.force_login(user)
+        return client, user
@@ -0,0 +1,64 @@
+# management/commands/benchmark_ranking.py
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from dating.models import FoodProfile
+from dating.ranking import CandidateBatch, Taste, naive_scores, rank
+
+CUISINES = ['Italian', 'Mexican', 'Asian', 'American', 'Mediterranean', 'Thai', 'Indian', 'French', 'Greek', 'Korean']
+MEAL_TYPES = [meal_type for meal_type, _ in FoodProfile.MEAL_TYPES]
+
+
+class Command(BaseCommand):
+    help = 'Time ranking synthetic candidate rows with NumPy against the per-row Python loop'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, nargs='+', default=[100, 1000, 10000],
+                            help='Batch sizes to measure at')
+        parser.add_argument('--samples', type=int, default=200, help='Rankings timed per batch size and mode')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        taste = Taste(
+            {
+                (cuisine, meal_type): (rng.randint(0, 10), rng.randint(10, 20))
+                for cuisine in CUISINES[:6] for meal_type in MEAL_TYPES
+            },
+            {cuisine: rng.randint(1, 4) for cuisine in CUISINES[:3]},
+            ['Thai'],
+            2000
+        )
+
+        self.stdout.write(
+            f'{"candidates":>10} {"rank p50":>10} {"end-to-end":>11} {"loop p50":>10} {"speedup":>8}'
+        )
+        for count in options['candidates']:
+            # Rows shaped like the candidate query's values_list()
+            rows = [self.make_row(rng) for _ in range(count)]
+            batch = CandidateBatch.from_rows(rows, taste)
+
+            ranked = self.time(lambda: rank(batch, taste), options['samples'])
+            end_to_end = self.time(lambda: rank(CandidateBatch.from_rows(rows, taste), taste), options['samples'])
+            loop = self.time(lambda: self.rank_naive(rows, taste), options['samples'])
+            self.stdout.write(
+                f'{count:>10} {ranked:>8.3f}ms {end_to_end:>9.3f}ms {loop:>8.3f}ms {loop / end_to_end:>7.1f}x'
+            )
+
+    def make_row(self, rng):
+        swipes = rng.randint(0, 50)
+        return (rng.choice(CUISINES), rng.choice(MEAL_TYPES), rng.randint(150, 1200), rng.randint(0, swipes), swipes)
+
+    def rank_naive(self, rows, taste):
+        scores = naive_scores(rows, taste)
+        return sorted(range(len(rows)), key=lambda i: -scores[i])
+
+    def time(self, run, samples):
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
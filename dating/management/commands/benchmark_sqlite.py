@@ -0,0 +1,122 @@
+# management/commands/benchmark_sqlite.py
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+from django.urls import reverse
+from dating.loadtest import percentile
+
+MODES = [
+    # The untuned run mirrors the old settings: rollback journal, Python's
+    # 5s lock timeout and a fresh connection per request
+    ('default', {'SQLITE_TUNING': 'False', 'SQLITE_TIMEOUT': '5'}),
+    ('tuned', {'SQLITE_TUNING': 'True'}),
+]
+
+
+class Command(BaseCommand):
+    help = 'Run concurrent browse/swipe processes against a scratch SQLite file with and without tuning'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=6, help='Concurrent client processes')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds each worker runs')
+        parser.add_argument('--foods', type=int, default=3000, help='Foods to seed')
+        # Internal: the same command re-invoked as a seeder or a worker process
+        parser.add_argument('--seed-only', action='store_true', help=argparse.SUPPRESS)
+        parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['seed_only']:
+            return self.seed(options)
+        if options['worker'] is not None:
+            return self.work(options)
+
+        self.stdout.write(f'{"mode":<8} {"requests":>9} {"locked":>7} {"req/s":>7} {"p50":>8} {"p99":>8}')
+        for mode, env in MODES:
+            with tempfile.TemporaryDirectory() as scratch:
+                env = dict(os.environ, DATABASE_PATH=os.path.join(scratch, 'bench.sqlite3'), **env)
+                self.spawn(['--seed-only', '--foods', str(options['foods']), '--workers', str(options['workers'])], env).wait()
+                workers = [
+                    self.spawn(['--worker', str(i), '--duration', str(options['duration'])], env, stdout=subprocess.PIPE)
+                    for i in range(options['workers'])
+                ]
+                results = [json.loads(worker.communicate()[0]) for worker in workers]
+
+            latencies = [ms for result in results for ms in result['latencies']]
+            locked = sum(result['locked'] for result in results)
+            self.stdout.write(
+                f'{mode:<8} {len(latencies):>9} {locked:>7} {len(latencies) / options["duration"]:>7.0f} '
+                f'{percentile(latencies, 0.5):>6.1f}ms {percentile(latencies, 0.99):>6.1f}ms'
+            )
+
+    def spawn(self, arguments, env, stdout=None):
+        return subprocess.Popen(
+            [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'benchmark_sqlite', *arguments],
+            env=env, stdout=stdout, stderr=subprocess.DEVNULL
+        )
+
+    def seed(self, options):
+        from dating.models import CustomUser, FoodProfile, UserProfile
+
+        call_command('migrate', verbosity=0)
+        FoodProfile.objects.bulk_create([
+            FoodProfile(
+                name=f'Bench food {i}', description='Synthetic', calories=400, meal_type='dinner',
+                cuisine_type='Italian', diet_compatibility='omnivore', ingredients='salt, pepper',
+                generation_successful=True
+            )
+            for i in range(options['foods'])
+        ], batch_size=1000)
+        for i in range(options['workers']):
+            user = CustomUser.objects.create(username=f'bench{i}', email=f'bench{i}@example.com', password='!')
+            UserProfile.objects.filter(user=user).update(profile_completed=True)
+
+    def work(self, options):
+        from django.test import Client
+        from django.test.utils import setup_test_environment
+        from dating.models import CustomUser
+
+        setup_test_environment()
+        client = Client()
+        client.force_login(CustomUser.objects.get(username=f'bench{options["worker"]}'))
+        random.seed(options['worker'])
+
+        latencies, locked = [], 0
+        deadline = time.monotonic() + options['duration']
+
+        def timed(method, *args, **kwargs):
+            nonlocal locked
+            start = time.perf_counter()
+            try:
+                response = method(*args, **kwargs)
+            except OperationalError as e:
+                if 'locked' not in str(e):
+                    raise
+                locked += 1
+                response = None
+            latencies.append((time.perf_counter() - start) * 1000)
+            return response
+
+        while time.monotonic() < deadline:
+            # Browse, then swipe through the deck that came back
+            timed(client.get, reverse('dating:discover'))
+            response = timed(client.get, reverse('dating:deck'), {'limit': 5})
+            foods = response.json()['foods'] if response is not None else []
+            for food in foods:
+                timed(
+                    client.post, reverse('dating:swipe_food'),
+                    json.dumps({'food_id': food['id'], 'action': random.choice(['like', 'pass'])}),
+                    content_type='application/json'
+                )
+
+        sys.stdout.write(json.dumps({'latencies': latencies, 'locked': locked}))
+
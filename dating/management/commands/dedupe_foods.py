@@ -0,0 +1,51 @@
+# management/commands/dedupe_foods.py
+import time
+
+from django.core.management.base import BaseCommand
+from dating.dedup import find_catalog_duplicates, merge_foods, rebuild_index
+from dating.models import FoodProfile
+
+class Command(BaseCommand):
+    help = (
+        'Merge near-duplicate foods in the existing catalog into the oldest of each group '
+        'and rebuild the duplicate index'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only list the duplicates that would be merged')
+        parser.add_argument('--show', type=int, default=20, help='Duplicates to list')
+        parser.add_argument('--index-only', action='store_true',
+                            help='Just rebuild the index, e.g. after bulk inserts that skipped the signals')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options['index_only']:
+            rebuild_index()
+            self.stdout.write(self.style.SUCCESS(
+                f'Indexed {FoodProfile.objects.count()} foods in {time.perf_counter() - start:.1f}s'
+            ))
+            return
+
+        duplicates = find_catalog_duplicates()
+        scanned = time.perf_counter() - start
+        self.stdout.write(f'{len(duplicates)} duplicates found in {scanned:.1f}s')
+
+        shown = list(duplicates.items())[:options['show']]
+        names = dict(FoodProfile.objects.filter(
+            pk__in=[pk for pair in shown for pk in pair]
+        ).values_list('pk', 'name'))
+        if shown:
+            self.stdout.write(f'{"duplicate":<40} {"kept":<40}')
+        for duplicate_id, kept_id in shown:
+            self.stdout.write(
+                f'{names[duplicate_id][:32]:<32} #{duplicate_id:<6} {names[kept_id][:32]:<32} #{kept_id:<6}'
+            )
+
+        if options['dry_run']:
+            return
+        merge_foods(duplicates)
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Merged {len(duplicates)} duplicates in {time.perf_counter() - start:.1f}s, '
+            f'{FoodProfile.objects.count()} foods left'
+        ))
@@ -0,0 +1,38 @@
+# management/commands/food_pool.py
+from django.core.management.base import BaseCommand
+from dating.pool import buckets_needing_refill, pool_stats, refill_pool
+
+class Command(BaseCommand):
+    help = 'Show candidate pool depth per (diet, cuisine) bucket and optionally queue refills'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refill', action='store_true', help='Queue generation for buckets below the watermark')
+        parser.add_argument('--watermark', type=int, help='Override POOL_LOW_WATERMARK')
+        parser.add_argument('--all', action='store_true', help='Include buckets no active user is waiting on')
+
+    def handle(self, *args, **options):
+        watermark = options.get('watermark')
+        stats = pool_stats()
+        low = {(b['diet'], b['cuisine']) for b in buckets_needing_refill(stats, watermark)}
+
+        self.stdout.write(
+            f'{"diet":<14} {"cuisine":<16} {"users":>5} {"depth":>6} {"refill/h":>9} {"swipes/h":>9} {"exhausts in":>12}'
+        )
+        for b in stats:
+            if not b['active_users'] and not options['all']:
+                continue
+            hours = b['hours_to_exhaustion']
+            exhausts = 'never' if hours is None else f'{hours:.1f}h'
+            line = (
+                f'{b["diet"]:<14} {b["cuisine"][:16]:<16} {b["active_users"]:>5} {b["depth"]:>6} '
+                f'{b["refill_rate"]:>9.2f} {b["consumption_rate"]:>9.2f} {exhausts:>12}'
+            )
+            if (b['diet'], b['cuisine']) in low:
+                line = self.style.WARNING(line)
+            self.stdout.write(line)
+
+        if options['refill']:
+            jobs = refill_pool(watermark=watermark)
+            self.stdout.write(self.style.SUCCESS(f'Queued {len(jobs)} refill jobs'))
+        elif low:
+            self.stdout.write(f'{len(low)} buckets below watermark, run with --refill to queue generation')
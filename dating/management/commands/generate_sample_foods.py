@@ -1,8 +1,14 @@
 # management/commands/generate_sample_foods.py
+import time
+
 from django.core.management.base import BaseCommand
-from django.contrib.auth.models import User
+from django.contrib.auth import get_user_model
 from dating.models import UserProfile, FoodProfile
-from dating.views import generate_food_profiles
+from dating.backends import BACKENDS, get_backend
+from dating.generation import generate_food_profiles
+from dating.recipe_cache import hit_rate, stats as cache_stats
+
+User = get_user_model()
 
 class Command(BaseCommand):
     help = 'Generate sample food profiles for testing'
@@ -10,10 +16,18 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--count', type=int, default=20, help='Number of food profiles to generate')
         parser.add_argument('--user', type=str, help='Username to generate foods for')
+        parser.add_argument('--concurrency', type=int, help='Number of recipes to generate in parallel')
+        parser.add_argument('--backend', help=f'Generation backend ({", ".join(BACKENDS)} or a dotted path); '
+                                              'defaults to GENERATION_BACKEND')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Recipes generated and inserted per transaction')
+        parser.add_argument('--no-dedup', action='store_true',
+                            help='Keep near-duplicate recipes, e.g. to load-test with the stub backend')
 
     def handle(self, *args, **options):
         count = options['count']
         username = options.get('user')
+        concurrency = options.get('concurrency')
         
         if username:
             try:
@@ -43,11 +57,28 @@ class Command(BaseCommand):
         self.stdout.write(f'Generating {count} food profiles...')
         
         try:
-            generate_food_profiles(user_profile, count)
+            before = cache_stats.snapshot()
+            backend = get_backend(options.get('backend'))
+            batch_size = max(1, options['batch_size'])
+            created = 0
+            start = time.perf_counter()
+            for done in range(0, count, batch_size):
+                created += generate_food_profiles(
+                    user_profile, min(batch_size, count - done), client=backend, concurrency=concurrency,
+                    dedup=not options['no_dedup']
+                )
+                if count > batch_size:
+                    elapsed = time.perf_counter() - start
+                    self.stdout.write(f'  {created} rows after {elapsed:.1f}s ({created / elapsed:.0f} rows/s)')
+            elapsed = time.perf_counter() - start
             self.stdout.write(
-                self.style.SUCCESS(f'Successfully generated {count} food profiles!')
+                self.style.SUCCESS(f'Successfully generated {created} of {count} food profiles!')
             )
+            self.stdout.write(f'{elapsed:.2f}s, {created / elapsed:.0f} rows/s')
+            hits, lookups = hit_rate(before, cache_stats.snapshot())
+            if lookups:
+                self.stdout.write(f'Recipe cache: {hits} of {lookups} recipes reused ({hits / lookups:.0%} hit rate)')
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'Error generating food profiles: {str(e)}')
-            )
\ No newline at end of file
+            )
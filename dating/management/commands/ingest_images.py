@@ -0,0 +1,43 @@
+# management/commands/ingest_images.py
+import time
+
+from django.core.management.base import BaseCommand
+from dating.images import ingest_pending_images
+from dating.models import FoodProfile
+
+class Command(BaseCommand):
+    help = 'Download queued food images and store their card and thumbnail variants under MEDIA_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='Stop after this many foods')
+        parser.add_argument('--batch-size', type=int, help='Foods per batch, defaults to IMAGE_BATCH_SIZE')
+        parser.add_argument('--concurrency', type=int, help='Parallel downloads, defaults to IMAGE_CONCURRENCY')
+        parser.add_argument('--retry-failed', action='store_true', help='Queue foods whose downloads gave up again')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            requeued = FoodProfile.objects.filter(image_status=FoodProfile.IMAGE_FAILED).update(
+                image_status=FoodProfile.IMAGE_PENDING, image_attempts=0
+            )
+            self.stdout.write(f'Queued {requeued} failed images again')
+
+        limit = options.get('limit')
+        stored = failed = 0
+        start = time.perf_counter()
+        while True:
+            batch = options.get('batch_size')
+            if limit is not None:
+                batch = min(batch or limit, limit - stored - failed)
+                if batch <= 0:
+                    break
+            done, gave_up = ingest_pending_images(batch, options.get('concurrency'))
+            if not (done or gave_up) and not FoodProfile.objects.filter(
+                image_status=FoodProfile.IMAGE_PENDING
+            ).exists():
+                break
+            stored += done
+            failed += gave_up
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored images for {stored} foods in {time.perf_counter() - start:.1f}s, {failed} gave up'
+        ))
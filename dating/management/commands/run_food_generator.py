@@ -0,0 +1,85 @@
+# management/commands/run_food_generator.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from dating import metrics
+from dating.backends import BACKENDS, get_backend
+from dating.images import ingest_pending_images
+from dating.jobs import claim_next_job, run_job
+from dating.models import GenerationJob
+from dating.pool import refill_pool
+from dating.recipe_cache import hit_rate, stats as cache_stats
+
+class Command(BaseCommand):
+    help = 'Worker process that runs queued food generation jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--max-jobs', type=int, help='Exit after processing this many jobs')
+        parser.add_argument('--no-refill', action='store_true', help='Do not top up the candidate pool between jobs')
+        parser.add_argument('--no-images', action='store_true', help='Do not download queued food images between jobs')
+        parser.add_argument('--backend', help=f'Generation backend ({", ".join(BACKENDS)} or a dotted path); '
+                                              'defaults to GENERATION_BACKEND')
+
+    def handle(self, *args, **options):
+        once = options['once']
+        sleep = options['sleep']
+        max_jobs = options.get('max_jobs')
+        refill = not options['no_refill']
+        images = not options['no_images']
+        backend = get_backend(options.get('backend'))
+        processed = 0
+        last_refill = None
+        cache_before = cache_stats.snapshot()
+
+        # Gunicorn's restart cleanup only clears web files; fold in what earlier runs left
+        metrics.store.set_role('generator')
+        metrics.archive_files('generator')
+
+        self.stdout.write('Food generator worker started')
+
+        while max_jobs is None or processed < max_jobs:
+            # Keep every bucket above its watermark ahead of demand
+            if refill and (last_refill is None or time.monotonic() - last_refill >= settings.POOL_REFILL_INTERVAL):
+                queued = refill_pool()
+                last_refill = time.monotonic()
+                if queued:
+                    self.stdout.write(f'Queued {len(queued)} pool refill jobs')
+
+            # One image batch per round, so a long job queue cannot starve them
+            stored = self.ingest_images() if images else 0
+
+            job = claim_next_job()
+            if job is None:
+                if stored:
+                    continue
+                if once:
+                    break
+                time.sleep(sleep)
+                continue
+
+            self.stdout.write(f'Running job {job.pk}: {job}')
+            job = run_job(job, client=backend)
+            processed += 1
+
+            if job.status == GenerationJob.STATUS_DONE:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Job {job.pk} created {job.foods_created} food profiles')
+                )
+            else:
+                self.stdout.write(
+                    self.style.ERROR(f'Job {job.pk} failed (attempt {job.attempts}): {job.error}')
+                )
+
+        self.stdout.write(f'Processed {processed} jobs')
+        hits, lookups = hit_rate(cache_before, cache_stats.snapshot())
+        if lookups:
+            self.stdout.write(f'Recipe cache: {hits} of {lookups} recipes reused ({hits / lookups:.0%} hit rate)')
+
+    def ingest_images(self):
+        stored, failed = ingest_pending_images()
+        if stored or failed:
+            self.stdout.write(f'Stored images for {stored} foods, {failed} gave up')
+        return stored + failed
@@ -0,0 +1,113 @@
+# management/commands/seed_benchmark.py
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from dating.catalog import sync_foods_ingredients
+from dating.dedup import index_foods
+from dating.generation import DEFAULT_CUISINES, GENERATED_MEAL_TYPES
+from dating.models import CustomUser, FoodProfile, Match, UserProfile, WeeklyFoodLog
+
+USER_PREFIX = 'bench-user-'
+FOOD_PREFIX = 'Bench '
+INGREDIENTS = [
+    'rice', 'beans', 'tomato', 'basil', 'garlic', 'onion', 'chicken', 'tofu', 'lime', 'chili',
+    'pasta', 'cheese', 'spinach', 'mushroom', 'lentils', 'yogurt', 'cucumber', 'egg', 'salmon', 'peanuts',
+]
+DIETS = [diet for diet, _ in UserProfile.DIET_CHOICES]
+
+class Command(BaseCommand):
+    help = 'Seed users, foods and swipe/meal-log histories for benchmarks, without calling any LLM'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Users to create')
+        parser.add_argument('--foods', type=int, default=2000, help='Foods to create')
+        parser.add_argument('--matches', type=int, default=50, help='Swipes per user')
+        parser.add_argument('--logs', type=int, default=10, help='Meal log entries per user, within the last week')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible data')
+        parser.add_argument('--clear', action='store_true', help='Delete earlier benchmark users and foods first')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            if options['clear']:
+                CustomUser.objects.filter(username__startswith=USER_PREFIX).delete()
+                FoodProfile.objects.filter(name__startswith=FOOD_PREFIX).delete()
+            foods = self.seed_foods(rng, options['foods'])
+            users = self.seed_users(rng, options['users'])
+            matches, logs = self.seed_history(rng, users, foods, options['matches'], options['logs'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(users)} users, {len(foods)} foods, {matches} matches and {logs} meal logs'
+        ))
+        self.stdout.write(f'Users log in as {USER_PREFIX}<n>@example.com with password "{USER_PREFIX}pass"')
+
+    def seed_foods(self, rng, count):
+        # bulk_create skips the post_save signals, so the ingredient links and
+        # duplicate index the signals would maintain are written here directly
+        start = FoodProfile.objects.count()
+        FoodProfile.objects.bulk_create([
+            FoodProfile(
+                name=f'{FOOD_PREFIX}{start + i}', description='Synthetic benchmark dish',
+                calories=rng.randrange(150, 900, 10), meal_type=rng.choice(GENERATED_MEAL_TYPES),
+                cuisine_type=rng.choice(DEFAULT_CUISINES), diet_compatibility=rng.choice(DIETS),
+                ingredients=', '.join(rng.sample(INGREDIENTS, 4)), generation_successful=True
+            )
+            for i in range(count)
+        ], batch_size=1000)
+        foods = list(FoodProfile.objects.filter(name__startswith=FOOD_PREFIX).order_by('-id')[:count])
+        sync_foods_ingredients(foods)
+        index_foods(foods, replace=False)
+        return foods
+
+    def seed_users(self, rng, count):
+        start = CustomUser.objects.filter(username__startswith=USER_PREFIX).count()
+        password = make_password(f'{USER_PREFIX}pass')
+        now = timezone.now()
+        names = [f'{USER_PREFIX}{start + i}' for i in range(count)]
+        CustomUser.objects.bulk_create([
+            CustomUser(
+                username=name, email=f'{name}@example.com', password=password,
+                first_name='Bench', last_name='User', last_login=now - timedelta(days=rng.randrange(14))
+            )
+            for name in names
+        ], batch_size=1000)
+        users = list(CustomUser.objects.filter(username__in=names))
+
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user, diet_preferences=rng.choice(DIETS), profile_completed=True,
+                favorite_cuisines=', '.join(rng.sample(DEFAULT_CUISINES, 2))
+            )
+            for user in users
+        ], batch_size=1000)
+        return list(UserProfile.objects.filter(user__in=users).select_related('user'))
+
+    def seed_history(self, rng, profiles, foods, swipes, logs):
+        by_diet = {}
+        for food in foods:
+            by_diet.setdefault(food.diet_compatibility, []).append(food)
+
+        matches, entries = [], []
+        today = timezone.now().date()
+        for profile in profiles:
+            pool = by_diet.get(profile.diet_preferences, [])
+            mutual = []
+            for food in rng.sample(pool, min(swipes, len(pool))):
+                liked = rng.random() < 0.6
+                food_liked = liked and rng.random() < 0.5
+                matches.append(Match(user=profile.user, food_profile=food, user_liked=liked, food_liked=food_liked))
+                if food_liked:
+                    mutual.append(food)
+            for food in rng.sample(mutual, min(logs, len(mutual))):
+                entries.append(WeeklyFoodLog(
+                    user=profile.user, food_profile=food, meal_type=food.meal_type,
+                    date_consumed=today - timedelta(days=rng.randrange(7))
+                ))
+
+        Match.objects.bulk_create(matches, batch_size=1000)
+        WeeklyFoodLog.objects.bulk_create(entries, batch_size=1000)
+        return len(matches), len(entries)
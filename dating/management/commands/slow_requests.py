@@ -0,0 +1,43 @@
+# management/commands/slow_requests.py
+import io
+import pstats
+
+from django.core.management.base import BaseCommand
+from dating.profiling import is_profiled_view, load_captures
+
+class Command(BaseCommand):
+    help = 'List the slowest profiled requests and the functions they spent the most time in'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10, help='Captures to list')
+        parser.add_argument('--top', type=int, default=20, help='Functions to show from the merged profiles')
+        parser.add_argument('--view', help='Only captures of this URL name (wildcards allowed)')
+        parser.add_argument('--sort', default='cumulative', choices=['cumulative', 'tottime', 'ncalls'])
+        parser.add_argument('--sql', action='store_true', help='Print the slowest queries of each listed capture')
+
+    def handle(self, *args, **options):
+        captures = load_captures()
+        if options['view']:
+            captures = [c for c in captures if is_profiled_view(c['view'], [options['view']])]
+        if not captures:
+            self.stdout.write('No slow requests captured')
+            return
+        slowest = sorted(captures, key=lambda c: c['elapsed_ms'], reverse=True)[:options['limit']]
+
+        self.stdout.write(
+            f'{"ms":>8} {"sql ms":>7} {"queries":>7} {"user":>6} {"view":<22} {"captured":<20} profile'
+        )
+        for c in slowest:
+            self.stdout.write(
+                f'{c["elapsed_ms"]:>8.1f} {c["sql_ms"]:>7.1f} {len(c["queries"]):>7} {str(c["user_id"]):>6} '
+                f'{c["view"][:22]:<22} {c["captured_at"][:19]:<20} {c["profile"]}'
+            )
+            if options['sql']:
+                for query in sorted(c['queries'], key=lambda q: q['ms'], reverse=True)[:5]:
+                    self.stdout.write(f'{"":>8} {query["ms"]:>7.1f} {query["sql"][:120]}')
+
+        output = io.StringIO()
+        stats = pstats.Stats(*[c['profile_path'] for c in slowest], stream=output)
+        stats.strip_dirs().sort_stats(options['sort']).print_stats(options['top'])
+        self.stdout.write(f'\nTop functions across these {len(slowest)} captures:')
+        self.stdout.write(output.getvalue())
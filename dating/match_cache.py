@@ -0,0 +1,80 @@
+# dating/match_cache.py
+import hashlib
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.template.loader import get_template
+
+from .models import Match
+
+MATCHES_TEMPLATES = ['base.html', 'dating/matches.html']
+
+
+def matches_version_key(user_id):
+    return f'matches-version:{user_id}'
+
+
+def _new_version():
+    # Microseconds since the epoch: a version is never handed out twice, even
+    # after the key is evicted
+    return time.time_ns() // 1000
+
+
+def matches_version(user_id):
+    """Token that changes whenever the user's list of mutual matches does"""
+    key = matches_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_matches_version(*user_ids):
+    """Invalidate cached match grids; called whenever a mutual match appears, changes or goes"""
+    if user_ids:
+        version = _new_version()
+        cache.set_many({matches_version_key(user_id): version for user_id in user_ids}, None)
+
+
+def bump_matches_for_foods(food_ids):
+    """Bump every user whose match grid shows one of ``food_ids``"""
+    user_ids = Match.objects.filter(
+        food_profile_id__in=food_ids, user_liked=True, food_liked=True
+    ).values_list('user_id', flat=True).distinct()
+    bump_matches_version(*user_ids)
+
+
+def _page_revision():
+    sources = ''.join(get_template(name).template.source for name in MATCHES_TEMPLATES)
+    return hashlib.sha256(sources.encode()).hexdigest()[:12]
+
+
+_cached_page_revision = lru_cache(maxsize=None)(_page_revision)
+
+
+def page_revision():
+    """Hash of the matches templates, so a deploy that changes them invalidates cached copies"""
+    return _page_revision() if settings.DEBUG else _cached_page_revision()
+
+
+def request_version(request):
+    if not hasattr(request, '_matches_version'):
+        request._matches_version = matches_version(request.user.pk)
+    return request._matches_version
+
+
+def matches_etag(request):
+    # Flash messages are part of the page, so one carrying them is always sent in full
+    if messages.get_messages(request):
+        return None
+    parts = [
+        request.user.pk, request.user.first_name, request.GET.get('after', ''),
+        request_version(request), page_revision(),
+    ]
+    return hashlib.sha256('|'.join(map(str, parts)).encode()).hexdigest()[:32]
+
@@ -0,0 +1,116 @@
+# dating/meal_plan.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+
+from .models import FoodProfile, UserProfile, WeeklyFoodLog
+
+MEAL_TYPES = [meal_type for meal_type, _ in FoodProfile.MEAL_TYPES]
+MEAL_LABELS = dict(FoodProfile.MEAL_TYPES)
+
+
+def week_start(day):
+    """Monday of the week ``day`` falls in"""
+    # An unsaved log's default date_consumed is a datetime; convert it the way saving does
+    day = WeeklyFoodLog._meta.get_field('date_consumed').to_python(day)
+    return day - timedelta(days=day.weekday())
+
+
+def meal_plan_cache_key(user_id, start):
+    return f'meal-plan:{user_id}:{start.isoformat()}'
+
+
+def calorie_goal_key(user_id):
+    return f'calorie-goal:{user_id}'
+
+
+def calorie_totals(user_id, start):
+    """``{(date, meal_type): (calories, meals)}`` for the week starting ``start``, in one grouped query"""
+    rows = WeeklyFoodLog.objects.filter(
+        user_id=user_id,
+        date_consumed__range=(start, start + timedelta(days=6))
+    ).values('date_consumed', 'meal_type').annotate(
+        calories=Sum('food_profile__calories'),
+        meals=Count('id')
+    ).order_by()
+    return {(row['date_consumed'], row['meal_type']): (row['calories'], row['meals']) for row in rows}
+
+
+def compute_meal_plan(user_id, start, calorie_goal):
+    """Calories per day and meal for the week starting ``start``, against ``calorie_goal`` a day"""
+    return build_meal_plan(start, calorie_totals(user_id, start), calorie_goal)
+
+
+def build_meal_plan(start, totals, calorie_goal):
+    """The plan summary from ``calorie_totals`` output"""
+    days = []
+    for offset in range(7):
+        day = start + timedelta(days=offset)
+        meals = [
+            {
+                'meal_type': meal_type,
+                'label': MEAL_LABELS[meal_type],
+                'calories': totals.get((day, meal_type), (0, 0))[0],
+                'count': totals.get((day, meal_type), (0, 0))[1],
+            }
+            for meal_type in MEAL_TYPES
+        ]
+        calories = sum(meal['calories'] for meal in meals)
+        days.append({
+            'date': day,
+            'calories': calories,
+            'remaining': calorie_goal - calories,
+            'percent': min(100, round(calories * 100 / calorie_goal)) if calorie_goal > 0 else 0,
+            'meals': meals,
+        })
+
+    total = sum(day['calories'] for day in days)
+    return {
+        'week_start': start,
+        'goal': calorie_goal,
+        'days': days,
+        'meal_totals': {
+            meal_type: sum(day['meals'][index]['calories'] for day in days)
+            for index, meal_type in enumerate(MEAL_TYPES)
+        },
+        'total': total,
+        'weekly_goal': calorie_goal * 7,
+        'remaining': calorie_goal * 7 - total,
+    }
+
+
+def weekly_meal_plan(user_id, start):
+    """Meal plan summary for one of the user's weeks, from cached totals and calorie goal.
+
+    Each week's totals and the goal sit under their own keys, so
+    invalidating one never rewrites the others.
+    """
+    week_key, goal_key = meal_plan_cache_key(user_id, start), calorie_goal_key(user_id)
+    cached = cache.get_many([week_key, goal_key])
+
+    totals = cached.get(week_key)
+    if totals is None:
+        totals = calorie_totals(user_id, start)
+        cache.add(week_key, totals, settings.MEAL_PLAN_CACHE_TTL)
+    calorie_goal = cached.get(goal_key)
+    if calorie_goal is None:
+        calorie_goal = UserProfile.objects.filter(user_id=user_id).values_list(
+            'daily_calorie_goal', flat=True
+        ).first() or 0
+        cache.add(goal_key, calorie_goal, settings.MEAL_PLAN_CACHE_TTL)
+    return build_meal_plan(start, totals, calorie_goal)
+
+
+def invalidate_meal_plans(user_id, *days):
+    """Drop the cached totals of the weeks ``days`` fall in; called when the user's food log changes.
+
+    Edits to a food's calories are only picked up once the entry expires.
+    """
+    cache.delete_many({meal_plan_cache_key(user_id, week_start(day)) for day in days})
+
+
+def invalidate_calorie_goal(user_id):
+    """Drop the cached daily calorie goal; called when the user changes it"""
+    cache.delete(calorie_goal_key(user_id))
@@ -0,0 +1,263 @@
+# dating/metrics.py
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+# Seconds; the last bucket before +Inf covers a slow LLM-free request
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+FAMILIES = {
+    'foodmatch_request_duration_seconds': ('histogram', 'Request latency by URL name'),
+    'foodmatch_request_queries_total': ('counter', 'SQL queries executed by URL name'),
+    'foodmatch_request_query_seconds_total': ('counter', 'Time spent in SQL by URL name'),
+    'foodmatch_llm_calls_total': ('counter', 'LLM calls made during food generation'),
+    'foodmatch_llm_call_seconds_total': ('counter', 'Time spent waiting on LLM calls'),
+    'foodmatch_recipe_cache_lookups_total': ('counter', 'Recipe cache lookups by outcome'),
+    'foodmatch_generated_duplicates_total': ('counter', 'Generated recipes dropped as near-duplicates'),
+}
+
+ARCHIVE_SUFFIX = '-archive.json'
+# Archive key listing the process files already folded in, so a scrape racing
+# archive_files() never counts a file twice
+MERGED = '_merged'
+
+
+def _labels(**labels):
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    )
+    return ','.join(f'{name}="{value}"' for name, value in escaped)
+
+
+def _format(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _read(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None  # Removed or replaced between listdir and open
+
+
+def _write(path, values):
+    with open(f'{path}.tmp', 'w') as handle:
+        json.dump(values, handle)
+    os.replace(f'{path}.tmp', path)
+
+
+def _merge(totals, values):
+    for family, samples in values.items():
+        if family == MERGED:
+            continue
+        merged = totals.setdefault(family, {})
+        for series, amount in samples.items():
+            merged[series] = merged.get(series, 0) + amount
+    return totals
+
+
+class MetricStore:
+    """Counters for one process, shared with the others through METRICS_DIR.
+
+    Every process (each gunicorn worker, the food generator) adds to its own
+    in-memory totals and rewrites ``<dir>/<role>-<pid>-<token>.json``
+    atomically at most every METRICS_FLUSH_INTERVAL seconds. The exporter
+    sums all files. Files of exited processes are folded into
+    ``<role>-archive.json`` by archive_files(), so their totals keep
+    counting without a file per dead worker piling up. Histograms are stored
+    as cumulative bucket counters, which makes merging a plain sum. Without
+    METRICS_DIR the totals only cover the current process.
+    """
+
+    def __init__(self, role='web'):
+        self.lock = threading.Lock()
+        self.role = role
+        self._start()
+
+    def _start(self):
+        self.pid = os.getpid()
+        self.path_name = f'{self.role}-{self.pid}-{uuid.uuid4().hex[:8]}.json'
+        self.values = {family: {} for family in FAMILIES}
+        self.flushed_at = time.monotonic()
+
+    def _add(self, family, series, amount):
+        samples = self.values[family]
+        samples[series] = samples.get(series, 0) + amount
+
+    def record(self, updates):
+        """Apply ``[(family, series, amount), ...]`` and flush if it is due"""
+        with self.lock:
+            if os.getpid() != self.pid:
+                # Forked (e.g. gunicorn --preload): the parent's totals are its own
+                self._start()
+            for family, series, amount in updates:
+                self._add(family, series, amount)
+            due = time.monotonic() - self.flushed_at >= settings.METRICS_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def set_role(self, role):
+        """Write this process's totals under ``role`` instead of web"""
+        with self.lock:
+            self.role = role
+            self.path_name = f'{role}-{self.pid}-{self.path_name.rsplit("-", 1)[1]}'
+
+    def observe_request(self, view, seconds, queries, query_seconds):
+        labels = _labels(view=view)
+        name = 'foodmatch_request_duration_seconds'
+        updates = [
+            (name, f'{name}_bucket{{{labels},le="{_format(bound)}"}}', int(seconds <= bound))
+            for bound in LATENCY_BUCKETS
+        ]
+        updates += [
+            (name, f'{name}_bucket{{{labels},le="+Inf"}}', 1),
+            (name, f'{name}_sum{{{labels}}}', seconds),
+            (name, f'{name}_count{{{labels}}}', 1),
+            ('foodmatch_request_queries_total', f'foodmatch_request_queries_total{{{labels}}}', queries),
+            ('foodmatch_request_query_seconds_total', f'foodmatch_request_query_seconds_total{{{labels}}}', query_seconds),
+        ]
+        self.record(updates)
+
+    def observe_llm_call(self, kind, outcome, seconds):
+        self.record([
+            ('foodmatch_llm_calls_total', f'foodmatch_llm_calls_total{{{_labels(kind=kind, outcome=outcome)}}}', 1),
+            ('foodmatch_llm_call_seconds_total', f'foodmatch_llm_call_seconds_total{{{_labels(kind=kind)}}}', seconds),
+        ])
+
+    def observe_recipe_cache(self, hits, misses):
+        name = 'foodmatch_recipe_cache_lookups_total'
+        self.record([
+            (name, f'{name}{{{_labels(outcome="hit")}}}', hits),
+            (name, f'{name}{{{_labels(outcome="miss")}}}', misses),
+        ])
+
+    def observe_duplicates(self, count):
+        name = 'foodmatch_generated_duplicates_total'
+        self.record([(name, name, count)])
+
+    def flush(self):
+        directory = settings.METRICS_DIR
+        with self.lock:
+            self.flushed_at = time.monotonic()
+            if not directory:
+                return
+            payload = json.dumps(self.values)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.path_name)
+        with open(f'{path}.tmp', 'w') as handle:
+            handle.write(payload)
+        os.replace(f'{path}.tmp', path)
+
+    def collect(self):
+        """Totals summed over every process sharing METRICS_DIR"""
+        directory = settings.METRICS_DIR
+        if not directory:
+            with self.lock:
+                return {family: dict(samples) for family, samples in self.values.items()}
+
+        self.flush()
+        names = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+        # Archives last: archive_files() rewrites one before removing the files
+        # it absorbed, so a file read here is either still listed there or new
+        archives = [name for name in names if name.endswith(ARCHIVE_SUFFIX)]
+        files = {name: _read(os.path.join(directory, name)) for name in names if name not in archives}
+        files.update((name, _read(os.path.join(directory, name))) for name in archives)
+        absorbed = {merged for name in archives for merged in (files[name] or {}).get(MERGED, [])}
+
+        totals = {family: {} for family in FAMILIES}
+        for name, values in files.items():
+            if values and name not in absorbed:
+                _merge(totals, values)
+        return totals
+
+    def render(self):
+        """Prometheus text exposition format"""
+        lines = []
+        for family, samples in self.collect().items():
+            if not samples or family not in FAMILIES:
+                continue
+            kind, help_text = FAMILIES[family]
+            lines += [f'# HELP {family} {help_text}', f'# TYPE {family} {kind}']
+            lines += [f'{series} {_format(amount)}' for series, amount in samples.items()]
+        return '\n'.join(lines) + '\n'
+
+
+store = MetricStore()
+atexit.register(store.flush)
+
+
+def archive_files(role, pid=None):
+    """Fold the metric files of finished ``role`` processes into ``<role>-archive.json``.
+
+    With ``pid`` only that process's files, as gunicorn's child_exit hook
+    passes for a dead worker; without, every file of the role except this
+    process's own. Only one process may archive a role at a time: the
+    gunicorn master for web workers, the generator itself on startup.
+    """
+    directory = settings.METRICS_DIR
+    if not directory or not os.path.isdir(directory):
+        return []
+    prefix = f'{role}-{pid}-' if pid else f'{role}-'
+    names = [
+        name for name in os.listdir(directory)
+        if name.startswith(prefix) and name.endswith('.json')
+        and not name.endswith(ARCHIVE_SUFFIX) and name != store.path_name
+    ]
+    if not names:
+        return []
+
+    path = os.path.join(directory, f'{role}{ARCHIVE_SUFFIX}')
+    archive = _read(path) or {}
+    merged = [name for name in archive.pop(MERGED, []) if os.path.exists(os.path.join(directory, name))]
+    for name in names:
+        _merge(archive, _read(os.path.join(directory, name)) or {})
+    archive[MERGED] = merged + names
+    _write(path, archive)
+    for name in names:
+        os.remove(os.path.join(directory, name))
+    return names
+
+
+class QueryTimer:
+    """Database execute wrapper counting queries and the time spent in them"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """Records latency and SQL usage per URL name; keep it first in MIDDLEWARE"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        store.observe_request(match.view_name if match else '<unmatched>', elapsed, queries.count, queries.seconds)
+        return response
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dating', '0002_generationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='cuisine_type',
+            field=models.CharField(blank=True, help_text='Pool bucket this job refills, blank for user-triggered jobs', max_length=100),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dating', '0003_generationjob_cuisine_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='foodprofile',
+            index=models.Index(fields=['diet_compatibility', 'cuisine_type'], name='food_diet_cuisine_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='foodprofile',
+            index=models.Index(fields=['diet_compatibility', 'meal_type'], name='food_diet_meal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['user', 'user_liked', 'food_liked'], name='match_user_liked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(condition=models.Q(('food_liked', True), ('user_liked', True)), fields=['user', 'created_at'], name='match_mutual_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weeklyfoodlog',
+            index=models.Index(fields=['user', 'date_consumed'], name='foodlog_user_date_idx'),
+        ),
+    ]
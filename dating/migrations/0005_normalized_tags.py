@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dating', '0004_access_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Allergen',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Cuisine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Ingredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='allergens',
+            field=models.ManyToManyField(blank=True, related_name='profiles', to='dating.allergen'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='cuisines',
+            field=models.ManyToManyField(blank=True, related_name='profiles', to='dating.cuisine'),
+        ),
+        migrations.AddField(
+            model_name='allergen',
+            name='ingredients',
+            field=models.ManyToManyField(blank=True, related_name='allergens', to='dating.ingredient'),
+        ),
+        migrations.AddField(
+            model_name='foodprofile',
+            name='ingredient_set',
+            field=models.ManyToManyField(blank=True, related_name='foods', to='dating.ingredient'),
+        ),
+    ]
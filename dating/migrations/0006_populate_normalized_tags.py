@@ -0,0 +1,73 @@
+from django.db import migrations
+
+
+def split_tags(text):
+    tags = []
+    for part in (text or '').split(','):
+        tag = ' '.join(part.lower().split())
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def tag_ids(model, names, cache):
+    missing = [name for name in set(names) if name not in cache]
+    if missing:
+        model.objects.bulk_create([model(name=name) for name in missing], ignore_conflicts=True)
+        cache.update(model.objects.filter(name__in=missing).values_list('name', 'id'))
+    return [cache[name] for name in names]
+
+
+def populate_tags(apps, schema_editor):
+    Ingredient = apps.get_model('dating', 'Ingredient')
+    Allergen = apps.get_model('dating', 'Allergen')
+    Cuisine = apps.get_model('dating', 'Cuisine')
+    UserProfile = apps.get_model('dating', 'UserProfile')
+    FoodProfile = apps.get_model('dating', 'FoodProfile')
+
+    ingredients, allergens, cuisines = {}, {}, {}
+
+    FoodIngredient = FoodProfile.ingredient_set.through
+    links = []
+    for food_id, text in FoodProfile.objects.values_list('id', 'ingredients').iterator():
+        links += [
+            FoodIngredient(foodprofile_id=food_id, ingredient_id=ingredient_id)
+            for ingredient_id in tag_ids(Ingredient, split_tags(text), ingredients)
+        ]
+    FoodIngredient.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
+
+    ProfileAllergen = UserProfile.allergens.through
+    ProfileCuisine = UserProfile.cuisines.through
+    allergen_links, cuisine_links = [], []
+    for profile_id, allergy_text, cuisine_text in UserProfile.objects.values_list(
+        'id', 'allergies', 'favorite_cuisines'
+    ).iterator():
+        allergen_links += [
+            ProfileAllergen(userprofile_id=profile_id, allergen_id=allergen_id)
+            for allergen_id in tag_ids(Allergen, split_tags(allergy_text), allergens)
+        ]
+        cuisine_links += [
+            ProfileCuisine(userprofile_id=profile_id, cuisine_id=cuisine_id)
+            for cuisine_id in tag_ids(Cuisine, split_tags(cuisine_text), cuisines)
+        ]
+    ProfileAllergen.objects.bulk_create(allergen_links, batch_size=1000, ignore_conflicts=True)
+    ProfileCuisine.objects.bulk_create(cuisine_links, batch_size=1000, ignore_conflicts=True)
+
+    AllergenIngredient = Allergen.ingredients.through
+    AllergenIngredient.objects.bulk_create([
+        AllergenIngredient(allergen_id=allergen_id, ingredient_id=ingredient_id)
+        for allergen_name, allergen_id in allergens.items()
+        for ingredient_name, ingredient_id in ingredients.items()
+        if allergen_name in ingredient_name
+    ], batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dating', '0005_normalized_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_tags, migrations.RunPython.noop),
+    ]
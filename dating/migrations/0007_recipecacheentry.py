@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dating', '0006_populate_normalized_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(db_index=True, help_text='Hash of the normalized prompt parameters', max_length=64)),
+                ('diet', models.CharField(max_length=20)),
+                ('cuisine', models.CharField(max_length=100)),
+                ('meal_type', models.CharField(max_length=20)),
+                ('calories', models.IntegerField(help_text='Calorie target the recipe was generated for')),
+                ('allergies', models.TextField(blank=True)),
+                ('recipe', models.JSONField()),
+                ('hits', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dating', '0007_recipecacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FoodFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(db_index=True, help_text='Normalized-name key or MinHash band key', max_length=32)),
+                ('food', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprints', to='dating.foodprofile')),
+            ],
+        ),
+    ]
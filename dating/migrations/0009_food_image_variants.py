@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:54
+
+from django.db import migrations, models
+
+
+def queue_remote_images(apps, schema_editor):
+    # Foods generated so far only hot-link their images; queue them for download
+    FoodProfile = apps.get_model('dating', 'FoodProfile')
+    FoodProfile.objects.exclude(image_url='').update(image_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dating', '0008_foodfingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodprofile',
+            name='image_attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='foodprofile',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('', 'No image'), ('pending', 'Waiting for download'), ('ready', 'Stored locally'), ('failed', 'Download failed')], default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='foodprofile',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Variant -> {format: MEDIA_ROOT path, width, height}'),
+        ),
+        migrations.AddIndex(
+            model_name='foodprofile',
+            index=models.Index(condition=models.Q(('image_status', 'pending')), fields=['id'], name='food_image_pending_idx'),
+        ),
+        migrations.RunPython(queue_remote_images, migrations.RunPython.noop),
+    ]
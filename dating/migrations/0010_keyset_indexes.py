@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dating', '0009_food_image_variants'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='match',
+            name='match_mutual_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='weeklyfoodlog',
+            name='foodlog_user_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(condition=models.Q(('food_liked', True), ('user_liked', True)), fields=['user', 'created_at', 'id'], name='match_mutual_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weeklyfoodlog',
+            index=models.Index(fields=['user', 'date_consumed', 'id'], name='foodlog_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,135 @@
+import re
+
+from django.db import migrations
+
+# Frozen copy of dating/allergens.py as of this migration, so later edits to the
+# app module cannot change what it does
+
+# Allergen category -> ingredient words that belong to it, singular and lowercase
+ALLERGEN_TERMS = {
+    'dairy': [
+        'dairy', 'milk', 'buttermilk', 'cheese', 'butter', 'cream', 'yogurt', 'yoghurt', 'whey', 'casein', 'ghee',
+        'lactose', 'mozzarella', 'parmesan', 'cheddar', 'feta', 'ricotta', 'paneer', 'mascarpone', 'brie', 'kefir',
+    ],
+    'egg': ['egg', 'mayonnaise', 'mayo', 'meringue', 'aioli'],
+    'fish': ['fish', 'salmon', 'tuna', 'cod', 'anchovy', 'sardine', 'trout', 'halibut', 'mackerel', 'tilapia'],
+    'gluten': [
+        'gluten', 'wheat', 'flour', 'bread', 'breadcrumb', 'panko', 'pasta', 'spaghetti', 'noodle', 'barley', 'rye',
+        'couscous', 'seitan', 'bulgur', 'semolina', 'spelt',
+    ],
+    'nut': [
+        'nut', 'peanut', 'almond', 'cashew', 'walnut', 'pecan', 'hazelnut', 'pistachio', 'macadamia', 'praline',
+        'marzipan',
+    ],
+    'sesame': ['sesame', 'tahini'],
+    'shellfish': ['shellfish', 'shrimp', 'prawn', 'crab', 'lobster', 'clam', 'mussel', 'oyster', 'scallop', 'squid'],
+    'soy': ['soy', 'soya', 'soybean', 'tofu', 'tempeh', 'edamame', 'miso', 'tamari'],
+}
+# What people write for a category besides its own name
+ALLERGY_ALIASES = {
+    'milk': 'dairy', 'lactose': 'dairy', 'lactose intolerance': 'dairy',
+    'tree nut': 'nut',
+    'wheat': 'gluten', 'celiac': 'gluten', 'coeliac': 'gluten',
+    'seafood': 'shellfish', 'crustacean': 'shellfish',
+    'soya': 'soy', 'soybean': 'soy',
+}
+# Dairy words that are not dairy after one of these, as in "coconut milk" or "peanut butter"
+NON_DAIRY_PREFIXES = {'almond', 'cashew', 'cocoa', 'coconut', 'oat', 'peanut', 'rice', 'shea', 'soy', 'vegan'}
+
+_TERM_CATEGORIES = {term: category for category, terms in ALLERGEN_TERMS.items() for term in terms}
+
+
+def singular(word):
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith(('oes', 'shes', 'ches')):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith('ss') and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def words(name):
+    return re.findall(r'[a-z]+', name.lower())
+
+
+def allergen_category(name):
+    """The category an allergy is checked as, e.g. "Nuts" -> "nut" and "milk" -> "dairy".
+
+    Allergies outside the table keep their own singular name.
+    """
+    name = ' '.join(singular(word) for word in words(name))
+    return ALLERGY_ALIASES.get(name, name)
+
+
+def ingredient_categories(name):
+    """Categories from ALLERGEN_TERMS an ingredient name falls in"""
+    categories = set()
+    previous = None
+    for word in words(name):
+        category = _TERM_CATEGORIES.get(word) or _TERM_CATEGORIES.get(singular(word))
+        if category and not (category == 'dairy' and previous in NON_DAIRY_PREFIXES):
+            categories.add(category)
+        previous = singular(word)
+    return categories
+
+
+def contains_allergen(ingredient_name, allergen):
+    """Whether an ingredient must be avoided for an allergen category"""
+    if allergen in ALLERGEN_TERMS:
+        return allergen in ingredient_categories(ingredient_name)
+    # Anything else is a substring match, against singular words too so "strawberry" covers "strawberries"
+    return allergen in ingredient_name or allergen in ' '.join(singular(word) for word in words(ingredient_name))
+
+
+def split_tags(text):
+    tags = []
+    for part in (text or '').split(','):
+        tag = ' '.join(part.lower().split())
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def relink_allergens(apps, schema_editor):
+    """Link profiles to allergen categories and re-match every ingredient against them"""
+    Allergen = apps.get_model('dating', 'Allergen')
+    Ingredient = apps.get_model('dating', 'Ingredient')
+    UserProfile = apps.get_model('dating', 'UserProfile')
+
+    categories = {}
+    ProfileAllergen = UserProfile.allergens.through
+    links = []
+    for profile_id, allergy_text in UserProfile.objects.values_list('id', 'allergies').iterator():
+        names = [name for name in dict.fromkeys(allergen_category(tag) for tag in split_tags(allergy_text)) if name]
+        missing = [name for name in names if name not in categories]
+        if missing:
+            Allergen.objects.bulk_create([Allergen(name=name) for name in missing], ignore_conflicts=True)
+            categories.update(Allergen.objects.filter(name__in=missing).values_list('name', 'id'))
+        links += [ProfileAllergen(userprofile_id=profile_id, allergen_id=categories[name]) for name in names]
+    ProfileAllergen.objects.all().delete()
+    ProfileAllergen.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
+
+    # Plain names like "nuts" are superseded by their category
+    Allergen.objects.exclude(name__in=categories).delete()
+
+    AllergenIngredient = Allergen.ingredients.through
+    AllergenIngredient.objects.all().delete()
+    ingredients = list(Ingredient.objects.values_list('id', 'name'))
+    AllergenIngredient.objects.bulk_create([
+        AllergenIngredient(allergen_id=allergen_id, ingredient_id=ingredient_id)
+        for allergen_name, allergen_id in categories.items()
+        for ingredient_id, ingredient_name in ingredients
+        if contains_allergen(ingredient_name, allergen_name)
+    ], batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dating', '0010_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(relink_allergens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dating', '0011_allergen_categories'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='foodprofile',
+            name='food_diet_cuisine_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='foodprofile',
+            name='food_diet_meal_idx',
+        ),
+        migrations.AddIndex(
+            model_name='foodprofile',
+            index=models.Index(fields=['diet_compatibility', 'id'], name='food_diet_id_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dating', '0012_food_diet_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipecacheentry',
+            name='food',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dating.foodprofile'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:57
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dating', '0013_recipecacheentry_food'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='cuisines',
+        ),
+        migrations.DeleteModel(
+            name='Cuisine',
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.core.files.storage import default_storage
 from django.utils import timezone
 from datetime import datetime, timedelta
 import json
@@ -16,6 +17,22 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.email
 
+class Ingredient(models.Model):
+    # Stored normalized (lowercase, single-spaced) so CSV variants share a row
+    name = models.CharField(max_length=100, unique=True)
+    
+    def __str__(self):
+        return self.name
+
+class Allergen(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    # A category such as "nut" or "dairy" (see allergens.py) and every ingredient in it,
+    # e.g. "nut" -> "peanut butter", "dairy" -> "goat cheese"
+    ingredients = models.ManyToManyField(Ingredient, blank=True, related_name='allergens')
+    
+    def __str__(self):
+        return self.name
+
 class UserProfile(models.Model):
     DIET_CHOICES = [
         ('omnivore', 'Omnivore'),
@@ -43,12 +60,48 @@ class UserProfile(models.Model):
     daily_calorie_goal = models.IntegerField(default=2000)
     activity_level = models.CharField(max_length=20, choices=ACTIVITY_CHOICES, default='moderately_active')
     favorite_cuisines = models.TextField(blank=True, help_text="Comma-separated list of favorite cuisines")
+    # Allergen categories of the allergies above, kept in sync by dating.catalog;
+    # favourite cuisines are matched with catalog.normalize_tag instead
+    allergens = models.ManyToManyField(Allergen, blank=True, related_name='profiles')
     profile_completed = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
         return f"{self.user.username}'s Profile"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._synced_tags = instance._tag_source()
+        instance._saved_values = instance._field_values()
+        return instance
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._saved_values = self._field_values()
+    
+    def _field_values(self):
+        return {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+    
+    def dirty_fields(self):
+        """Names of concrete fields changed since the row was loaded or saved"""
+        saved = getattr(self, '_saved_values', {})
+        return [
+            field.name for field in self._meta.concrete_fields
+            if field.attname in self.__dict__ and saved.get(field.attname) != self.__dict__[field.attname]
+        ]
+    
+    def _tag_source(self):
+        return self.__dict__.get('allergies')
+    
+    def tags_changed(self):
+        """Whether the allergies differ from what the allergen links were built from"""
+        return getattr(self, '_synced_tags', '') != self._tag_source()
+    
     def get_allergies_list(self):
         return [allergy.strip() for allergy in self.allergies.split(',') if allergy.strip()]
     
@@ -56,6 +109,15 @@ class UserProfile(models.Model):
         return [cuisine.strip() for cuisine in self.favorite_cuisines.split(',') if cuisine.strip()]
 
 class FoodProfile(models.Model):
+    IMAGE_PENDING = 'pending'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUSES = [
+        ('', 'No image'),
+        (IMAGE_PENDING, 'Waiting for download'),
+        (IMAGE_READY, 'Stored locally'),
+        (IMAGE_FAILED, 'Download failed'),
+    ]
     MEAL_TYPES = [
         ('breakfast', 'Breakfast'),
         ('lunch', 'Lunch'),
@@ -71,18 +133,66 @@ class FoodProfile(models.Model):
     cuisine_type = models.CharField(max_length=100)
     diet_compatibility = models.CharField(max_length=20, choices=UserProfile.DIET_CHOICES)
     ingredients = models.TextField(help_text="Comma-separated list of main ingredients")
+    # Normalized copy of ingredients, kept in sync by dating.catalog
+    ingredient_set = models.ManyToManyField(Ingredient, blank=True, related_name='foods')
     image_url = models.URLField(blank=True)
+    # Local copies of image_url, written by dating.images
+    image_status = models.CharField(max_length=10, choices=IMAGE_STATUSES, blank=True, default='')
+    image_attempts = models.IntegerField(default=0)
+    image_variants = models.JSONField(default=dict, blank=True, help_text="Variant -> {format: MEDIA_ROOT path, width, height}")
     created_at = models.DateTimeField(auto_now_add=True)
     
     # AI generation tracking
     generated_prompt = models.TextField(blank=True)
     generation_successful = models.BooleanField(default=False)
     
+    class Meta:
+        indexes = [
+            # Candidate selection walks one diet in id order and stops at its LIMIT;
+            # a wider (diet, ...) index makes the planner sort the whole diet instead
+            models.Index(fields=['diet_compatibility', 'id'], name='food_diet_id_idx'),
+            # Only the download queue is ever looked up by image status
+            models.Index(fields=['id'], condition=models.Q(image_status='pending'), name='food_image_pending_idx'),
+        ]
+    
     def __str__(self):
         return self.name
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._synced_ingredients = instance.__dict__.get('ingredients')
+        return instance
+    
+    def ingredients_changed(self):
+        """Whether ingredients differs from what ingredient_set was built from"""
+        return getattr(self, '_synced_ingredients', '') != self.__dict__.get('ingredients')
+    
     def get_ingredients_list(self):
         return [ingredient.strip() for ingredient in self.ingredients.split(',') if ingredient.strip()]
+    
+    def image_src(self, variant, format='jpeg'):
+        """URL of a stored image variant; the remote image_url until one is stored, except for WebP"""
+        path = self.image_variants.get(variant, {}).get(format)
+        if path:
+            return default_storage.url(path)
+        return '' if format == 'webp' else self.image_url
+    
+    @property
+    def card_image(self):
+        return self.image_src('card')
+    
+    @property
+    def card_image_webp(self):
+        return self.image_src('card', 'webp')
+    
+    @property
+    def thumb_image(self):
+        return self.image_src('thumb')
+    
+    @property
+    def thumb_image_webp(self):
+        return self.image_src('thumb', 'webp')
 
 class Match(models.Model):
     # Use string reference to avoid circular import issues
@@ -94,10 +204,30 @@ class Match(models.Model):
     
     class Meta:
         unique_together = ['user', 'food_profile']
+        indexes = [
+            models.Index(fields=['user', 'user_liked', 'food_liked'], name='match_user_liked_idx'),
+            # Only mutual matches are ever listed, so keep a small index of just
+            # those, in the (created_at, id) order the matches pages seek through
+            models.Index(
+                fields=['user', 'created_at', 'id'],
+                name='match_mutual_idx',
+                condition=models.Q(user_liked=True, food_liked=True)
+            ),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_mutual = instance.__dict__.get('user_liked') and instance.__dict__.get('food_liked')
+        return instance
     
     def is_mutual_match(self):
         return self.user_liked and self.food_liked
     
+    def mutual_changed(self):
+        """Whether the match joined or left the user's mutual matches since it was loaded or saved"""
+        return bool(getattr(self, '_saved_mutual', False)) != bool(self.is_mutual_match())
+    
     def __str__(self):
         status = "Mutual Match" if self.is_mutual_match() else "Pending"
         return f"{self.user.username} - {self.food_profile.name} ({status})"
@@ -111,6 +241,80 @@ class WeeklyFoodLog(models.Model):
     
     class Meta:
         unique_together = ['user', 'food_profile', 'date_consumed']
+        indexes = [
+            models.Index(fields=['user', 'date_consumed', 'id'], name='foodlog_user_date_idx'),
+        ]
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_date = instance.__dict__.get('date_consumed')
+        return instance
+    
+    def __str__(self):
+        return f"{self.user.username} ate {self.food_profile.name} on {self.date_consumed}"
+
+class GenerationJob(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = [STATUS_PENDING, STATUS_RUNNING]
+
+    # Use string reference to avoid circular import issues
+    user = models.ForeignKey('dating.CustomUser', on_delete=models.CASCADE, null=True, blank=True)
+    diet_compatibility = models.CharField(max_length=20, choices=UserProfile.DIET_CHOICES)
+    cuisine_type = models.CharField(max_length=100, blank=True, help_text="Pool bucket this job refills, blank for user-triggered jobs")
+    count = models.IntegerField(default=10)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.IntegerField(default=0)
+    foods_created = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    def __str__(self):
+        bucket = f"{self.diet_compatibility}/{self.cuisine_type}" if self.cuisine_type else self.diet_compatibility
+        return f"{bucket} x{self.count} ({self.status})"
+
+class RecipeCacheEntry(models.Model):
+    """One parsed LLM recipe and its food, reusable by any prompt with the same normalized parameters"""
+    key = models.CharField(max_length=64, db_index=True, help_text="Hash of the normalized prompt parameters")
+    diet = models.CharField(max_length=20)
+    cuisine = models.CharField(max_length=100)
+    meal_type = models.CharField(max_length=20)
+    calories = models.IntegerField(help_text="Calorie target the recipe was generated for")
+    allergies = models.TextField(blank=True)
+    recipe = models.JSONField()
+    # The catalog food the recipe became; a hit serves this food instead of a copy
+    food = models.ForeignKey(FoodProfile, null=True, blank=True, on_delete=models.CASCADE, related_name='+')
+    hits = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.recipe.get('name')} ({self.diet}/{self.cuisine}/{self.meal_type})"
+
+class FoodFingerprint(models.Model):
+    """One lookup key of a food's near-duplicate fingerprint, maintained by dating.dedup"""
+    food = models.ForeignKey(FoodProfile, on_delete=models.CASCADE, related_name='fingerprints')
+    key = models.CharField(max_length=32, db_index=True, help_text="Normalized-name key or MinHash band key")
+
     def __str__(self):
-        return f"{self.user.username} ate {self.food_profile.name} on {self.date_consumed}"
\ No newline at end of file
+        return f"{self.food_id}:{self.key}"
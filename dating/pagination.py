@@ -0,0 +1,77 @@
+# dating/pagination.py
+import base64
+import binascii
+import json
+import operator
+from datetime import date
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(ValueError):
+    """A page cursor that was not produced by KeysetPage"""
+
+
+def encode_cursor(values):
+    raw = json.dumps([value.isoformat() if isinstance(value, date) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(model, fields, cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise InvalidCursor(cursor)
+        return [model._meta.get_field(name).to_python(value) for name, value in zip(fields, values)]
+    except (binascii.Error, UnicodeDecodeError, ValueError, ValidationError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+class KeysetPage:
+    """One page of a queryset in a fixed order, continuing after the last row of the previous page.
+
+    ``ordering`` must end in a unique field (normally ``id``) so every row
+    has a distinct position. Seeking with ``WHERE (a, b) > (x, y)`` on an
+    index over the same columns costs the same on page 500 as on page 1,
+    unlike OFFSET, and rows added meanwhile never shift a page. The query
+    runs on first access, so a template fragment served from the cache
+    never triggers it.
+    """
+
+    def __init__(self, queryset, ordering, cursor=None, size=20):
+        self.fields = [field.lstrip('-') for field in ordering]
+        self.size = size
+        self.cursor = cursor or ''
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            values = decode_cursor(queryset.model, self.fields, cursor)
+            queryset = queryset.filter(self._after(ordering, values))
+        self.queryset = queryset
+
+    def _after(self, ordering, values):
+        # (a > x) OR (a = x AND b > y) OR ..., with < for descending fields
+        conditions, equal = [], {}
+        for field, name, value in zip(ordering, self.fields, values):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            conditions.append(Q(**equal, **{f'{name}__{lookup}': value}))
+            equal[name] = value
+        return reduce(operator.or_, conditions)
+
+    @cached_property
+    def _rows(self):
+        return list(self.queryset[:self.size + 1])
+
+    @property
+    def items(self):
+        return self._rows[:self.size]
+
+    @property
+    def next_cursor(self):
+        if len(self._rows) <= self.size:
+            return None
+        last = self._rows[self.size - 1]
+        get = last.get if isinstance(last, dict) else lambda name: getattr(last, name)
+        return encode_cursor([get(name) for name in self.fields])
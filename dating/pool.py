@@ -0,0 +1,121 @@
+# dating/pool.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .catalog import normalize_tag
+from .generation import DEFAULT_CUISINES
+from .models import FoodProfile, GenerationJob, Match, UserProfile
+
+
+def active_profiles(now=None):
+    """Completed profiles whose users have logged in recently"""
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=settings.POOL_ACTIVE_DAYS)
+    return UserProfile.objects.filter(profile_completed=True, user__last_login__gte=cutoff)
+
+
+def pool_stats(now=None):
+    """Inventory per (diet, cuisine) bucket.
+
+    ``depth`` is how many foods in the bucket the furthest-along active user
+    of that diet has not seen yet, so a bucket at depth zero means at least
+    one user is about to run dry. Rates are per hour over the last
+    POOL_RATE_WINDOW_HOURS. ``hours_to_exhaustion`` is how soon the first
+    user runs dry at their own swipe rate: each user's unseen foods over
+    that user's rate, never one user's depth over everyone's swipes.
+    """
+    now = now or timezone.now()
+    window_hours = settings.POOL_RATE_WINDOW_HOURS
+    since = now - timedelta(hours=window_hours)
+    profiles = active_profiles(now)
+
+    buckets = {}
+    # [seen, recent] per bucket and user who has swiped in it
+    readers = {}
+
+    def bucket(diet, cuisine):
+        # Spellings of a cuisine share a bucket; it is labelled as the catalog spells it
+        return buckets.setdefault((diet, normalize_tag(cuisine)), {
+            'diet': diet,
+            'cuisine': cuisine,
+            'active_users': 0,
+            'total': 0,
+            'max_seen': 0,
+            'refilled': 0,
+            'consumed': 0,
+        })
+
+    # A bucket is in demand when an active user of that diet wants its cuisine
+    for diet, favorite_cuisines in profiles.values_list('diet_preferences', 'favorite_cuisines'):
+        cuisines = [c.strip() for c in favorite_cuisines.split(',') if c.strip()] or DEFAULT_CUISINES
+        for cuisine in {normalize_tag(c): c for c in reversed(cuisines)}.values():
+            bucket(diet, cuisine)['active_users'] += 1
+
+    supply = FoodProfile.objects.values('diet_compatibility', 'cuisine_type').annotate(
+        total=Count('id'),
+        refilled=Count('id', filter=Q(created_at__gte=since))
+    ).order_by('diet_compatibility', 'cuisine_type')
+    for row in supply:
+        b = bucket(row['diet_compatibility'], row['cuisine_type'])
+        if not b['total']:
+            b['cuisine'] = row['cuisine_type']
+        b['total'] += row['total']
+        b['refilled'] += row['refilled']
+
+    # Only swipes on foods of the user's own diet eat into that diet's buckets
+    seen = Match.objects.filter(
+        user__userprofile__in=profiles,
+        food_profile__diet_compatibility=F('user__userprofile__diet_preferences')
+    ).values(
+        'user_id', 'food_profile__diet_compatibility', 'food_profile__cuisine_type'
+    ).annotate(
+        seen=Count('id'),
+        recent=Count('id', filter=Q(created_at__gte=since))
+    )
+    for row in seen:
+        b = bucket(row['food_profile__diet_compatibility'], row['food_profile__cuisine_type'])
+        counts = readers.setdefault((b['diet'], normalize_tag(b['cuisine'])), {}).setdefault(row['user_id'], [0, 0])
+        counts[0] += row['seen']
+        counts[1] += row['recent']
+        b['max_seen'] = max(b['max_seen'], counts[0])
+        b['consumed'] += row['recent']
+
+    for b in buckets.values():
+        b['depth'] = max(b['total'] - b['max_seen'], 0)
+        b['refill_rate'] = b['refilled'] / window_hours
+        b['consumption_rate'] = b['consumed'] / window_hours
+        b['hours_to_exhaustion'] = min((
+            max(b['total'] - seen, 0) / (recent / window_hours)
+            for seen, recent in readers.get((b['diet'], normalize_tag(b['cuisine'])), {}).values() if recent
+        ), default=None)
+
+    return sorted(buckets.values(), key=lambda b: (b['diet'], b['cuisine']))
+
+
+def buckets_needing_refill(stats, watermark=None):
+    watermark = settings.POOL_LOW_WATERMARK if watermark is None else watermark
+    return [b for b in stats if b['active_users'] and b['depth'] < watermark]
+
+
+def refill_pool(watermark=None, batch_size=None, now=None):
+    """Queue a generation job for every active bucket below the watermark"""
+    batch_size = batch_size or settings.POOL_REFILL_BATCH
+    jobs = []
+    for b in buckets_needing_refill(pool_stats(now), watermark):
+        already_queued = GenerationJob.objects.filter(
+            user__isnull=True,
+            diet_compatibility=b['diet'],
+            cuisine_type__iexact=b['cuisine'],
+            status__in=GenerationJob.ACTIVE_STATUSES
+        ).exists()
+        if already_queued:
+            continue
+        jobs.append(GenerationJob.objects.create(
+            diet_compatibility=b['diet'],
+            cuisine_type=b['cuisine'],
+            count=batch_size
+        ))
+    return jobs
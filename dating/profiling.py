@@ -0,0 +1,168 @@
+# dating/profiling.py
+import cProfile
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import ExitStack
+from fnmatch import fnmatchcase
+
+from django.conf import settings
+from django.db import connections
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+
+# cProfile hooks the whole interpreter, so one profiled request per process at a time
+_profiling = threading.Lock()
+# When each capture in the last minute was saved; workers may run several threads
+_budget_lock = threading.Lock()
+_recent_captures = deque()
+
+
+def _sampled():
+    return random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+def _budget_left(now):
+    """Whether PROFILE_MAX_PER_MINUTE allows another capture; hold _budget_lock"""
+    while _recent_captures and now - _recent_captures[0] > 60:
+        _recent_captures.popleft()
+    return len(_recent_captures) < settings.PROFILE_MAX_PER_MINUTE
+
+
+def _has_budget():
+    with _budget_lock:
+        return _budget_left(time.monotonic())
+
+
+def _spend_budget():
+    """Take one capture from the per-minute budget, if any is left"""
+    with _budget_lock:
+        now = time.monotonic()
+        if not _budget_left(now):
+            return False
+        _recent_captures.append(now)
+        return True
+
+
+def is_profiled_view(view_name, patterns=None):
+    return any(fnmatchcase(view_name, pattern) for pattern in patterns or settings.PROFILE_VIEWS)
+
+
+class SQLRecorder:
+    """Execute wrapper keeping each statement and its duration"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({'sql': sql, 'ms': round((time.perf_counter() - start) * 1000, 3)})
+
+
+def load_captures(directory=None):
+    """Metadata of every capture in the profile directory, newest first"""
+    directory = directory or settings.PROFILE_DIR
+    captures = []
+    if not os.path.isdir(directory):
+        return captures
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as handle:
+                capture = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        capture['profile_path'] = os.path.join(directory, capture['profile'])
+        captures.append(capture)
+    captures.sort(key=lambda capture: capture['captured_at'], reverse=True)
+    return captures
+
+
+def rotate_captures(directory, keep):
+    for capture in load_captures(directory)[keep:]:
+        for path in (capture['profile_path'], capture['profile_path'][:-len('.prof')] + '.json'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def save_capture(profiler, meta):
+    directory = settings.PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    stem = f'{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}'
+    profiler.dump_stats(os.path.join(directory, f'{stem}.prof'))
+    with open(os.path.join(directory, f'{stem}.json'), 'w') as handle:
+        json.dump({**meta, 'profile': f'{stem}.prof'}, handle, indent=1)
+    rotate_captures(directory, settings.PROFILE_KEEP)
+
+
+class SlowRequestProfilerMiddleware:
+    """Profiles a sample of PROFILE_VIEWS requests.
+
+    A profile is only written when the request took at least PROFILE_SLOW_MS,
+    at most PROFILE_MAX_PER_MINUTE times a minute per process. Each one
+    lands in PROFILE_DIR as a pstats ``.prof`` file with a ``.json``
+    sidecar holding the view, user id, timing and executed SQL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _sampled():
+            return self.get_response(request)
+        try:
+            view_name = resolve(request.path_info).view_name
+        except Resolver404:
+            return self.get_response(request)
+        # Unlisted views and fast requests never spend the budget; it is only
+        # checked here and taken once a request turns out slow enough to save
+        if not is_profiled_view(view_name) or not _has_budget() or not _profiling.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            return self._profile(request, view_name)
+        finally:
+            _profiling.release()
+
+    def _profile(self, request, view_name):
+        profiler = cProfile.Profile()
+        sql = SQLRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(sql))
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler (a debugger, coverage) already owns the hook
+                return self.get_response(request)
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if elapsed_ms >= settings.PROFILE_SLOW_MS and _spend_budget():
+            user = getattr(request, 'user', None)
+            save_capture(profiler, {
+                'view': view_name,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'user_id': user.pk if user is not None and user.is_authenticated else None,
+                'elapsed_ms': round(elapsed_ms, 1),
+                'sql_ms': round(sum(query['ms'] for query in sql.queries), 1),
+                'queries': sql.queries,
+                'captured_at': timezone.now().isoformat(),
+            })
+        return response
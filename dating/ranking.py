@@ -0,0 +1,227 @@
+# dating/ranking.py
+from itertools import repeat
+
+import numpy as np
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .catalog import normalize_tag
+from .models import FoodProfile, Match
+from .variety import weekly_variety
+
+# Columns a candidate row needs for ranking, besides the two like counts
+RANK_FIELDS = ['cuisine_type', 'meal_type', 'calories']
+FEATURES = ['cuisine_affinity', 'meal_affinity', 'calorie_fit', 'novelty', 'like_rate']
+WEIGHTS = np.array([0.3, 0.15, 0.2, 0.15, 0.2])
+# A favourite cuisine counts as this many extra likes, so new users still get them first
+FAVORITE_LIKES = 2
+MEAL_CODES = {meal_type: code for code, (meal_type, _) in enumerate(FoodProfile.MEAL_TYPES)}
+UNKNOWN_MEAL = len(MEAL_CODES)
+
+
+def like_rate(likes, swipes):
+    # Laplace-smoothed, so a food or cuisine nobody has swiped on sits at 0.5
+    return (likes + 1) / (swipes + 2)
+
+
+def swipe_history(user_id):
+    """The user's likes and swipes per (cuisine, meal type)"""
+    return Match.objects.filter(user_id=user_id).values(
+        'food_profile__cuisine_type', 'food_profile__meal_type'
+    ).annotate(
+        likes=Count('id', filter=Q(user_liked=True)),
+        swipes=Count('id')
+    ).order_by()
+
+
+def swipe_history_key(user_id):
+    return f'swipe-history:{user_id}'
+
+
+def cached_swipe_history(user_id):
+    """``{(cuisine, meal_type): (likes, swipes)}``, up to RANKING_HISTORY_TTL seconds old.
+
+    Taste drifts slowly, so ranking a few swipes behind costs nothing
+    visible, and deck requests stay at a single query without the snapshot
+    being dropped on every swipe.
+    """
+    key = swipe_history_key(user_id)
+    history = cache.get(key)
+    if history is None:
+        history = {
+            (row['food_profile__cuisine_type'], row['food_profile__meal_type']): (row['likes'], row['swipes'])
+            for row in swipe_history(user_id)
+        }
+        cache.set(key, history, settings.RANKING_HISTORY_TTL)
+    return history
+
+
+class Taste:
+    """A user's ranking inputs, as tables indexed by cuisine and meal-type code.
+
+    Cuisine code 0 stands for every cuisine the user has never swiped,
+    logged or picked as a favourite, so a candidate batch only needs one
+    dictionary lookup per food to be ranked with array indexing. Cuisines
+    are coded by normalize_tag(), so a favourite typed as "italian" matches
+    foods labelled "Italian".
+    """
+
+    def __init__(self, history, cuisine_counts, favorites, calorie_goal):
+        cuisines = sorted(
+            {normalize_tag(cuisine) for cuisine, _ in history}
+            | {normalize_tag(cuisine) for cuisine in cuisine_counts}
+            | {normalize_tag(cuisine) for cuisine in favorites}
+        )
+        self.cuisine_codes = {cuisine: code for code, cuisine in enumerate(cuisines, 1)}
+
+        cuisine_likes = np.zeros(len(cuisines) + 1)
+        cuisine_swipes = np.zeros(len(cuisines) + 1)
+        meal_likes = np.zeros(UNKNOWN_MEAL + 1)
+        meal_swipes = np.zeros(UNKNOWN_MEAL + 1)
+        for (cuisine, meal_type), (likes, swipes) in history.items():
+            code, meal = self.cuisine_codes[normalize_tag(cuisine)], MEAL_CODES.get(meal_type, UNKNOWN_MEAL)
+            cuisine_likes[code] += likes
+            cuisine_swipes[code] += swipes
+            meal_likes[meal] += likes
+            meal_swipes[meal] += swipes
+        for cuisine in {normalize_tag(cuisine) for cuisine in favorites}:
+            cuisine_likes[self.cuisine_codes[cuisine]] += FAVORITE_LIKES
+            cuisine_swipes[self.cuisine_codes[cuisine]] += FAVORITE_LIKES
+
+        logged = np.zeros(len(cuisines) + 1)
+        for cuisine, count in cuisine_counts.items():
+            logged[self.cuisine_codes[normalize_tag(cuisine)]] += count
+
+        self.cuisine_affinity = like_rate(cuisine_likes, cuisine_swipes)
+        self.meal_affinity = like_rate(meal_likes, meal_swipes)
+        self.novelty = 1 / (1 + logged)
+        # The generator aims each dish at a quarter of the day's calories
+        self.calorie_target = max(calorie_goal // 4, 1)
+
+    @classmethod
+    def for_user(cls, user_profile):
+        """Build from the cached swipe history and weekly variety"""
+        return cls(
+            cached_swipe_history(user_profile.user_id),
+            weekly_variety(user_profile.user_id)['cuisine_counts'],
+            user_profile.get_cuisines_list(),
+            user_profile.daily_calorie_goal
+        )
+
+
+class CandidateBatch:
+    """Parallel arrays over candidate rows, coded against a Taste"""
+
+    def __init__(self, cuisine, meal, calories, likes, swipes):
+        self.cuisine = cuisine
+        self.meal = meal
+        self.calories = calories
+        self.likes = likes
+        self.swipes = swipes
+
+    @classmethod
+    def from_rows(cls, rows, taste, columns=range(5)):
+        """From value tuples such as a ``values_list()`` over the candidate queryset.
+
+        ``columns`` are the positions of cuisine, meal type, calories, likes
+        and swipes in a row. Rows are transposed and coded by C-level
+        iteration, so there is no Python loop over the candidates.
+        """
+        count = len(rows)
+        data = list(zip(*rows)) or [()] * (max(columns) + 1)
+        cuisine, meal, calories, likes, swipes = (data[column] for column in columns)
+        return cls(
+            np.fromiter(cuisine_codes(cuisine, taste), dtype=np.intp, count=count),
+            np.fromiter(map(MEAL_CODES.get, meal, repeat(UNKNOWN_MEAL)), dtype=np.intp, count=count),
+            np.fromiter(calories, dtype=float, count=count),
+            np.fromiter(likes, dtype=float, count=count),
+            np.fromiter(swipes, dtype=float, count=count),
+        )
+
+    def __len__(self):
+        return len(self.cuisine)
+
+
+def cuisine_codes(cuisines, taste):
+    """Taste codes for a column of catalog spellings, normalizing each distinct one once"""
+    codes = {cuisine: taste.cuisine_codes.get(normalize_tag(cuisine), 0) for cuisine in set(cuisines)}
+    return map(codes.__getitem__, cuisines)
+
+
+def feature_matrix(batch, taste):
+    """``len(batch) x len(FEATURES)`` matrix, every feature scaled to (0, 1]"""
+    return np.column_stack([
+        taste.cuisine_affinity[batch.cuisine],
+        taste.meal_affinity[batch.meal],
+        1 / (1 + np.abs(batch.calories - taste.calorie_target) / taste.calorie_target),
+        taste.novelty[batch.cuisine],
+        like_rate(batch.likes, batch.swipes),
+    ])
+
+
+def score(batch, taste, weights=WEIGHTS):
+    return feature_matrix(batch, taste) @ weights
+
+
+def rank(batch, taste, weights=WEIGHTS):
+    """Indices into the batch, best first; ties keep the batch's own order"""
+    return np.argsort(-score(batch, taste, weights), kind='stable')
+
+
+def naive_scores(rows, taste, weights=WEIGHTS):
+    """Per-row Python version of ``score`` over ``(cuisine, meal_type, calories, likes, swipes)`` rows.
+
+    Kept as a reference for tests and benchmark_ranking.
+    """
+    cuisine_affinity, meal_affinity = taste.cuisine_affinity.tolist(), taste.meal_affinity.tolist()
+    novelty, weights, target = taste.novelty.tolist(), list(weights), taste.calorie_target
+    scores = []
+    for cuisine, meal_type, calories, likes, swipes in rows:
+        code = taste.cuisine_codes.get(normalize_tag(cuisine), 0)
+        features = [
+            cuisine_affinity[code],
+            meal_affinity[MEAL_CODES.get(meal_type, UNKNOWN_MEAL)],
+            1 / (1 + abs(calories - target) / target),
+            novelty[code],
+            (likes + 1) / (swipes + 2),
+        ]
+        scores.append(sum(weight * feature for weight, feature in zip(weights, features)))
+    return scores
+
+
+def with_like_counts(foods):
+    """Annotate a FoodProfile queryset with ``global_likes`` and ``global_swipes`` from every user's swipes.
+
+    Correlated subqueries on Match's food_profile index, so they only run
+    for the rows a sliced queryset returns.
+    """
+    swipes = Match.objects.filter(food_profile_id=OuterRef('pk')).order_by().values('food_profile_id')
+    return foods.annotate(
+        global_swipes=Coalesce(
+            Subquery(swipes.annotate(n=Count('id')).values('n'), output_field=IntegerField()), Value(0)
+        ),
+        global_likes=Coalesce(
+            Subquery(swipes.filter(user_liked=True).annotate(n=Count('id')).values('n'), output_field=IntegerField()),
+            Value(0)
+        ),
+    )
+
+
+def rank_candidates(user_profile, foods, limit, fields):
+    """The ``limit`` best of the first RANKING_POOL_SIZE foods in ``foods``, as ``fields`` value tuples.
+
+    ``fields`` must include RANK_FIELDS. The pool comes back from the one
+    candidate query with the like counts as two extra columns, so ranking
+    adds no query of its own once the user's taste is cached.
+    """
+    rows = list(with_like_counts(foods).values_list(*fields, 'global_likes', 'global_swipes')[
+        :settings.RANKING_POOL_SIZE
+    ])
+    if len(rows) > 1:
+        columns = [fields.index(name) for name in RANK_FIELDS] + [len(fields), len(fields) + 1]
+        taste = Taste.for_user(user_profile)
+        rows = [rows[i] for i in rank(CandidateBatch.from_rows(rows, taste, columns), taste)[:limit]]
+    return [row[:len(fields)] for row in rows[:limit]]
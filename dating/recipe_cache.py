@@ -0,0 +1,134 @@
+# dating/recipe_cache.py
+import hashlib
+import random
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef, Value
+from django.utils import timezone
+
+from . import metrics
+from .catalog import normalize_tag, split_tags
+from .models import Match, RecipeCacheEntry
+
+# What an entry keeps of its food, for the admin and for inspecting the cache
+RECIPE_FIELDS = ['name', 'description', 'calories', 'meal_type', 'cuisine_type', 'diet_compatibility', 'ingredients']
+
+
+class CacheStats:
+    """Hit and miss counts for this process, for command output"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, hits, misses):
+        with self.lock:
+            self.hits += hits
+            self.misses += misses
+
+    def snapshot(self):
+        with self.lock:
+            return self.hits, self.misses
+
+
+stats = CacheStats()
+
+
+def hit_rate(before, after):
+    """``(hits, lookups)`` between two ``stats.snapshot()`` calls"""
+    hits, misses = after[0] - before[0], after[1] - before[1]
+    return hits, hits + misses
+
+
+def cache_params(user_profile, cuisine, meal_type):
+    """The prompt parameters that decide a recipe, normalized"""
+    step = max(1, settings.RECIPE_CACHE_CALORIE_STEP)
+    return {
+        'diet': user_profile.diet_preferences,
+        'cuisine': normalize_tag(cuisine),
+        'meal_type': meal_type,
+        'calories': user_profile.daily_calorie_goal // 4 // step * step,
+        # Part of the key so a cached recipe never reaches someone it could harm
+        'allergies': ', '.join(sorted(split_tags(user_profile.allergies))),
+    }
+
+
+def cache_key(params):
+    text = '|'.join(str(params[name]) for name in ['diet', 'cuisine', 'meal_type', 'calories', 'allergies'])
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def take_cached(user_profile, picks):
+    """Split ``(cuisine, meal_type)`` picks into cached food ids and picks still needing the LLM.
+
+    A key only serves hits once it holds RECIPE_CACHE_VARIANTS fresh entries,
+    so every parameter set collects that many distinct answers before any is
+    reused, and one batch never draws the same entry twice. A hit is the
+    catalog food the recipe already became, so it only counts while the user
+    has not swiped that food; nothing new is inserted for it.
+    """
+    if not settings.RECIPE_CACHE_ENABLED or not picks:
+        return [], list(picks)
+
+    keys = [cache_key(cache_params(user_profile, cuisine, meal_type)) for cuisine, meal_type in picks]
+    fresh_since = timezone.now() - timedelta(seconds=settings.RECIPE_CACHE_TTL)
+    entries = RecipeCacheEntry.objects.filter(key__in=set(keys), created_at__gte=fresh_since, food__isnull=False)
+    if user_profile.user_id:
+        entries = entries.annotate(seen=Exists(
+            Match.objects.filter(user_id=user_profile.user_id, food_profile_id=OuterRef('food_id'))
+        ))
+    else:
+        entries = entries.annotate(seen=Value(False))
+    found = {}
+    for pk, key, food_id, seen in entries.values_list('pk', 'key', 'food_id', 'seen'):
+        found.setdefault(key, []).append((pk, food_id, seen))
+    pools = {}
+    for key, rows in found.items():
+        if len(rows) >= settings.RECIPE_CACHE_VARIANTS:
+            unseen = [(pk, food_id) for pk, food_id, seen in rows if not seen]
+            pools[key] = random.sample(unseen, len(unseen))
+
+    food_ids, misses, used = [], [], []
+    for pick, key in zip(picks, keys):
+        if pools.get(key):
+            pk, food_id = pools[key].pop()
+            used.append(pk)
+            food_ids.append(food_id)
+        else:
+            misses.append(pick)
+
+    if used:
+        RecipeCacheEntry.objects.filter(pk__in=used).update(hits=F('hits') + 1, last_used_at=timezone.now())
+    stats.add(len(food_ids), len(misses))
+    metrics.store.observe_recipe_cache(len(food_ids), len(misses))
+    return food_ids, misses
+
+
+def store_recipes(user_profile, foods):
+    """Cache the recipes of freshly saved foods, then enforce the TTL and size bound"""
+    if not settings.RECIPE_CACHE_ENABLED or not foods:
+        return
+    entries = []
+    for food in foods:
+        params = cache_params(user_profile, food.cuisine_type, food.meal_type)
+        recipe = {field: getattr(food, field) for field in RECIPE_FIELDS}
+        entries.append(RecipeCacheEntry(key=cache_key(params), recipe=recipe, food=food, **params))
+    RecipeCacheEntry.objects.bulk_create(entries)
+    evict()
+
+
+def evict():
+    """Drop expired entries, then the least recently used beyond RECIPE_CACHE_MAX_ENTRIES"""
+    RecipeCacheEntry.objects.filter(
+        created_at__lt=timezone.now() - timedelta(seconds=settings.RECIPE_CACHE_TTL)
+    ).delete()
+    overflow = list(
+        RecipeCacheEntry.objects.order_by('-last_used_at', '-pk').values_list('pk', flat=True)[
+            settings.RECIPE_CACHE_MAX_ENTRIES:
+        ]
+    )
+    if overflow:
+        RecipeCacheEntry.objects.filter(pk__in=overflow).delete()
@@ -0,0 +1,88 @@
+# dating/routers.py
+from contextvars import ContextVar
+from fnmatch import fnmatchcase
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+
+PIN_COOKIE = 'primary_pin'
+
+# Sessions decide who is logged in, so a lagging copy must never answer for them
+PRIMARY_ONLY_APPS = {'sessions'}
+
+# Per-request routing state; contextvars keep threads and requests apart
+_read_from_replica = ContextVar('read_from_replica', default=False)
+_pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+
+
+def replica_configured():
+    return settings.REPLICA_DATABASE in connections
+
+
+def is_replica_view(view_name):
+    return any(fnmatchcase(view_name, pattern) for pattern in settings.REPLICA_READ_VIEWS)
+
+
+def pin_to_primary():
+    """Send the rest of this request's reads to the primary"""
+    _pinned_to_primary.set(True)
+
+
+class PrimaryReplicaRouter:
+    """Reads from the replica inside REPLICA_READ_VIEWS, everything else on default.
+
+    Any write pins the request to the primary, and ReplicaRoutingMiddleware
+    carries that pin across the user's next requests for REPLICA_PIN_SECONDS
+    so they always read their own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return 'default'
+        if _read_from_replica.get() and not _pinned_to_primary.get() and replica_configured():
+            return settings.REPLICA_DATABASE
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data, so objects may mix
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema through replication
+        return db != settings.REPLICA_DATABASE
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = _pinned_to_primary.set(self._has_pin(request))
+        replica = _read_from_replica.set(False)
+        try:
+            response = self.get_response(request)
+            if _pinned_to_primary.get() and replica_configured():
+                response.set_signed_cookie(
+                    PIN_COOKIE, '1', salt=PIN_COOKIE, max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True, samesite='Lax', secure=settings.SESSION_COOKIE_SECURE
+                )
+            return response
+        finally:
+            _pinned_to_primary.reset(pinned)
+            _read_from_replica.reset(replica)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        if match and is_replica_view(match.view_name):
+            _read_from_replica.set(True)
+
+    def _has_pin(self, request):
+        try:
+            return request.get_signed_cookie(PIN_COOKIE, salt=PIN_COOKIE, max_age=settings.REPLICA_PIN_SECONDS) == '1'
+        except (KeyError, signing.BadSignature):
+            return False
@@ -0,0 +1,34 @@
+# dating/scoring.py
+from .variety import weekly_variety
+
+BASE_CHANCE = 0.3  # 30% base chance
+MAX_VARIETY_BONUS = 0.5  # Up to 50% bonus
+NEW_CUISINE_BONUS = 0.2
+MAX_CHANCE = 0.9  # Max 90% chance
+
+
+def chance_from_variety(variety_score, cuisine_seen):
+    """Like-back probability from a variety score and whether the cuisine is repeated"""
+    # Food likes users with more variety (higher chance with more variety)
+    variety_bonus = min(variety_score * 0.1, MAX_VARIETY_BONUS)
+
+    # Check if user hasn't had this cuisine recently
+    if not cuisine_seen:
+        variety_bonus += NEW_CUISINE_BONUS
+
+    return min(BASE_CHANCE + variety_bonus, MAX_CHANCE)
+
+
+def score_foods(user_id, foods):
+    """Like-back chance for each of ``foods``, as ``{food_id: chance}``.
+
+    Every like is scored here, one swipe or a whole batch. The inputs come
+    from the cached weekly variety summary, so scoring costs no queries
+    once the summary is cached.
+    """
+    variety = weekly_variety(user_id)
+    variety_score = len(variety['cuisines']) + len(variety['meal_types'])
+    return {
+        food.pk: chance_from_variety(variety_score, food.cuisine_type in variety['cuisines'])
+        for food in foods
+    }
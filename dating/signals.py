@@ -1,7 +1,12 @@
 # dating/signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import CustomUser, UserProfile
+from .models import CustomUser, UserProfile, FoodProfile, Match, WeeklyFoodLog
+from .catalog import sync_food_ingredients, sync_profile_tags
+from .dedup import index_foods
+from .match_cache import bump_matches_version
+from .meal_plan import invalidate_calorie_goal, invalidate_meal_plans
+from .variety import invalidate_weekly_variety
 
 @receiver(post_save, sender=CustomUser)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -9,6 +14,65 @@ def create_user_profile(sender, instance, created, **kwargs):
         UserProfile.objects.create(user=instance)
 
 @receiver(post_save, sender=CustomUser)
-def save_user_profile(sender, instance, **kwargs):
-    if hasattr(instance, 'userprofile'):
-        instance.userprofile.save()
\ No newline at end of file
+def save_user_profile(sender, instance, created, **kwargs):
+    # Only a profile already loaded through user.userprofile can hold unsaved
+    # edits; plain user saves (e.g. last_login on every login) touch nothing
+    if created:
+        return
+    profile = CustomUser.userprofile.related.get_cached_value(instance, default=None)
+    if profile is None:
+        return
+    if profile._state.adding:
+        profile.save()
+    elif profile.dirty_fields():
+        profile.save(update_fields=profile.dirty_fields())
+
+# The receivers below keep cached summaries fresh. Queryset update() and
+# bulk_create() send no signals, so code that writes Match or WeeklyFoodLog
+# rows in bulk must call bump_matches_version, invalidate_weekly_variety and
+# invalidate_meal_plans itself, as dedup.merge_foods does.
+
+@receiver(post_save, sender=WeeklyFoodLog)
+@receiver(post_delete, sender=WeeklyFoodLog)
+def invalidate_variety(sender, instance, **kwargs):
+    invalidate_weekly_variety(instance.user_id)
+
+@receiver(post_save, sender=WeeklyFoodLog)
+@receiver(post_delete, sender=WeeklyFoodLog)
+def invalidate_meal_plan(sender, instance, **kwargs):
+    # A log moved to another day also leaves the week it was loaded from
+    days = {instance.date_consumed, getattr(instance, '_saved_date', None)} - {None}
+    invalidate_meal_plans(instance.user_id, *days)
+    instance._saved_date = instance.date_consumed
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_meal_plan_goal(sender, instance, **kwargs):
+    # UserProfile.save() only resets the saved values after post_save
+    if 'daily_calorie_goal' in instance.dirty_fields():
+        invalidate_calorie_goal(instance.user_id)
+
+@receiver(post_save, sender=UserProfile)
+def sync_user_profile_tags(sender, instance, **kwargs):
+    if instance.tags_changed():
+        sync_profile_tags(instance)
+
+@receiver(post_save, sender=FoodProfile)
+def sync_food_profile_ingredients(sender, instance, **kwargs):
+    if instance.ingredients_changed():
+        sync_food_ingredients(instance)
+
+@receiver(post_save, sender=FoodProfile)
+def index_food_fingerprint(sender, instance, created, update_fields, **kwargs):
+    if created or update_fields is None or {'name', 'ingredients', 'diet_compatibility'} & set(update_fields):
+        index_foods([instance])
+
+@receiver(post_save, sender=Match)
+def bump_matches_on_save(sender, instance, **kwargs):
+    if instance.mutual_changed():
+        bump_matches_version(instance.user_id)
+    instance._saved_mutual = instance.is_mutual_match()
+
+@receiver(post_delete, sender=Match)
+def bump_matches_on_delete(sender, instance, **kwargs):
+    if instance.is_mutual_match():
+        bump_matches_version(instance.user_id)
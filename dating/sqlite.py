@@ -0,0 +1,17 @@
+# dating/sqlite.py
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Tune each new SQLite connection.
+
+    WAL lets readers carry on while a writer commits, ``synchronous=NORMAL``
+    is durable under WAL without an fsync per transaction, and
+    ``busy_timeout`` makes writers queue for the lock instead of failing
+    with "database is locked".
+    """
+    if connection.vendor != 'sqlite' or not settings.SQLITE_TUNING:
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
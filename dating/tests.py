@@ -1,3 +1,1551 @@
-from django.test import TestCase
+import copy
+import hashlib
+import io
+import json
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from unittest import skipUnless
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+
+from .backends import RecordingBackend, ReplayBackend, StubBackend, get_backend
+from .candidates import candidate_foods, deck_card, next_deck
+from .dedup import drop_duplicates, merge_foods, normalize_name
+from .generation import GENERATED_MEAL_TYPES, GenerationEngine, build_recipe_prompt, generate_food_profiles, save_food_profiles
+from .images import ImageError, download, ingest_pending_images
+from .jobs import claim_next_job, enqueue_generation, process_jobs
+from .loadtest import Funnel, TestClientDriver, compare, summarize
+from .match_cache import matches_version
+from .meal_plan import compute_meal_plan, meal_plan_cache_key, week_start, weekly_meal_plan
+from .metrics import MetricStore, archive_files, store as metric_store
+from .models import (
+    Allergen, CustomUser, FoodFingerprint, FoodProfile, GenerationJob, Match, RecipeCacheEntry, UserProfile,
+    WeeklyFoodLog
+)
+from .pagination import KeysetPage, encode_cursor
+from .pool import pool_stats, refill_pool
+from .profiling import load_captures
+from .ranking import (
+    FEATURES, CandidateBatch, Taste, feature_matrix, naive_scores, score, swipe_history, with_like_counts
+)
+from .recipe_cache import evict, store_recipes, take_cached
+from .routers import PIN_COOKIE
+from .scoring import score_foods
+from .variety import compute_weekly_variety, variety_cache_key, variety_window_start
+from .views import food_preference_chance, mutual_matches_page
+
+
+class StubClient:
+    """Offline stand-in for g4f's Client with the same call shape"""
+
+    def __init__(self, delay=0, image_delay=None):
+        self.delay = delay
+        self.image_delay = delay if image_delay is None else image_delay
+        self.chat_calls = 0
+        self.image_calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self.images = SimpleNamespace(generate=self._generate)
+
+    def _sleep(self, seconds):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(seconds)
+        with self.lock:
+            self.in_flight -= 1
+
+    def _create(self, **kwargs):
+        with self.lock:
+            self.chat_calls += 1
+            number = self.chat_calls
+        self._sleep(self.delay)
+        content = json.dumps({
+            'name': f'Stub Dish {number}',
+            'description': 'A dish made without the network',
+            'calories': 400,
+            'ingredients': 'rice, beans, lime',
+        })
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def _generate(self, **kwargs):
+        with self.lock:
+            self.image_calls += 1
+            number = self.image_calls
+        self._sleep(self.image_delay)
+        return SimpleNamespace(data=[SimpleNamespace(url=f'https://img.example.com/{number}.png')])
+
+
+def make_user(email='eater@example.com', diet='vegan', **profile_fields):
+    user = CustomUser.objects.create_user(
+        username=email.split('@')[0], email=email, password='pw-12345!',
+        first_name='Test', last_name='Eater', last_login=timezone.now()
+    )
+    profile = user.userprofile
+    profile.diet_preferences = diet
+    profile.profile_completed = True
+    for field, value in profile_fields.items():
+        setattr(profile, field, value)
+    profile.save()
+    return user
+
+
+def make_food(name='Food', diet='vegan', cuisine='Italian', **fields):
+    defaults = {
+        'description': 'Tasty', 'calories': 500, 'meal_type': 'dinner',
+        'ingredients': 'tomato, basil', 'generation_successful': True,
+    }
+    defaults.update(fields)
+    return FoodProfile.objects.create(name=name, diet_compatibility=diet, cuisine_type=cuisine, **defaults)
+
+
+class GenerationQueueTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client.force_login(self.user)
+
+    def test_discover_enqueues_instead_of_generating_inline(self):
+        response = self.client.get(reverse('dating:discover'))
+
+        self.assertContains(response, 'Cooking up more matches')
+        self.assertFalse(FoodProfile.objects.exists())
+        job = GenerationJob.objects.get(user=self.user)
+        self.assertEqual(job.status, GenerationJob.STATUS_PENDING)
+        self.assertEqual(job.diet_compatibility, 'vegan')
+
+    def test_enqueue_reuses_active_job(self):
+        first = enqueue_generation(self.user.userprofile)
+        second = enqueue_generation(self.user.userprofile)
+        self.assertEqual(first.pk, second.pk)
+
+    def test_worker_runs_job_with_stub_client(self):
+        enqueue_generation(self.user.userprofile, count=3)
+        stub = StubClient()
+
+        self.assertEqual(process_jobs(client=stub), 1)
+
+        job = GenerationJob.objects.get(user=self.user)
+        self.assertEqual(job.status, GenerationJob.STATUS_DONE)
+        self.assertEqual(job.foods_created, 3)
+        self.assertEqual(stub.chat_calls, 3)
+        self.assertEqual(FoodProfile.objects.filter(diet_compatibility='vegan').count(), 3)
+
+    def test_claimed_job_is_not_claimed_twice(self):
+        enqueue_generation(self.user.userprofile)
+        self.assertIsNotNone(claim_next_job())
+        self.assertIsNone(claim_next_job())
+
+    def test_status_endpoint_reports_ready_after_worker(self):
+        self.client.get(reverse('dating:discover'))
+        status = self.client.get(reverse('dating:generation_status')).json()
+        self.assertEqual(status['status'], 'cooking')
+
+        process_jobs(client=StubClient())
+
+        status = self.client.get(reverse('dating:generation_status')).json()
+        self.assertEqual(status['status'], 'ready')
+        self.assertEqual(status['job_status'], GenerationJob.STATUS_DONE)
+
+
+    def test_status_poll_requeues_when_a_job_leaves_the_deck_empty(self):
+        self.client.get(reverse('dating:discover'))
+        process_jobs(client=StubClient())
+        FoodProfile.objects.all().delete()
+
+        # Within the cooldown the finished job is reported, not retried
+        status = self.client.get(reverse('dating:generation_status')).json()
+        self.assertEqual(status['status'], 'cooking')
+        self.assertEqual(status['job_status'], GenerationJob.STATUS_DONE)
+        self.assertEqual(GenerationJob.objects.filter(user=self.user).count(), 1)
+
+        GenerationJob.objects.update(finished_at=timezone.now() - timedelta(minutes=5))
+        status = self.client.get(reverse('dating:generation_status')).json()
+        self.assertEqual(status['job_status'], GenerationJob.STATUS_PENDING)
+        self.assertEqual(GenerationJob.objects.filter(user=self.user).count(), 2)
+
+        self.client.get(reverse('dating:generation_status'))
+        self.assertEqual(GenerationJob.objects.filter(user=self.user).count(), 2)
+
+
+class GenerationEngineTests(TestCase):
+    def test_calls_run_concurrently_up_to_limit(self):
+        stub = StubClient(delay=0.05)
+        engine = GenerationEngine(client=stub, concurrency=4, timeout=5)
+
+        recipes = engine.generate(UserProfile(diet_preferences='keto'), 8)
+
+        self.assertEqual(len(recipes), 8)
+        self.assertEqual(stub.image_calls, 8)
+        self.assertGreater(stub.max_in_flight, 1)
+        self.assertLessEqual(stub.max_in_flight, 4)
+
+    def test_image_timeout_keeps_recipe_without_image(self):
+        stub = StubClient(delay=0, image_delay=0.5)
+        engine = GenerationEngine(client=stub, concurrency=2, timeout=0.05)
+
+        recipes = engine.generate(UserProfile(diet_preferences='keto'), 2)
+
+        self.assertEqual(len(recipes), 2)
+        self.assertEqual({recipe['image_url'] for recipe in recipes}, {''})
+
+
+class GenerationBackendTests(TestCase):
+    def prompt(self, diet='vegan', cuisine='Mexican'):
+        return build_recipe_prompt(UserProfile(diet_preferences=diet, allergies='beans'), cuisine, 'lunch')
+
+    def test_stub_is_deterministic_and_follows_the_prompt(self):
+        first, second = StubBackend(seed=7), StubBackend(seed=7)
+        answers = [json.loads(first.complete('', self.prompt())) for _ in range(5)]
+
+        self.assertEqual(answers, [json.loads(second.complete('', self.prompt())) for _ in range(5)])
+        self.assertGreater(len({answer['name'] for answer in answers}), 1)
+        for answer in answers:
+            self.assertFalse({'chicken', 'salmon', 'turkey', 'shrimp', 'beef'} & set(answer['ingredients'].split(', ')))
+            self.assertNotIn('beans', answer['ingredients'])
+            self.assertTrue(400 <= answer['calories'] <= 600)
+
+    def test_stub_failures_are_dropped_by_the_engine(self):
+        engine = GenerationEngine(client=StubBackend(failure_rate=1.0), concurrency=2)
+
+        self.assertEqual(engine.generate(UserProfile(diet_preferences='vegan'), 3), [])
+
+    def test_recorded_answers_replay_from_disk(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as handle:
+            path = handle.name
+        self.addCleanup(os.remove, path)
+        recorder = RecordingBackend(StubBackend(), path)
+        recorded = [recorder.complete('', self.prompt()), recorder.image_url('a photo')]
+
+        replay = ReplayBackend(path)
+        self.assertEqual([replay.complete('', self.prompt()), replay.image_url('a photo')], recorded)
+        # Unseen prompts still get a recorded answer of the right kind
+        self.assertEqual(replay.complete('', self.prompt(cuisine='Italian')), recorded[0])
+
+    @override_settings(GENERATION_BACKEND='stub')
+    def test_backend_is_chosen_in_settings(self):
+        self.assertIsInstance(get_backend(), StubBackend)
+        self.assertEqual(generate_food_profiles(make_user().userprofile, count=3), 3)
+
+
+@override_settings(RECIPE_CACHE_ENABLED=True, RECIPE_CACHE_VARIANTS=2, RECIPE_CACHE_MAX_ENTRIES=100)
+class RecipeCacheTests(TestCase):
+    def recipe(self, name, cuisine='Italian', meal_type='dinner'):
+        return {
+            'name': name, 'description': 'Cached', 'calories': 500, 'meal_type': meal_type,
+            'cuisine_type': cuisine, 'diet_compatibility': 'vegan', 'ingredients': 'rice, peas',
+            'image_url': '', 'generated_prompt': 'prompt',
+        }
+
+    def foods(self, *names, **fields):
+        return save_food_profiles([self.recipe(name, **fields) for name in names])
+
+    def test_key_serves_variants_once_warm(self):
+        profile = UserProfile(diet_preferences='vegan', allergies='Nuts, soy')
+        store_recipes(profile, self.foods('One'))
+        self.assertEqual(take_cached(profile, [('Italian', 'dinner')]), ([], [('Italian', 'dinner')]))
+
+        store_recipes(profile, self.foods('Two'))
+        cached, misses = take_cached(profile, [('italian ', 'dinner')] * 3)
+
+        # Two distinct variants served, the third pick still goes to the LLM
+        self.assertEqual(sorted(FoodProfile.objects.filter(pk__in=cached).values_list('name', flat=True)), ['One', 'Two'])
+        self.assertEqual(misses, [('italian ', 'dinner')])
+        self.assertEqual(sum(RecipeCacheEntry.objects.values_list('hits', flat=True)), 2)
+
+    def test_allergies_and_calorie_target_are_part_of_the_key(self):
+        profile = UserProfile(diet_preferences='vegan', allergies='soy, nuts')
+        store_recipes(profile, self.foods('One', 'Two'))
+
+        self.assertEqual(len(take_cached(profile, [('Italian', 'dinner')])[0]), 1)
+        self.assertEqual(take_cached(UserProfile(diet_preferences='vegan'), [('Italian', 'dinner')])[0], [])
+        hungrier = UserProfile(diet_preferences='vegan', allergies='nuts,soy', daily_calorie_goal=3000)
+        self.assertEqual(take_cached(hungrier, [('Italian', 'dinner')])[0], [])
+
+    def test_ttl_and_size_bound_evict(self):
+        profile = UserProfile(diet_preferences='vegan')
+        store_recipes(profile, self.foods('Dish 0', 'Dish 1', 'Dish 2', meal_type='lunch'))
+        RecipeCacheEntry.objects.filter(recipe__name='Dish 0').update(created_at=timezone.now() - timedelta(days=30))
+        RecipeCacheEntry.objects.filter(recipe__name='Dish 1').update(last_used_at=timezone.now() - timedelta(hours=1))
+
+        with self.settings(RECIPE_CACHE_MAX_ENTRIES=1):
+            evict()
+
+        self.assertEqual(list(RecipeCacheEntry.objects.values_list('recipe__name', flat=True)), ['Dish 2'])
+
+    @override_settings(DEDUP_ENABLED=True)
+    def test_hits_are_unseen_catalog_foods_not_new_rows(self):
+        profile = make_user(favorite_cuisines='Italian').userprofile
+        # Enough variants per key that every pick is a hit
+        for meal in GENERATED_MEAL_TYPES:
+            store_recipes(profile, self.foods(*(f'{meal} {i}' for i in range(6)), meal_type=meal))
+        catalog = FoodProfile.objects.count()
+
+        client = StubClient()
+        self.assertEqual(generate_food_profiles(profile, count=6, client=client), 0)
+        self.assertEqual((client.chat_calls, FoodProfile.objects.count()), (0, catalog))
+
+        # Once the user has swiped every cached food, picks go to the LLM again
+        Match.objects.bulk_create([Match(user=profile.user, food_profile=food) for food in FoodProfile.objects.all()])
+        generate_food_profiles(profile, count=3, client=client)
+        self.assertEqual(client.chat_calls, 3)
+
+    def test_merged_duplicates_keep_their_cache_entries(self):
+        profile = UserProfile(diet_preferences='vegan')
+        kept, duplicate = self.foods('Margherita Pizza', 'Classic Margherita Pizza')
+        store_recipes(profile, [duplicate])
+
+        merge_foods({duplicate.pk: kept.pk})
+        self.assertEqual(RecipeCacheEntry.objects.get().food, kept)
+
+    def test_generation_command_reports_hit_rate(self):
+        out = io.StringIO()
+        # Every pick lands on one key, so the second run is served entirely from the first
+        with self.settings(RECIPE_CACHE_VARIANTS=1, DEDUP_ENABLED=False), \
+                mock.patch('dating.generation.random.choice', side_effect=lambda options: options[0]):
+            call_command('generate_sample_foods', count=12, backend='stub', stdout=out)
+            call_command('generate_sample_foods', count=12, backend='stub', stdout=out)
+
+        self.assertIn('12 of 12 recipes reused (100% hit rate)', out.getvalue())
+        self.assertEqual(FoodProfile.objects.count(), 12)
+        self.assertEqual(RecipeCacheEntry.objects.count(), 12)
+
+
+class DedupTests(TestCase):
+    def recipe(self, name, ingredients='tomato, basil, mozzarella', diet='vegan'):
+        return {
+            'name': name, 'description': 'Generated', 'calories': 500, 'meal_type': 'dinner',
+            'cuisine_type': 'Italian', 'diet_compatibility': diet, 'ingredients': ingredients,
+            'image_url': '', 'generated_prompt': 'prompt',
+        }
+
+    def test_names_normalize_filler_and_word_order(self):
+        self.assertEqual(normalize_name('Classic Margherita Pizza!'), normalize_name('pizza  margherita'))
+
+    def test_drops_duplicates_of_catalog_and_batch(self):
+        make_food('Margherita Pizza', ingredients='tomato, basil, mozzarella')
+        kept = drop_duplicates([
+            self.recipe('Classic Margherita Pizza', ingredients='tomato, mozzarella'),
+            self.recipe('Smoky Tofu Curry', ingredients='tofu, rice, ginger, garlic, coconut milk'),
+            self.recipe('Tofu Curry Smoky Bowl', ingredients='Tofu, rice, ginger, garlic, coconut milk'),
+            self.recipe('Margherita Pizza', diet='omnivore'),
+        ])
+
+        self.assertEqual([(r['name'], r['diet_compatibility']) for r in kept], [
+            ('Smoky Tofu Curry', 'vegan'), ('Margherita Pizza', 'omnivore'),
+        ])
+
+    def test_different_dishes_sharing_ingredients_are_kept(self):
+        make_food('Stub Dish 1', ingredients='rice, beans, lime')
+        self.assertEqual(len(drop_duplicates([self.recipe('Stub Dish 2', ingredients='rice, beans, lime')])), 1)
+
+    def test_generation_skips_duplicates(self):
+        backend = StubBackend(latency=0)
+        backend.complete = lambda system_prompt, prompt: json.dumps({
+            'name': 'Margherita Pizza', 'description': 'Again', 'calories': 500, 'ingredients': 'tomato, basil',
+        })
+
+        self.assertEqual(generate_food_profiles(make_user().userprofile, count=3, client=backend), 1)
+        self.assertEqual(generate_food_profiles(make_user('b@example.com').userprofile, count=3, client=backend), 0)
+        self.assertEqual(FoodProfile.objects.count(), 1)
+
+    def test_bulk_save_links_ingredients_and_skips_bad_rows(self):
+        recipes = [
+            self.recipe('Tofu Curry', ingredients='Tofu, rice'),
+            dict(self.recipe('Broken Stew'), calories='about 400'),
+            self.recipe('Bean Chili', ingredients='beans, chili'),
+        ]
+
+        saved = save_food_profiles(recipes)
+
+        self.assertEqual([food.name for food in saved], ['Tofu Curry', 'Bean Chili'])
+        curry = FoodProfile.objects.get(name='Tofu Curry')
+        self.assertEqual(sorted(curry.ingredient_set.values_list('name', flat=True)), ['rice', 'tofu'])
+        self.assertFalse(curry.ingredients_changed())
+        self.assertEqual(drop_duplicates([self.recipe('Bean Chili', ingredients='beans')]), [])
+
+    def test_sample_command_inserts_in_batches_and_reports_rate(self):
+        out = io.StringIO()
+        call_command('generate_sample_foods', count=30, batch_size=8, backend='stub', no_dedup=True, stdout=out)
+
+        self.assertEqual(FoodProfile.objects.count(), 30)
+        self.assertEqual(out.getvalue().count('rows after'), 4)
+        self.assertIn('rows/s', out.getvalue())
+
+    def test_command_merges_swipes_and_logs_into_oldest(self):
+        user, other = make_user(), make_user('other@example.com')
+        kept = make_food('Margherita Pizza')
+        FoodProfile.objects.bulk_create([
+            FoodProfile(name=name, description='Tasty', calories=500, meal_type='dinner', cuisine_type='Italian',
+                        diet_compatibility='vegan', ingredients='tomato, basil')
+            for name in ['Classic Margherita Pizza', 'Pizza Margherita', 'Tomato Soup']
+        ])
+        first, second = FoodProfile.objects.filter(name__contains='izza').exclude(pk=kept.pk).order_by('pk')
+        Match.objects.create(user=user, food_profile=kept, user_liked=True, food_liked=True)
+        Match.objects.create(user=user, food_profile=first, user_liked=False, food_liked=False)
+        Match.objects.create(user=other, food_profile=second, user_liked=True, food_liked=True)
+        WeeklyFoodLog.objects.create(user=other, food_profile=second, meal_type='dinner')
+
+        out = io.StringIO()
+        call_command('dedupe_foods', stdout=out)
+
+        self.assertIn('Merged 2 duplicates', out.getvalue())
+        self.assertEqual(sorted(FoodProfile.objects.values_list('name', flat=True)), ['Margherita Pizza', 'Tomato Soup'])
+        self.assertTrue(Match.objects.get(user=user, food_profile=kept).user_liked)
+        self.assertTrue(Match.objects.filter(user=other, food_profile=kept).exists())
+        self.assertEqual(WeeklyFoodLog.objects.get(user=other).food_profile, kept)
+        # The bulk-created soup is indexed too
+        self.assertEqual(FoodFingerprint.objects.values('food').distinct().count(), 2)
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    """Local stand-in for an image host: /food.png is a real PNG, /notes.txt is not an image"""
+
+    def do_GET(self):
+        if self.path == '/food.png':
+            buffer = io.BytesIO()
+            Image.new('RGB', (1200, 900), (200, 80, 40)).save(buffer, 'PNG')
+            body, content_type = buffer.getvalue(), 'image/png'
+        elif self.path == '/notes.txt':
+            body, content_type = b'not an image', 'text/plain'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ImageIngestionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), ImageHandler)
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.directory, IMAGE_MAX_ATTEMPTS=2, IMAGE_ALLOW_PRIVATE_HOSTS=True
+        )
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.directory)
+
+    def queued_food(self, path, name='Food'):
+        return make_food(name, image_url=f'{self.base_url}{path}', image_status=FoodProfile.IMAGE_PENDING)
+
+    def test_stores_content_hashed_variants(self):
+        food = self.queued_food('/food.png')
+        remote = make_food('Remote', image_url='https://img.example.com/1.png')
+
+        self.assertEqual(ingest_pending_images(), (1, 0))
+
+        food.refresh_from_db()
+        self.assertEqual(food.image_status, FoodProfile.IMAGE_READY)
+        self.assertEqual(set(food.image_variants), {'card', 'thumb'})
+        for variant, size in [('card', (896, 768)), ('thumb', (600, 384))]:
+            for fmt, extension in [('webp', 'WEBP'), ('jpeg', 'JPEG')]:
+                path = food.image_variants[variant][fmt]
+                with default_storage.open(path) as handle:
+                    data = handle.read()
+                self.assertEqual(os.path.basename(path).split('.')[0], hashlib.sha256(data).hexdigest()[:32])
+                with Image.open(io.BytesIO(data)) as image:
+                    self.assertEqual((image.format, image.size), (extension, size))
+
+        card = deck_card(food)
+        self.assertTrue(card['image_url'].startswith('/media/foods/') and card['image_url'].endswith('.jpg'))
+        self.assertTrue(card['image_webp'].endswith('.webp'))
+        # Foods not ingested yet keep hot-linking, without a WebP source
+        self.assertEqual((remote.thumb_image, remote.thumb_image_webp), ('https://img.example.com/1.png', ''))
+
+    def test_identical_images_are_stored_once(self):
+        first, second = self.queued_food('/food.png'), self.queued_food('/food.png', name='Other')
+        ingest_pending_images()
+        first.refresh_from_db()
+        second.refresh_from_db()
+
+        self.assertEqual(first.image_variants, second.image_variants)
+        stored = sum(len(files) for _, _, files in os.walk(self.directory))
+        self.assertEqual(stored, 4)
+
+    def test_only_public_http_urls_are_fetched(self):
+        with self.assertRaisesMessage(ImageError, 'only http and https'):
+            download('file:///etc/passwd')
+
+        with self.settings(IMAGE_ALLOW_PRIVATE_HOSTS=False):
+            for url in [f'{self.base_url}/food.png', 'http://169.254.169.254/latest/meta-data/', 'http://[::1]/x.png']:
+                with self.assertRaisesMessage(ImageError, 'is not a public address'):
+                    download(url)
+
+        with self.settings(IMAGE_MAX_BYTES=100):
+            with self.assertRaisesMessage(ImageError, 'larger than 100 bytes'):
+                download(f'{self.base_url}/food.png')
+
+    def test_failed_downloads_retry_then_give_up(self):
+        missing, broken = self.queued_food('/missing.png'), self.queued_food('/notes.txt', name='Broken')
+
+        self.assertEqual(ingest_pending_images(), (0, 0))
+        missing.refresh_from_db()
+        self.assertEqual((missing.image_status, missing.image_attempts), (FoodProfile.IMAGE_PENDING, 1))
+
+        self.assertEqual(ingest_pending_images(), (0, 2))
+        broken.refresh_from_db()
+        self.assertEqual((broken.image_status, broken.image_variants), (FoodProfile.IMAGE_FAILED, {}))
+        self.assertEqual(broken.card_image, f'{self.base_url}/notes.txt')
+
+    def test_generated_foods_are_queued_and_worker_ingests_them(self):
+        generate_food_profiles(make_user().userprofile, count=2, client=StubClient())
+        self.assertEqual(FoodProfile.objects.filter(image_status=FoodProfile.IMAGE_PENDING).count(), 2)
+
+        FoodProfile.objects.update(image_url=f'{self.base_url}/food.png')
+        out = io.StringIO()
+        call_command('run_food_generator', once=True, no_refill=True, stdout=out)
+
+        self.assertIn('Stored images for 2 foods', out.getvalue())
+        self.assertEqual(FoodProfile.objects.filter(image_status=FoodProfile.IMAGE_READY).count(), 2)
+
+
+@override_settings(POOL_LOW_WATERMARK=3, POOL_REFILL_BATCH=5)
+class CandidatePoolTests(TestCase):
+    def setUp(self):
+        self.user = make_user(favorite_cuisines='Italian, Thai')
+        self.foods = [make_food(f'Pasta {i}') for i in range(4)]
+
+    def bucket(self, cuisine):
+        return next(b for b in pool_stats() if b['diet'] == 'vegan' and b['cuisine'] == cuisine)
+
+    def test_depth_counts_foods_the_user_has_not_seen(self):
+        Match.objects.create(user=self.user, food_profile=self.foods[0])
+
+        italian = self.bucket('Italian')
+        self.assertEqual(italian['active_users'], 1)
+        self.assertEqual(italian['depth'], 3)
+        self.assertEqual(self.bucket('Thai')['depth'], 0)
+
+    @override_settings(POOL_RATE_WINDOW_HOURS=2)
+    def test_exhaustion_uses_each_users_own_swipe_rate(self):
+        foods = self.foods + [make_food(f'Risotto {i}') for i in range(6)]
+        other = make_user('other@example.com', favorite_cuisines='Italian')
+        # One user has seen 4 of 10 at 2 swipes an hour, the other 2 at 1 an hour
+        for food in foods[:4]:
+            Match.objects.create(user=self.user, food_profile=food)
+        for food in foods[4:6]:
+            Match.objects.create(user=other, food_profile=food)
+
+        italian = self.bucket('Italian')
+        self.assertEqual((italian['active_users'], italian['depth']), (2, 6))
+        self.assertEqual(italian['consumption_rate'], 3)
+        # 6 unseen at 2 an hour, not 6 over both users' 3 an hour
+        self.assertEqual(italian['hours_to_exhaustion'], 3)
+        self.assertIsNone(self.bucket('Thai')['hours_to_exhaustion'])
+
+    def test_cuisine_spellings_share_a_bucket(self):
+        make_user('lower@example.com', favorite_cuisines='italian, ITALIAN')
+        make_food('Lasagne', cuisine='italian')
+
+        italian = [b for b in pool_stats() if b['diet'] == 'vegan' and b['cuisine'].lower() == 'italian']
+        self.assertEqual(len(italian), 1)
+        self.assertEqual((italian[0]['active_users'], italian[0]['total']), (2, 5))
+
+    def test_refill_queues_only_low_buckets_once(self):
+        jobs = refill_pool()
+
+        self.assertEqual([(job.diet_compatibility, job.cuisine_type) for job in jobs], [('vegan', 'Thai')])
+        self.assertIsNone(jobs[0].user)
+        self.assertEqual(refill_pool(), [])
+
+    def test_refill_job_generates_into_its_bucket(self):
+        refill_pool()
+        process_jobs(client=StubClient())
+
+        self.assertEqual(FoodProfile.objects.filter(diet_compatibility='vegan', cuisine_type='Thai').count(), 5)
+
+
+class CandidateSelectionTests(TestCase):
+    def setUp(self):
+        self.user = make_user(allergies='peanut', favorite_cuisines='Thai')
+        self.profile = self.user.userprofile
+
+    def test_favourite_cuisines_match_whatever_their_case(self):
+        make_food('Pasta', cuisine='Italian')
+        make_food('Curry', cuisine='Thai', ingredients='tofu, coconut')
+        profile = make_user('lower@example.com', favorite_cuisines=' thai ').userprofile
+
+        self.assertEqual([card['name'] for card in next_deck(profile, 5)], ['Curry', 'Pasta'])
+
+    def test_skips_seen_foods_and_other_diets(self):
+        seen = make_food('Seen')
+        fresh = make_food('Fresh')
+        make_food('Steak', diet='omnivore')
+        Match.objects.create(user=self.user, food_profile=seen)
+
+        self.assertEqual(list(candidate_foods(self.profile)), [fresh])
+
+    def test_excludes_allergens_and_prefers_favourite_cuisines(self):
+        make_food('Satay', cuisine='Thai', ingredients='tofu, Peanut sauce')
+        make_food('Pasta', cuisine='Italian')
+        make_food('Curry', cuisine='Thai', ingredients='tofu, coconut')
+
+        self.assertEqual([card['name'] for card in next_deck(self.profile, 5)], ['Curry', 'Pasta'])
+
+    def test_discover_query_count_does_not_grow_with_history(self):
+        self.client.force_login(self.user)
+        for i in range(20):
+            make_food(f'Food {i}')
+
+        # The first visit caches the user's swipe history and weekly variety
+        self.client.get(reverse('dating:discover'))
+        with self.assertNumQueries(4):
+            self.client.get(reverse('dating:discover'))
+
+        for food in FoodProfile.objects.all()[:15]:
+            Match.objects.create(user=self.user, food_profile=food)
+
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('dating:discover'))
+        self.assertEqual(response.context['deck'][0]['name'], 'Food 15')
+
+
+class SwipeDeckTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client.force_login(self.user)
+        self.foods = [make_food(f'Food {i}') for i in range(5)]
+
+    def test_discover_embeds_first_batch(self):
+        with self.settings(DECK_SIZE=3):
+            response = self.client.get(reverse('dating:discover'))
+
+        self.assertEqual([card['name'] for card in response.context['deck']], ['Food 0', 'Food 1', 'Food 2'])
+        self.assertContains(response, 'id="initial-deck"')
+
+    def test_deck_api_skips_held_cards(self):
+        held = f'{self.foods[0].id},{self.foods[1].id}'
+
+        self.client.get(reverse('dating:deck'))
+        # session, user, profile, deck; the ranking inputs are cached
+        with self.assertNumQueries(4):
+            data = self.client.get(reverse('dating:deck'), {'limit': 2, 'exclude': held}).json()
+
+        self.assertEqual([card['id'] for card in data['foods']], [self.foods[2].id, self.foods[3].id])
+        self.assertEqual(data['foods'][0]['ingredients'], ['tomato', 'basil'])
+        self.assertFalse(data['generating'])
+
+    def test_deck_api_always_asks_for_at_least_one_card(self):
+        for limit in (0, -1):
+            data = self.client.get(reverse('dating:deck'), {'limit': limit}).json()
+
+            self.assertEqual([card['name'] for card in data['foods']], ['Food 0'])
+            self.assertFalse(data['generating'])
+        self.assertFalse(GenerationJob.objects.exists())
+
+    def test_empty_deck_queues_generation(self):
+        for food in self.foods:
+            Match.objects.create(user=self.user, food_profile=food)
+
+        data = self.client.get(reverse('dating:deck')).json()
+
+        self.assertEqual(data['foods'], [])
+        self.assertTrue(data['generating'])
+        self.assertTrue(GenerationJob.objects.filter(user=self.user).exists())
+
+
+class SwipeBatchTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client.force_login(self.user)
+        self.foods = [make_food(f'Food {i}') for i in range(3)]
+
+    def post_batch(self, swipes):
+        return self.client.post(
+            reverse('dating:swipe_batch'), json.dumps({'swipes': swipes}), content_type='application/json'
+        )
+
+    @mock.patch('dating.views.random.random', return_value=0.0)
+    def test_batch_writes_all_swipes_and_reports_each(self, _):
+        pasta, soup, salad = self.foods
+        response = self.post_batch([
+            {'food_id': pasta.id, 'action': 'like', 'timestamp': 1700000000000},
+            {'food_id': soup.id, 'action': 'pass', 'timestamp': 1700000001000},
+            {'food_id': 999999, 'action': 'like'},
+            {'food_id': salad.id, 'action': 'nibble'},
+        ])
+
+        statuses = [result['status'] for result in response.json()['results']]
+        self.assertEqual(statuses, ['mutual_match', 'success', 'not_found', 'invalid'])
+        self.assertTrue(Match.objects.get(user=self.user, food_profile=pasta).is_mutual_match())
+        self.assertFalse(Match.objects.get(user=self.user, food_profile=soup).user_liked)
+        self.assertEqual(Match.objects.filter(user=self.user).count(), 2)
+
+    @mock.patch('dating.views.random.random', return_value=0.99)
+    def test_latest_swipe_wins_and_updates_existing_match(self, _):
+        pasta = self.foods[0]
+        Match.objects.create(user=self.user, food_profile=pasta, user_liked=False)
+
+        self.post_batch([
+            {'food_id': pasta.id, 'action': 'pass', 'timestamp': '2025-01-01T10:00:05Z'},
+            {'food_id': pasta.id, 'action': 'like', 'timestamp': '2025-01-01T10:00:01Z'},
+        ])
+        self.assertFalse(Match.objects.get(user=self.user, food_profile=pasta).user_liked)
+
+        self.post_batch([{'food_id': pasta.id, 'action': 'like'}])
+        self.assertTrue(Match.objects.get(user=self.user, food_profile=pasta).user_liked)
+        self.assertEqual(Match.objects.filter(user=self.user).count(), 1)
+
+    def test_rejects_oversized_batch(self):
+        with self.settings(SWIPE_BATCH_MAX=2):
+            response = self.post_batch([{'food_id': food.id, 'action': 'pass'} for food in self.foods])
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_body_that_is_not_utf8_json(self):
+        url = reverse('dating:swipe_batch')
+        for body in [b'{"swipes": ["\xff"]}', b'[1, 2]', b'not json']:
+            response = self.client.post(url, body, content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+        self.assertFalse(Match.objects.exists())
+
+
+class MatchesCacheTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client.force_login(self.user)
+        self.foods = [make_food(f'Food {i}') for i in range(3)]
+        Match.objects.create(user=self.user, food_profile=self.foods[0], user_liked=True, food_liked=True)
+
+    def visit(self, **headers):
+        return self.client.get(reverse('dating:matches'), **headers)
+
+    def swipe(self, food, action):
+        self.client.post(
+            reverse('dating:swipe_batch'), json.dumps({'swipes': [{'food_id': food.id, 'action': action}]}),
+            content_type='application/json'
+        )
+
+    def test_grid_is_served_from_cache_until_a_mutual_match_changes(self):
+        self.visit()
+        with self.assertNumQueries(2):  # session and user only
+            self.assertContains(self.visit(), 'Food 0')
+
+        Match.objects.create(user=self.user, food_profile=self.foods[1], user_liked=True, food_liked=False)
+        self.assertNotContains(self.visit(), 'Food 1')
+
+        match = Match.objects.get(food_profile=self.foods[1])
+        match.food_liked = True
+        match.save()
+        self.assertContains(self.visit(), 'Food 1')
+
+    def test_swipes_only_bump_the_version_when_mutual_matches_change(self):
+        version = matches_version(self.user.pk)
+        self.swipe(self.foods[2], 'pass')
+        self.assertEqual(matches_version(self.user.pk), version)
+
+        # Passing on a food that had liked the user back takes it off the grid
+        self.swipe(self.foods[0], 'pass')
+        self.assertNotEqual(matches_version(self.user.pk), version)
+        self.assertNotContains(self.visit(), 'Food 0')
+
+    def test_revalidation_returns_304_until_the_matches_change(self):
+        response = self.visit()
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+
+        self.assertEqual(self.visit(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        # Last-Modified only has whole seconds, so a change within the same second would revalidate a stale page
+        self.assertFalse(response.has_header('Last-Modified'))
+
+        self.foods[0].delete()
+        self.assertEqual(self.visit(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_pages_carrying_flash_messages_are_not_revalidated(self):
+        etag = self.visit()['ETag']
+        with mock.patch('dating.match_cache.messages.get_messages', return_value=['Saved!']):
+            response = self.visit(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client.force_login(self.user)
+        now = timezone.now()
+        for i in range(5):
+            match = Match.objects.create(
+                user=self.user, food_profile=make_food(f'Food {i}'), user_liked=True, food_liked=True
+            )
+            # Two matches share a timestamp, so the id has to break the tie
+            Match.objects.filter(pk=match.pk).update(created_at=now - timedelta(minutes=min(i, 3)))
+
+    def api(self, **params):
+        return self.client.get(reverse('dating:matches_api'), params).json()
+
+    def test_api_pages_cover_every_match_once_newest_first(self):
+        names, params = [], {'limit': 2}
+        while True:
+            page = self.api(**params)
+            names += [match['name'] for match in page['matches']]
+            if not page['next']:
+                break
+            params['after'] = page['next']
+        self.assertEqual(names, ['Food 0', 'Food 1', 'Food 2', 'Food 4', 'Food 3'])
+
+    def test_new_matches_do_not_shift_later_pages(self):
+        first = self.api(limit=2)
+        Match.objects.create(user=self.user, food_profile=make_food('Food 5'), user_liked=True, food_liked=True)
+        second = self.api(limit=2, after=first['next'])
+        self.assertEqual([match['name'] for match in second['matches']], ['Food 2', 'Food 4'])
+
+    @override_settings(MATCHES_PAGE_SIZE=3)
+    def test_matches_page_links_to_older_matches(self):
+        response = self.client.get(reverse('dating:matches'))
+        self.assertContains(response, 'Food 2')
+        self.assertNotContains(response, 'Food 4')
+        cursor = response.context['page'].next_cursor
+
+        response = self.client.get(reverse('dating:matches'), {'after': cursor})
+        self.assertContains(response, 'Food 4')
+        self.assertNotContains(response, 'Food 0')
+        self.assertIsNone(response.context['page'].next_cursor)
+
+    def test_bad_cursors_and_limits_are_rejected(self):
+        self.assertEqual(self.client.get(reverse('dating:matches'), {'after': 'nonsense'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('dating:matches_api'), {'after': 'WyJ4Il0'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('dating:matches_api'), {'limit': 'all'}).status_code, 400)
+
+    @override_settings(MEAL_PLAN_PAGE_SIZE=2)
+    def test_meal_plan_shows_one_week_in_pages(self):
+        monday = week_start(timezone.now().date())
+        for days, name in [(0, 'Oats'), (2, 'Salad'), (6, 'Stew'), (7, 'Porridge')]:
+            WeeklyFoodLog.objects.create(
+                user=self.user, food_profile=make_food(name), date_consumed=monday + timedelta(days=days),
+                meal_type='lunch'
+            )
+
+        response = self.client.get(reverse('dating:meal_plan'))
+        self.assertContains(response, 'Oats')
+        self.assertContains(response, 'Salad')
+        self.assertNotContains(response, 'Stew')
+        response = self.client.get(reverse('dating:meal_plan'), {
+            'week': monday.isoformat(), 'after': response.context['page'].next_cursor
+        })
+        self.assertContains(response, 'Stew')
+        self.assertNotContains(response, 'Porridge')
+
+        response = self.client.get(reverse('dating:meal_plan'), {'week': (monday + timedelta(days=9)).isoformat()})
+        self.assertContains(response, 'Porridge')
+        self.assertEqual(self.client.get(reverse('dating:meal_plan'), {'week': 'soon'}).status_code, 400)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class WeeklyVarietyCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.today = timezone.now().date()
+        self.pasta = make_food('Pasta', cuisine='Italian', meal_type='dinner')
+        self.tacos = make_food('Tacos', cuisine='Mexican', meal_type='lunch')
+        self.curry = make_food('Curry', cuisine='Indian', meal_type='dinner')
+
+    def log(self, food, days_ago=0):
+        return WeeklyFoodLog.objects.create(
+            user=self.user, food_profile=food,
+            date_consumed=self.today - timedelta(days=days_ago), meal_type=food.meal_type
+        )
+
+    def test_like_uses_no_queries_once_cached(self):
+        self.log(self.pasta)
+        food_preference_chance(self.user, self.tacos)
+
+        with self.assertNumQueries(0):
+            food_preference_chance(self.user, self.tacos)
+
+    def test_cached_chance_matches_recomputed_after_log_writes(self):
+        self.log(self.pasta)
+        self.log(self.tacos, days_ago=10)
+        self.assertAlmostEqual(food_preference_chance(self.user, self.curry), 0.7)
+
+        # Both writes must invalidate, otherwise the stale summary would be served
+        self.log(self.tacos, days_ago=2)
+        self.assertEqual(cache.get(variety_cache_key(self.user.pk)), None)
+        cached = food_preference_chance(self.user, self.tacos)
+        self.assertEqual(cache.get(variety_cache_key(self.user.pk)), compute_weekly_variety(self.user.pk))
+        self.assertAlmostEqual(cached, 0.7)
+        self.assertAlmostEqual(food_preference_chance(self.user, self.curry), 0.9)
+
+        WeeklyFoodLog.objects.get(food_profile=self.pasta).delete()
+        self.assertAlmostEqual(food_preference_chance(self.user, self.curry), 0.7)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class MealPlanSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user(daily_calorie_goal=1800)
+        self.client.force_login(self.user)
+        self.monday = week_start(timezone.now().date())
+        self.log(make_food('Oats', calories=350), 0, 'breakfast')
+        self.log(make_food('Eggs', calories=250), 0, 'breakfast')
+        self.log(make_food('Pasta', calories=900), 0, 'dinner')
+        self.log(make_food('Salad', calories=400), 3, 'lunch')
+        self.log(make_food('Roast', calories=700), 7, 'dinner')
+
+    def log(self, food, days, meal_type):
+        return WeeklyFoodLog.objects.create(
+            user=self.user, food_profile=food, date_consumed=self.monday + timedelta(days=days), meal_type=meal_type
+        )
+
+    def test_totals_come_from_one_grouped_query(self):
+        with self.assertNumQueries(1):
+            plan = compute_meal_plan(self.user.pk, self.monday, 1800)
+
+        monday, thursday = plan['days'][0], plan['days'][3]
+        self.assertEqual(len(plan['days']), 7)
+        self.assertEqual((monday['calories'], monday['remaining'], monday['percent']), (1500, 300, 83))
+        breakfast = next(meal for meal in monday['meals'] if meal['meal_type'] == 'breakfast')
+        self.assertEqual((breakfast['calories'], breakfast['count']), (600, 2))
+        self.assertEqual(thursday['calories'], 400)
+        self.assertEqual(plan['total'], 1900)
+        self.assertEqual(plan['meal_totals']['dinner'], 900)
+        self.assertEqual(plan['remaining'], 1800 * 7 - 1900)
+
+    def test_plan_page_queries_only_the_log_page_once_cached(self):
+        self.client.get(reverse('dating:meal_plan'))
+        with self.assertNumQueries(3):  # session, user and the listed logs
+            response = self.client.get(reverse('dating:meal_plan'))
+        self.assertContains(response, '1900 / 12600 cal this week')
+
+    def test_log_and_goal_changes_invalidate_the_plan(self):
+        self.assertEqual(weekly_meal_plan(self.user.pk, self.monday)['total'], 1900)
+
+        snack = self.log(make_food('Apple', calories=100), 1, 'snack')
+        self.assertEqual(weekly_meal_plan(self.user.pk, self.monday)['total'], 2000)
+        snack.delete()
+        self.assertEqual(weekly_meal_plan(self.user.pk, self.monday)['total'], 1900)
+
+        profile = UserProfile.objects.get(user=self.user)
+        profile.daily_calorie_goal = 2200
+        profile.save()
+        self.assertEqual(weekly_meal_plan(self.user.pk, self.monday)['goal'], 2200)
+        with self.assertNumQueries(0):
+            weekly_meal_plan(self.user.pk, self.monday)
+
+    def test_weeks_are_cached_and_invalidated_separately(self):
+        next_monday = self.monday + timedelta(days=7)
+        weekly_meal_plan(self.user.pk, self.monday)
+        weekly_meal_plan(self.user.pk, next_monday)
+
+        log = self.log(make_food('Toast', calories=200), 8, 'breakfast')
+        self.assertIsNotNone(cache.get(meal_plan_cache_key(self.user.pk, self.monday)))
+        self.assertEqual(weekly_meal_plan(self.user.pk, next_monday)['total'], 900)
+
+        # Moving a log between weeks refreshes both
+        log = WeeklyFoodLog.objects.get(pk=log.pk)
+        log.date_consumed = self.monday + timedelta(days=1)
+        log.save()
+        self.assertEqual(weekly_meal_plan(self.user.pk, self.monday)['total'], 2100)
+        self.assertEqual(weekly_meal_plan(self.user.pk, next_monday)['total'], 700)
+
+    def test_api_reports_days_and_meals(self):
+        data = self.client.get(reverse('dating:meal_plan_api'), {'week': self.monday.isoformat()}).json()
+        self.assertEqual(data['daily_goal'], 1800)
+        self.assertEqual(data['days'][0]['meals']['breakfast'], 600)
+        self.assertEqual(data['days'][3]['date'], (self.monday + timedelta(days=3)).isoformat())
+
+        data = self.client.get(reverse('dating:meal_plan_api'), {'week': (self.monday + timedelta(days=7)).isoformat()}).json()
+        self.assertEqual(data['total'], 700)
+        self.assertEqual(self.client.get(reverse('dating:meal_plan_api'), {'week': 'x'}).status_code, 400)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class RankingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user(daily_calorie_goal=2000)
+        self.profile = self.user.userprofile
+
+    def swipe(self, food, liked, user=None):
+        Match.objects.create(user=user or self.user, food_profile=food, user_liked=liked)
+
+    def deck_names(self):
+        return [card['name'] for card in next_deck(self.profile, 10)]
+
+    def test_array_scores_match_the_per_row_loop(self):
+        rng = random.Random(7)
+        taste = Taste(
+            {('Thai', 'dinner'): (3, 4), ('Italian', 'lunch'): (0, 5), ('Mexican', 'brunch'): (1, 1)},
+            {'Thai': 2}, ['French'], 1800
+        )
+        rows = [
+            (
+                rng.choice(['Thai', 'Italian', 'French', 'Greek']), rng.choice(['breakfast', 'lunch', 'dinner', 'brunch']),
+                rng.randint(100, 1200), rng.randint(0, 5), rng.randint(5, 10)
+            )
+            for _ in range(200)
+        ]
+        batch = CandidateBatch.from_rows(rows, taste)
+
+        self.assertEqual(feature_matrix(batch, taste).shape, (200, len(FEATURES)))
+        for fast, slow in zip(score(batch, taste), naive_scores(rows, taste)):
+            self.assertAlmostEqual(fast, slow)
+        self.assertEqual(len(CandidateBatch.from_rows([], taste)), 0)
+
+    def test_deck_prefers_liked_cuisines_and_meals(self):
+        for i in range(3):
+            self.swipe(make_food(f'Old curry {i}', cuisine='Thai'), True)
+            self.swipe(make_food(f'Old pasta {i}', cuisine='Italian', meal_type='breakfast'), False)
+        make_food('Pasta', cuisine='Italian', meal_type='breakfast')
+        make_food('Curry', cuisine='Thai')
+
+        self.assertEqual(self.deck_names(), ['Curry', 'Pasta'])
+
+    def test_deck_prefers_fitting_calories_and_popular_foods(self):
+        make_food('Feast', calories=1500)
+        make_food('Plate', calories=500)
+        self.assertEqual(self.deck_names(), ['Plate', 'Feast'])
+
+        other = make_user('other@example.com')
+        unloved, loved = make_food('Unloved'), make_food('Loved')
+        self.swipe(unloved, False, other)
+        self.swipe(loved, True, other)
+        self.assertEqual(self.deck_names(), ['Loved', 'Plate', 'Unloved', 'Feast'])
+
+    def test_recently_eaten_cuisines_rank_lower(self):
+        tacos = make_food('Tacos', cuisine='Mexican')
+        make_food('Burrito', cuisine='Mexican')
+        make_food('Ramen', cuisine='Japanese')
+        self.assertEqual(self.deck_names()[0], 'Tacos')
+
+        Match.objects.create(user=self.user, food_profile=tacos, user_liked=True, food_liked=True)
+        WeeklyFoodLog.objects.create(user=self.user, food_profile=tacos, meal_type='dinner')
+        self.assertEqual(self.deck_names(), ['Ramen', 'Burrito'])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class VarietyScoringTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        today = timezone.now().date()
+        self.foods = [
+            make_food('Pasta', cuisine='Italian', meal_type='dinner'),
+            make_food('Pizza', cuisine='Italian', meal_type='lunch'),
+            make_food('Tacos', cuisine='Mexican', meal_type='lunch'),
+            make_food('Curry', cuisine='Indian', meal_type='dinner'),
+        ]
+        for days_ago, food in enumerate(self.foods[:3]):
+            WeeklyFoodLog.objects.create(
+                user=self.user, food_profile=food,
+                date_consumed=today - timedelta(days=days_ago), meal_type=food.meal_type
+            )
+
+    def test_swipe_and_batch_likes_share_one_score(self):
+        chances = score_foods(self.user.pk, self.foods)
+
+        for food in self.foods:
+            self.assertAlmostEqual(chances[food.pk], food_preference_chance(self.user, food))
+        self.assertAlmostEqual(chances[self.foods[0].pk], 0.7)
+        self.assertAlmostEqual(chances[self.foods[3].pk], 0.9)
+
+    def test_scores_cost_no_queries_once_cached(self):
+        score_foods(self.user.pk, self.foods)
+
+        with self.assertNumQueries(0):
+            score_foods(self.user.pk, self.foods)
+
+    def test_user_without_logs_scores_base_plus_new_cuisine(self):
+        other = make_user('other@example.com')
+        self.assertAlmostEqual(score_foods(other.pk, self.foods[:1])[self.foods[0].pk], 0.5)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Plans are checked against SQLite EXPLAIN QUERY PLAN output')
+class QueryPlanTests(TestCase):
+    """Every hot query in the views must be answered from an index"""
+
+    def setUp(self):
+        self.user = make_user(favorite_cuisines='Thai', allergies='peanut')
+        self.food = make_food()
+
+    def assertIndexed(self, queryset, ordered=False):
+        """No table scans; with ``ordered``, rows also come out in index order instead of being sorted"""
+        plan = queryset.explain()
+        for line in plan.splitlines():
+            if ' SCAN ' in f' {line} ':
+                self.assertIn('INDEX', line, f'Table scan in plan:\n{plan}')
+            if ordered:
+                self.assertNotIn('TEMP B-TREE', line, f'Sort in plan:\n{plan}')
+        self.assertIn('INDEX', plan)
+
+    def test_discover_candidates(self):
+        # Walking the diet in id order lets LIMIT stop early, however many foods
+        # the diet has; favourite cuisines must not add a sort
+        self.assertIndexed(candidate_foods(self.user.userprofile)[:10], ordered=True)
+        self.assertIndexed(candidate_foods(make_user('plain@example.com').userprofile)[:10], ordered=True)
+        self.assertIndexed(with_like_counts(candidate_foods(self.user.userprofile))[:10], ordered=True)
+        self.assertIndexed(swipe_history(self.user.pk))
+
+    def test_swipe_match_lookup(self):
+        self.assertIndexed(Match.objects.filter(user=self.user, food_profile=self.food))
+
+    def test_matches_list(self):
+        self.assertIndexed(mutual_matches_page(self.user, '', 24).queryset)
+        cursor = encode_cursor([timezone.now(), self.food.pk])
+        self.assertIndexed(mutual_matches_page(self.user, cursor, 24).queryset)
+
+    def test_weekly_log_lookups(self):
+        self.assertIndexed(WeeklyFoodLog.objects.filter(
+            user=self.user, date_consumed__gte=variety_window_start()
+        ).values_list('food_profile__cuisine_type', 'food_profile__meal_type'))
+        self.assertIndexed(WeeklyFoodLog.objects.filter(
+            user=self.user, food_profile=self.food, date_consumed=timezone.now().date()
+        ))
+        week = WeeklyFoodLog.objects.filter(
+            user=self.user, date_consumed__range=(timezone.now().date(), timezone.now().date() + timedelta(days=6))
+        ).values('id', 'food_profile__name')
+        cursor = encode_cursor([timezone.now().date(), 1])
+        self.assertIndexed(KeysetPage(week, ['date_consumed', 'id'], cursor).queryset)
+
+    def test_generation_queue(self):
+        self.assertIndexed(GenerationJob.objects.filter(status=GenerationJob.STATUS_PENDING).order_by('created_at'))
+        self.assertIndexed(GenerationJob.objects.filter(user=self.user).order_by('-created_at'))
+
+
+class NormalizedTagTests(TestCase):
+    def test_csv_fields_are_mirrored_into_tables(self):
+        user = make_user(allergies=' Nuts,dairy , nuts', favorite_cuisines='Thai')
+        food = make_food('Pad Thai', ingredients='Rice noodles, tofu, crushed  NUTS')
+
+        self.assertEqual(sorted(user.userprofile.allergens.values_list('name', flat=True)), ['dairy', 'nut'])
+        self.assertEqual(
+            sorted(food.ingredient_set.values_list('name', flat=True)), ['crushed nuts', 'rice noodles', 'tofu']
+        )
+        self.assertEqual(food.get_ingredients_list(), ['Rice noodles', 'tofu', 'crushed  NUTS'])
+
+    def test_new_allergen_links_existing_ingredients(self):
+        food = make_food('Cheese plate', ingredients='brie, goat cheese')
+        profile = make_user(allergies='cheese').userprofile
+
+        self.assertEqual(
+            sorted(Allergen.objects.get(name='cheese').ingredients.values_list('name', flat=True)), ['goat cheese']
+        )
+        self.assertEqual(list(candidate_foods(profile)), [])
+
+        profile.allergies = 'shellfish'
+        profile.save()
+        self.assertEqual(list(candidate_foods(profile)), [food])
+
+    def test_allergies_exclude_ingredients_by_category(self):
+        satay = make_food('Satay', ingredients='tofu, peanut butter')
+        pizza = make_food('Pizza', ingredients='dough, Mozzarella cheese')
+        latte = make_food('Latte', ingredients='espresso, steamed milk')
+        curry = make_food('Curry', ingredients='coconut milk, nutmeg, chickpeas')
+
+        self.assertEqual(list(candidate_foods(make_user(allergies='nuts').userprofile)), [pizza, latte, curry])
+        self.assertEqual(list(candidate_foods(make_user('b@example.com', allergies='Dairy').userprofile)), [satay, curry])
+        self.assertEqual(list(candidate_foods(make_user('c@example.com', allergies='milk, Tree nuts').userprofile)), [curry])
+        self.assertEqual(Allergen.objects.get(name='dairy').profiles.count(), 2)
+
+    def test_unchanged_profile_save_skips_sync(self):
+        profile = UserProfile.objects.get(pk=make_user(allergies='nuts').userprofile.pk)
+        profile.daily_calorie_goal = 1800
+
+        with self.assertNumQueries(1):
+            profile.save()
+
+
+class AuthQueryBudgetTests(TestCase):
+    """Query budgets for the account flows; a regression here costs every login"""
+
+    def test_register(self):
+        # Three uniqueness checks, user and profile inserts, session create,
+        # last_login update and session save; the profile is never re-saved
+        with self.assertNumQueries(13):
+            response = self.client.post(reverse('dating:register'), {
+                'username': 'newbie', 'email': 'newbie@example.com', 'first_name': 'New', 'last_name': 'Bie',
+                'password1': 'pw-12345!xyz', 'password2': 'pw-12345!xyz',
+            })
+
+        self.assertRedirects(response, reverse('dating:setup_profile'), fetch_redirect_response=False)
+        self.assertEqual(UserProfile.objects.filter(user__username='newbie').count(), 1)
+
+    def test_login(self):
+        make_user()
+
+        # One user lookup for authentication, session create, last_login
+        # update, the profile read for the redirect and session save
+        with self.assertNumQueries(10):
+            response = self.client.post(
+                reverse('dating:login'), {'username': 'eater@example.com', 'password': 'pw-12345!'}
+            )
+
+        self.assertRedirects(response, reverse('dating:discover'), fetch_redirect_response=False)
+
+    def test_logout(self):
+        self.client.force_login(make_user())
+
+        # Session and user reads, then the session flush
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('dating:logout'))
+
+        self.assertRedirects(response, reverse('dating:login'), fetch_redirect_response=False)
+
+    def test_user_save_leaves_clean_profile_alone(self):
+        user = CustomUser.objects.select_related('userprofile').get(pk=make_user().pk)
+        user.last_login = timezone.now()
+
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+
+    def test_user_save_persists_dirty_profile_fields(self):
+        user = CustomUser.objects.get(pk=make_user().pk)
+        user.userprofile.daily_calorie_goal = 1500
+
+        with self.assertNumQueries(2):
+            user.save()
+
+        self.assertEqual(UserProfile.objects.get(user=user).daily_calorie_goal, 1500)
+        self.assertEqual(user.userprofile.dirty_fields(), [])
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings_override = override_settings(METRICS_DIR=self.directory, METRICS_TOKEN='scrape-me')
+        self.settings_override.enable()
+        metric_store._start()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+        metric_store._start()
+
+    def scrape(self):
+        response = self.client.get(reverse('dating:metrics'), HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_requests_are_recorded_per_url_name(self):
+        self.client.force_login(make_user())
+        make_food('Pizza')
+        self.client.get(reverse('dating:deck'))
+        self.client.get(reverse('dating:deck'))
+
+        text = self.scrape()
+        self.assertIn('# TYPE foodmatch_request_duration_seconds histogram', text)
+        self.assertIn('foodmatch_request_duration_seconds_count{view="dating:deck"} 2', text)
+        self.assertIn('foodmatch_request_duration_seconds_bucket{view="dating:deck",le="+Inf"} 2', text)
+        # Four queries per deck request (see SwipeDeckTests)
+        self.assertIn('foodmatch_request_queries_total{view="dating:deck"} 8', text)
+
+    def test_processes_are_summed_through_the_shared_directory(self):
+        other_worker = MetricStore()
+        other_worker.observe_request('dating:matches', 0.2, 3, 0.01)
+        other_worker.flush()
+        metric_store.observe_request('dating:matches', 0.02, 2, 0.01)
+
+        text = self.scrape()
+        self.assertIn('foodmatch_request_duration_seconds_count{view="dating:matches"} 2', text)
+        self.assertIn('foodmatch_request_duration_seconds_bucket{view="dating:matches",le="0.1"} 1', text)
+        self.assertIn('foodmatch_request_queries_total{view="dating:matches"} 5', text)
+
+    def test_dead_workers_are_folded_into_the_archive(self):
+        generator = MetricStore(role='generator')
+        generator.observe_duplicates(4)
+        generator.flush()
+        for pid in (101, 102):
+            worker = MetricStore()
+            worker.observe_request('dating:matches', 0.2, 3, 0.01)
+            worker.path_name = f'web-{pid}-abcd.json'
+            worker.flush()
+
+        self.assertEqual(archive_files('web', 101), ['web-101-abcd.json'])
+        archive_files('web', 102)
+
+        names = sorted(os.listdir(self.directory))
+        self.assertEqual([name for name in names if name.startswith('web-')], ['web-archive.json'])
+        self.assertIn(generator.path_name, names)
+        text = self.scrape()
+        self.assertIn('foodmatch_request_duration_seconds_count{view="dating:matches"} 2', text)
+        self.assertIn('foodmatch_generated_duplicates_total 4', text)
+
+    def test_archived_files_still_on_disk_are_not_counted_twice(self):
+        worker = MetricStore()
+        worker.observe_request('dating:matches', 0.2, 3, 0.01)
+        worker.path_name = 'web-101-abcd.json'
+        worker.flush()
+        archive_files('web', 101)
+        # A scrape that listed the directory before the worker file was removed
+        worker.flush()
+
+        self.assertIn('foodmatch_request_duration_seconds_count{view="dating:matches"} 1', self.scrape())
+
+    def test_llm_calls_are_recorded(self):
+        generate_food_profiles(make_user().userprofile, count=2, client=StubClient())
+
+        text = self.scrape()
+        self.assertIn('foodmatch_llm_calls_total{kind="recipe",outcome="ok"} 2', text)
+        self.assertIn('foodmatch_llm_calls_total{kind="image",outcome="ok"} 2', text)
+
+    def test_endpoint_requires_token_or_staff(self):
+        url = reverse('dating:metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+
+        staff = make_user('boss@example.com')
+        staff.is_staff = True
+        staff.save()
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class SlowRequestProfilerTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            PROFILE_DIR=self.directory, PROFILE_SAMPLE_RATE=1.0, PROFILE_SLOW_MS=0, PROFILE_KEEP=3
+        )
+        self.settings_override.enable()
+        # The per-minute budget is process-wide; earlier tests may have spent it
+        patcher = mock.patch('dating.profiling._recent_captures', deque())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = make_user()
+        self.client.force_login(self.user)
+        make_food('Pizza')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+    def test_slow_request_is_captured_with_sql_and_user(self):
+        self.client.get(reverse('dating:deck'))
+
+        [capture] = load_captures()
+        self.assertEqual(capture['view'], 'dating:deck')
+        self.assertEqual(capture['user_id'], self.user.pk)
+        self.assertEqual(len(capture['queries']), 4)
+        self.assertTrue(os.path.exists(capture['profile_path']))
+
+    def test_fast_and_unlisted_requests_are_not_captured(self):
+        with self.settings(PROFILE_SLOW_MS=60_000):
+            self.client.get(reverse('dating:deck'))
+        self.client.get(reverse('dating:matches'))
+
+        self.assertEqual(load_captures(), [])
+
+    def test_only_saved_captures_spend_the_budget(self):
+        with self.settings(PROFILE_MAX_PER_MINUTE=1):
+            self.client.get(reverse('dating:matches'))
+            with self.settings(PROFILE_SLOW_MS=60_000):
+                self.client.get(reverse('dating:deck'))
+            self.client.get(reverse('dating:deck'))
+
+        self.assertEqual([capture['view'] for capture in load_captures()], ['dating:deck'])
+
+    def test_sampling_is_rate_limited_and_directory_rotates(self):
+        with self.settings(PROFILE_MAX_PER_MINUTE=2), mock.patch('dating.profiling._recent_captures', deque()):
+            for _ in range(4):
+                self.client.get(reverse('dating:deck'))
+        self.assertEqual(len(load_captures()), 2)
+
+        with mock.patch('dating.profiling._recent_captures', deque()):
+            for _ in range(4):
+                self.client.get(reverse('dating:deck'))
+        self.assertEqual(len(load_captures()), 3)
+        self.assertEqual(len(os.listdir(self.directory)), 6)
+
+    def test_command_lists_captures_and_top_functions(self):
+        self.client.get(reverse('dating:deck'))
+        out = io.StringIO()
+
+        call_command('slow_requests', '--sql', stdout=out)
+
+        self.assertIn('dating:deck', out.getvalue())
+        self.assertIn('SELECT', out.getvalue())
+        self.assertIn('Top functions', out.getvalue())
+
+
+class BenchmarkSuiteTests(TestCase):
+    def test_seed_builds_linked_histories_without_llm(self):
+        with mock.patch('dating.generation.GenerationEngine') as engine:
+            call_command('seed_benchmark', users=5, foods=40, matches=8, logs=3, stdout=io.StringIO())
+
+        engine.assert_not_called()
+        self.assertEqual(UserProfile.objects.filter(user__username__startswith='bench-user-').count(), 5)
+        self.assertEqual(FoodProfile.objects.filter(ingredient_set__isnull=True).count(), 0)
+        self.assertTrue(Match.objects.exists())
+        self.assertEqual(
+            WeeklyFoodLog.objects.exclude(food_profile__match__food_liked=True).count(), 0
+        )
+
+    def test_funnel_runs_end_to_end_and_compares_with_baseline(self):
+        for i in range(12):
+            make_food(f'Dish {i}', diet='omnivore')
+
+        cache.clear()
+        samples = Funnel(TestClientDriver(), 'funnel-test', swipes=5).run()
+        result = summarize(samples, seconds=1.0)
+
+        self.assertEqual(result['views']['dating:swipe_food']['requests'], 5)
+        self.assertEqual(sum(row['errors'] for row in result['views'].values()), 0)
+        self.assertEqual(result['views']['dating:deck']['queries'], 4)
+        self.assertFalse(any(regressed for *_, regressed in compare(result, result, tolerance=0.1)))
+
+        slower = json.loads(json.dumps(result))
+        slower['views']['dating:deck']['queries'] += 2
+        self.assertIn(('dating:deck', 'queries', 4, 6, True), compare(slower, result, tolerance=0.1))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'The pragmas only apply to SQLite connections')
+class SqlitePragmaTests(TestCase):
+    """Pragmas are checked on a fresh file-backed connection; in-memory ones cannot use WAL"""
+
+    def setUp(self):
+        scratch = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, scratch)
+        self.settings_dict = copy.deepcopy(connections.settings['default'])
+        self.settings_dict['NAME'] = os.path.join(scratch, 'pragmas.sqlite3')
+
+    def pragmas(self, *names):
+        new_connection = type(connections['default'])(self.settings_dict, alias='pragmas')
+        self.addCleanup(new_connection.close)
+        with new_connection.cursor() as cursor:
+            return {name: cursor.execute(f'PRAGMA {name}').fetchone()[0] for name in names}
+
+    def test_new_connections_are_tuned(self):
+        # Not the connection's own timeout option, so the pragma must be what set it
+        with self.settings(SQLITE_PRAGMAS={**settings.SQLITE_PRAGMAS, 'busy_timeout': 7000}):
+            pragmas = self.pragmas('journal_mode', 'busy_timeout', 'synchronous')
+
+        # synchronous reports NORMAL as 1
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'busy_timeout': 7000, 'synchronous': 1})
+
+    def test_tuning_can_be_turned_off(self):
+        with self.settings(SQLITE_TUNING=False):
+            pragmas = self.pragmas('journal_mode', 'synchronous')
+
+        # SQLite's own defaults: rollback journal and synchronous=FULL
+        self.assertEqual(pragmas, {'journal_mode': 'delete', 'synchronous': 2})
+
+
+@skipUnless(connection.vendor == 'sqlite', 'The replica is simulated with SQLite file copies')
+class ReplicaRoutingTests(TransactionTestCase):
+    """Primary and replica are two SQLite files; 'replication' is an explicit backup"""
+
+    # '__all__' picks up the replica alias this class adds before setUpClass
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.scratch = tempfile.mkdtemp()
+        replica = copy.deepcopy(connections.settings['default'])
+        replica['NAME'] = os.path.join(cls.scratch, 'replica.sqlite3')
+        connections.settings['replica'] = replica
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        os.remove(os.path.join(cls.scratch, 'replica.sqlite3'))
+        os.rmdir(cls.scratch)
+
+    def replicate(self):
+        connections['replica'].close()
+        connection.ensure_connection()
+        target = sqlite3.connect(connections.settings['replica']['NAME'])
+        connection.connection.backup(target)
+        target.close()
+
+    def setUp(self):
+        self.user = make_user()
+        self.first = make_food('First')
+        self.replicate()
+        self.second = make_food('Second')  # only on the primary so far
+        self.client.force_login(self.user)
+        self.client.cookies.pop(PIN_COOKIE, None)
+
+    def deck_names(self):
+        return [card['name'] for card in self.client.get(reverse('dating:deck')).json()['foods']]
+
+    def test_replica_views_read_from_replica(self):
+        self.assertEqual(self.deck_names(), ['First'])
+
+    def test_other_views_read_from_primary(self):
+        response = self.client.get(reverse('dating:add_to_meal_plan', args=[
+            Match.objects.create(user=self.user, food_profile=self.second).pk
+        ]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_own_write_pins_reads_to_primary(self):
+        self.client.post(
+            reverse('dating:swipe_food'), json.dumps({'food_id': self.first.id, 'action': 'pass'}),
+            content_type='application/json'
+        )
+
+        self.assertIn(PIN_COOKIE, self.client.cookies)
+        self.assertEqual(self.deck_names(), ['Second'])
+
+    def test_write_inside_replica_view_pins_rest_of_request(self):
+        Match.objects.create(user=self.user, food_profile=self.second)
+        Match.objects.create(user=self.user, food_profile=self.first)
+        self.replicate()
+        Match.objects.all().delete()
+
+        # The replica says everything is seen, so discover queues a job
+        # (a write) and must report that job from the primary
+        response = self.client.get(reverse('dating:discover'))
+        self.assertEqual(response.context['deck'], [])
+        self.assertEqual(response.context['generation_job'].status, GenerationJob.STATUS_PENDING)
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_active_job_check_reads_the_primary(self):
+        Match.objects.create(user=self.user, food_profile=self.second)
+        Match.objects.create(user=self.user, food_profile=self.first)
+        self.replicate()
+        job = enqueue_generation(self.user.userprofile)  # not replicated yet
+
+        data = self.client.get(reverse('dating:deck')).json()
+        self.assertEqual(data['foods'], [])
+        self.assertEqual(list(GenerationJob.objects.values_list('pk', flat=True)), [job.pk])
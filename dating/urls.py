@@ -11,7 +11,14 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('setup-profile/', views.setup_profile, name='setup_profile'),
     path('discover/', views.discover, name='discover'),
+    path('discover/deck/', views.deck_api, name='deck'),
+    path('discover/status/', views.generation_status, name='generation_status'),
     path('swipe/', views.swipe_food, name='swipe_food'),
+    path('swipe/batch/', views.swipe_batch, name='swipe_batch'),
     path('matches/', views.matches, name='matches'),
+    path('matches/api/', views.matches_api, name='matches_api'),
+    path('meal-plan/', views.meal_plan, name='meal_plan'),
+    path('meal-plan/api/', views.meal_plan_api, name='meal_plan_api'),
     path('add-to-meal-plan/<int:match_id>/', views.add_to_meal_plan, name='add_to_meal_plan'),
+    path('metrics/', views.metrics_export, name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,59 @@
+# dating/variety.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import WeeklyFoodLog
+
+VARIETY_WINDOW_DAYS = 7
+
+
+def variety_window_start():
+    return timezone.now().date() - timedelta(days=VARIETY_WINDOW_DAYS)
+
+
+def variety_cache_key(user_id, window_start=None):
+    # The window start is part of the key, so summaries roll over at midnight;
+    # v2 summaries carry per-cuisine counts
+    window_start = window_start or variety_window_start()
+    return f'variety:v2:{user_id}:{window_start.isoformat()}'
+
+
+def compute_weekly_variety(user_id, window_start=None):
+    """Distinct cuisines and meal types the user logged since ``window_start``, and meals per cuisine"""
+    window_start = window_start or variety_window_start()
+    rows = WeeklyFoodLog.objects.filter(
+        user_id=user_id,
+        date_consumed__gte=window_start
+    ).values_list('food_profile__cuisine_type', 'food_profile__meal_type')
+
+    cuisine_counts, meal_types, count = {}, set(), 0
+    for cuisine, meal_type in rows:
+        cuisine_counts[cuisine] = cuisine_counts.get(cuisine, 0) + 1
+        meal_types.add(meal_type)
+        count += 1
+
+    return {
+        'cuisines': sorted(cuisine_counts),
+        'meal_types': sorted(meal_types),
+        'cuisine_counts': cuisine_counts,
+        'count': count,
+    }
+
+
+def weekly_variety(user_id):
+    """Cached weekly variety summary for a user"""
+    window_start = variety_window_start()
+    key = variety_cache_key(user_id, window_start)
+    summary = cache.get(key)
+    if summary is None:
+        summary = compute_weekly_variety(user_id, window_start)
+        cache.set(key, summary, settings.VARIETY_CACHE_TTL)
+    return summary
+
+
+def invalidate_weekly_variety(user_id):
+    """Drop the cached summary; called whenever the user's food log changes"""
+    cache.delete(variety_cache_key(user_id))
@@ -1,17 +1,28 @@
 # views.py
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth import login, authenticate, logout
+from django.contrib.auth import login, logout
 from django.contrib import messages
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
+from django.db import transaction
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import hmac
 import json
 import random
-from g4f.client import Client
-from .models import UserProfile, FoodProfile, Match, WeeklyFoodLog, CustomUser
+from . import metrics
+from .models import UserProfile, FoodProfile, Match, WeeklyFoodLog, CustomUser, GenerationJob
 from .forms import CustomUserCreationForm, CustomLoginForm, UserProfileForm
+from .jobs import enqueue_generation, retry_generation
+from .candidates import candidate_foods, next_deck
+from .pagination import InvalidCursor, KeysetPage
+from .meal_plan import week_start, weekly_meal_plan
+from .match_cache import bump_matches_version, matches_etag, page_revision, request_version
+from .scoring import score_foods
 
 def register_view(request):
     if request.user.is_authenticated:
@@ -36,9 +47,9 @@ def login_view(request):
     if request.method == 'POST':
         form = CustomLoginForm(request, data=request.POST)
         if form.is_valid():
-            email = form.cleaned_data.get('username')  # AuthenticationForm uses 'username' field
-            password = form.cleaned_data.get('password')
-            user = authenticate(request, username=email, password=password)
+            # AuthenticationForm already authenticated during validation;
+            # doing it again would repeat the lookup and the password hash
+            user = form.get_user()
             if user is not None:
                 login(request, user)
                 # Check if profile is completed
@@ -87,24 +98,62 @@ def discover(request):
     except UserProfile.DoesNotExist:
         return redirect('dating:setup_profile')
     
-    # Get foods user hasn't seen yet
-    seen_food_ids = Match.objects.filter(user=request.user).values_list('food_profile_id', flat=True)
-    available_foods = FoodProfile.objects.filter(
-        diet_compatibility=user_profile.diet_preferences
-    ).exclude(id__in=seen_food_ids)
+    # Ship the first batch of cards with the page; the client swipes through
+    # them locally and only asks deck_api for more when it runs low
+    deck = next_deck(user_profile, settings.DECK_SIZE)
     
-    # If no foods available, generate new ones
-    if not available_foods.exists():
-        generate_food_profiles(user_profile)
-        available_foods = FoodProfile.objects.filter(
-            diet_compatibility=user_profile.diet_preferences
-        ).exclude(id__in=seen_food_ids)
-    
-    current_food = available_foods.first() if available_foods.exists() else None
+    # If no foods available, hand generation off to the background worker
+    generation_job = None
+    if not deck:
+        generation_job = enqueue_generation(user_profile)
     
     return render(request, 'dating/discover.html', {
-        'current_food': current_food,
-        'user_profile': user_profile
+        'deck': deck,
+        'user_profile': user_profile,
+        'generation_job': generation_job,
+        'deck_refill_at': settings.DECK_REFILL_AT,
+        'poll_interval_ms': settings.GENERATION_POLL_INTERVAL * 1000
+    })
+
+@login_required
+def deck_api(request):
+    """Next batch of swipe cards as JSON"""
+    try:
+        user_profile = request.user.userprofile
+    except UserProfile.DoesNotExist:
+        return JsonResponse({'status': 'error'}, status=400)
+    
+    try:
+        limit = min(int(request.GET.get('limit', settings.DECK_SIZE)), settings.DECK_MAX_SIZE)
+        exclude_ids = [int(i) for i in request.GET.get('exclude', '').split(',') if i.strip()]
+    except ValueError:
+        return JsonResponse({'status': 'error'}, status=400)
+    
+    deck = next_deck(user_profile, max(1, limit), exclude_ids)
+    generating = not deck
+    if generating:
+        enqueue_generation(user_profile)
+    
+    return JsonResponse({'status': 'success', 'foods': deck, 'generating': generating})
+
+@login_required
+def generation_status(request):
+    """Poll endpoint for the discover page while new foods are being generated"""
+    try:
+        user_profile = request.user.userprofile
+    except UserProfile.DoesNotExist:
+        return JsonResponse({'status': 'error'}, status=400)
+    
+    foods_ready = candidate_foods(user_profile).exists()
+    
+    job = GenerationJob.objects.filter(user=request.user).order_by('-created_at').first()
+    # A job can finish without leaving anything new to swipe on
+    if not foods_ready:
+        job = retry_generation(user_profile, job)
+    
+    return JsonResponse({
+        'status': 'ready' if foods_ready else 'cooking',
+        'job_status': job.status if job else None
     })
 
 @csrf_exempt
@@ -144,15 +193,235 @@ def swipe_food(request):
     
     return JsonResponse({'status': 'error'})
 
+@csrf_exempt
 @login_required
-def matches(request):
+def swipe_batch(request):
+    """Record a queue of swipes in one transaction, reporting each outcome"""
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error'})
+    
+    try:
+        swipes = json.loads(request.body).get('swipes')
+    except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+        swipes = None
+    if not isinstance(swipes, list) or len(swipes) > settings.SWIPE_BATCH_MAX:
+        return JsonResponse({'status': 'error', 'message': f'Send a list of at most {settings.SWIPE_BATCH_MAX} swipes'}, status=400)
+    
+    # A food swiped more than once in the batch keeps its latest swipe
+    latest = {}
+    for index, swipe in enumerate(swipes):
+        food_id = _swipe_food_id(swipe)
+        if food_id is None:
+            continue
+        key = (_swipe_time(swipe.get('timestamp')), index)
+        if food_id not in latest or key >= latest[food_id][0]:
+            latest[food_id] = (key, swipe)
+    
+    foods = FoodProfile.objects.in_bulk(list(latest))
+    
+    liked_foods = [foods[food_id] for food_id, (_, swipe) in latest.items() if food_id in foods and swipe.get('action') == 'like']
+    chances = score_foods(request.user.pk, liked_foods) if liked_foods else {}
+    
+    outcomes = {}
+    liked, passed = [], []
+    for food_id, (_, swipe) in latest.items():
+        action = swipe.get('action')
+        food_profile = foods.get(food_id)
+        if food_profile is None:
+            outcomes[food_id] = {'food_id': food_id, 'status': 'not_found'}
+        elif action == 'like':
+            food_likes_back = random.random() < chances[food_id]
+            liked.append(Match(user=request.user, food_profile=food_profile, user_liked=True, food_liked=food_likes_back))
+            if food_likes_back:
+                outcomes[food_id] = {
+                    'food_id': food_id,
+                    'status': 'mutual_match',
+                    'message': f"It's a match! {food_profile.name} likes you back!"
+                }
+            else:
+                outcomes[food_id] = {'food_id': food_id, 'status': 'success'}
+        elif action == 'pass':
+            passed.append(Match(user=request.user, food_profile=food_profile, user_liked=False))
+            outcomes[food_id] = {'food_id': food_id, 'status': 'success'}
+        else:
+            outcomes[food_id] = {'food_id': food_id, 'status': 'invalid'}
+    
+    # bulk_create skips the signal that drops cached match grids; a batch
+    # can add mutual matches or overwrite ones the user already had
+    changes_matches = any(match.food_liked for match in liked) or Match.objects.filter(
+        user=request.user, food_profile_id__in=list(foods), user_liked=True, food_liked=True
+    ).exists()
+    
+    # Passes leave food_liked alone, the same as swipe_food does
+    with transaction.atomic():
+        if liked:
+            Match.objects.bulk_create(
+                liked, update_conflicts=True,
+                unique_fields=['user', 'food_profile'], update_fields=['user_liked', 'food_liked']
+            )
+        if passed:
+            Match.objects.bulk_create(
+                passed, update_conflicts=True,
+                unique_fields=['user', 'food_profile'], update_fields=['user_liked']
+            )
+    if changes_matches:
+        bump_matches_version(request.user.pk)
+    
+    results = []
+    for swipe in swipes:
+        food_id = _swipe_food_id(swipe)
+        results.append(outcomes.get(food_id, {'food_id': food_id, 'status': 'invalid'}))
+    
+    return JsonResponse({'status': 'success', 'results': results})
+
+def _swipe_food_id(swipe):
+    try:
+        return int(swipe['food_id'])
+    except (TypeError, KeyError, ValueError):
+        return None
+
+def _swipe_time(value):
+    """Client timestamp as epoch seconds; accepts epoch seconds/millis or ISO 8601"""
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            pass
+    return 0.0
+
+# Columns the match cards display, plus what keyset paging orders by
+MATCH_CARD_FIELDS = [
+    'id', 'created_at', 'food_profile__name', 'food_profile__description', 'food_profile__calories',
+    'food_profile__meal_type', 'food_profile__cuisine_type', 'food_profile__diet_compatibility',
+    'food_profile__image_url', 'food_profile__image_variants',
+]
+MATCH_ORDERING = ['-created_at', '-id']
+
+def mutual_matches_page(user, cursor, size):
     mutual_matches = Match.objects.filter(
-        user=request.user,
+        user=user,
         user_liked=True,
         food_liked=True
-    ).select_related('food_profile')
+    ).select_related('food_profile').only(*MATCH_CARD_FIELDS)
+    return KeysetPage(mutual_matches, MATCH_ORDERING, cursor, size)
+
+def match_card(match):
+    """JSON-ready subset of a mutual Match for the matches API"""
+    food = match.food_profile
+    return {
+        'id': match.id,
+        'created_at': match.created_at.isoformat(),
+        'food_id': food.id,
+        'name': food.name,
+        'description': food.description,
+        'calories': food.calories,
+        'image_url': food.thumb_image,
+        'image_webp': food.thumb_image_webp,
+        'meal_type': food.get_meal_type_display(),
+        'cuisine_type': food.cuisine_type,
+        'diet_compatibility': food.get_diet_compatibility_display(),
+    }
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=matches_etag)
+def matches(request):
+    cursor = request.GET.get('after', '')
+    try:
+        # Lazy: the template only runs it when its cached grid is out of date
+        page = mutual_matches_page(request.user, cursor, settings.MATCHES_PAGE_SIZE)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid page cursor')
+    
+    return render(request, 'dating/matches.html', {
+        'page': page,
+        'cursor': cursor,
+        'matches_version': request_version(request),
+        'page_revision': page_revision(),
+        'cache_ttl': settings.MATCHES_CACHE_TTL,
+    })
+
+@login_required
+def matches_api(request):
+    """A page of mutual matches as JSON, newest first; pass ``next`` back as ``after``"""
+    try:
+        limit = min(int(request.GET.get('limit', settings.MATCHES_PAGE_SIZE)), settings.MATCHES_PAGE_MAX_SIZE)
+        page = mutual_matches_page(request.user, request.GET.get('after'), max(1, limit))
+    except (ValueError, InvalidCursor):
+        return JsonResponse({'status': 'error'}, status=400)
+    
+    return JsonResponse({
+        'status': 'success',
+        'matches': [match_card(match) for match in page.items],
+        'next': page.next_cursor,
+    })
+
+def _plan_week(request):
+    """Monday of the week asked for with ``?week=YYYY-MM-DD``, this week by default"""
+    # UTC dates, like the weekly variety window
+    day = date.fromisoformat(request.GET['week']) if request.GET.get('week') else timezone.now().date()
+    return week_start(day)
+
+@login_required
+def meal_plan(request):
+    """The user's logged meals for one week, Monday to Sunday, with calories against their goal"""
+    try:
+        start = _plan_week(request)
+    except ValueError:
+        return HttpResponseBadRequest('Invalid week')
+    
+    # Totals come from the cache, so only the listed page of logs is queried
+    plan = weekly_meal_plan(request.user.pk, start)
+    logs = WeeklyFoodLog.objects.filter(
+        user=request.user,
+        date_consumed__range=(start, start + timedelta(days=6))
+    ).values(
+        'id', 'date_consumed', 'meal_type', 'food_profile_id', 'food_profile__name',
+        'food_profile__calories', 'food_profile__cuisine_type'
+    )
+    try:
+        page = KeysetPage(logs, ['date_consumed', 'id'], request.GET.get('after'), settings.MEAL_PLAN_PAGE_SIZE)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid page cursor')
     
-    return render(request, 'dating/matches.html', {'matches': mutual_matches})
+    return render(request, 'dating/meal_plan.html', {
+        'plan': plan,
+        'page': page,
+        'week_start': start,
+        'week_end': start + timedelta(days=6),
+        'previous_week': start - timedelta(days=7),
+        'next_week': start + timedelta(days=7),
+    })
+
+@login_required
+def meal_plan_api(request):
+    """Calories per day and meal for one week as JSON, against the user's daily goal"""
+    try:
+        start = _plan_week(request)
+    except ValueError:
+        return JsonResponse({'status': 'error'}, status=400)
+    
+    plan = weekly_meal_plan(request.user.pk, start)
+    return JsonResponse({
+        'status': 'success',
+        'week_start': plan['week_start'].isoformat(),
+        'daily_goal': plan['goal'],
+        'weekly_goal': plan['weekly_goal'],
+        'total': plan['total'],
+        'remaining': plan['remaining'],
+        'meal_totals': plan['meal_totals'],
+        'days': [
+            {
+                'date': day['date'].isoformat(),
+                'calories': day['calories'],
+                'remaining': day['remaining'],
+                'meals': {meal['meal_type']: meal['calories'] for meal in day['meals']},
+            }
+            for day in plan['days']
+        ],
+    })
 
 @login_required
 def add_to_meal_plan(request, match_id):
@@ -174,106 +443,20 @@ def add_to_meal_plan(request, match_id):
     
     return render(request, 'dating/add_to_meal_plan.html', {'match': match})
 
-def generate_food_profiles(user_profile, count=10):
-    """Generate new food profiles using AI"""
-    client = Client()
-    
-    cuisines = user_profile.get_cuisines_list() or ['Italian', 'Mexican', 'Asian', 'American', 'Mediterranean']
-    meal_types = ['breakfast', 'lunch', 'dinner', 'snack']
-    
-    for _ in range(count):
-        try:
-            # Generate food description
-            cuisine = random.choice(cuisines)
-            meal_type = random.choice(meal_types)
-            
-            prompt = f"""Create a {user_profile.diet_preferences} {meal_type} recipe from {cuisine} cuisine. 
-            Avoid these allergies: {', '.join(user_profile.get_allergies_list()) if user_profile.get_allergies_list() else 'none'}.
-            Target calories: {user_profile.daily_calorie_goal // 4} calories.
-            
-            Respond in this exact JSON format:
-            {{
-                "name": "Recipe Name",
-                "description": "Brief appetizing description",
-                "calories": 450,
-                "ingredients": "ingredient1, ingredient2, ingredient3"
-            }}"""
-            
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a professional chef creating recipes. Return only valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                web_search=False
-            )
-            
-            # Parse AI response
-            try:
-                food_data = json.loads(response.choices[0].message.content)
-            except json.JSONDecodeError:
-                # Fallback if JSON parsing fails
-                food_data = {
-                    "name": f"{cuisine} {meal_type.title()}",
-                    "description": f"A delicious {cuisine} {meal_type}",
-                    "calories": random.randint(200, 800),
-                    "ingredients": "fresh ingredients"
-                }
-            
-            # Generate food image
-            image_prompt = f"professional food photography of {food_data['name']}, {food_data['description']}, appetizing, well-lit, restaurant quality"
-            
-            try:
-                image_response = client.images.generate(
-                    model="flux",
-                    prompt=image_prompt,
-                    response_format="url"
-                )
-                image_url = image_response.data[0].url
-            except:
-                image_url = ""
-            
-            # Create food profile
-            FoodProfile.objects.create(
-                name=food_data['name'],
-                description=food_data['description'],
-                calories=food_data['calories'],
-                meal_type=meal_type,
-                cuisine_type=cuisine,
-                diet_compatibility=user_profile.diet_preferences,
-                ingredients=food_data['ingredients'],
-                image_url=image_url,
-                generated_prompt=prompt,
-                generation_successful=True
-            )
-            
-        except Exception as e:
-            print(f"Error generating food profile: {e}")
-            continue
+def food_preference_chance(user, food_profile):
+    """Probability that a food profile likes the user back, based on variety"""
+    return score_foods(user.pk, [food_profile])[food_profile.pk]
 
 def calculate_food_preference(user, food_profile):
     """Calculate if a food profile would 'like' the user back based on variety"""
-    # Get user's food log for the past week
-    week_ago = timezone.now().date() - timedelta(days=7)
-    recent_foods = WeeklyFoodLog.objects.filter(
-        user=user,
-        date_consumed__gte=week_ago
-    ).select_related('food_profile')
-    
-    # Calculate variety score
-    unique_cuisines = set(log.food_profile.cuisine_type for log in recent_foods)
-    unique_meal_types = set(log.food_profile.meal_type for log in recent_foods)
-    
-    variety_score = len(unique_cuisines) + len(unique_meal_types)
-    
-    # Food likes users with more variety (higher chance with more variety)
-    base_chance = 0.3  # 30% base chance
-    variety_bonus = min(variety_score * 0.1, 0.5)  # Up to 50% bonus
-    
-    # Check if user hasn't had this cuisine recently
-    if food_profile.cuisine_type not in unique_cuisines:
-        variety_bonus += 0.2
-    
-    final_chance = min(base_chance + variety_bonus, 0.9)  # Max 90% chance
+    return random.random() < food_preference_chance(user, food_profile)
+
+def metrics_export(request):
+    """Prometheus scrape endpoint, for METRICS_TOKEN bearers and staff"""
+    token = settings.METRICS_TOKEN
+    header = request.headers.get('Authorization', '')
+    authorized = bool(token) and hmac.compare_digest(header, f'Bearer {token}')
+    if not (authorized or request.user.is_staff):
+        return HttpResponseForbidden()
     
-    return random.random() < final_chance
\ No newline at end of file
+    return HttpResponse(metrics.store.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
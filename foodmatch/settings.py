@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import django
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,11 +42,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'dating.metrics.MetricsMiddleware',
+    'dating.profiling.SlowRequestProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'dating.routers.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -71,13 +75,90 @@ TEMPLATES = [
 WSGI_APPLICATION = 'foodmatch.wsgi.application'
 
 # Database
+# SQLITE_TUNING applies the PRAGMAs below to every new connection (see
+# dating/sqlite.py) and keeps connections open between requests.
+SQLITE_TUNING = config('SQLITE_TUNING', default=True, cast=bool)
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db" / "db.sqlite3",
+        "NAME": config('DATABASE_PATH', default=str(BASE_DIR / "db" / "db.sqlite3")),
+        "OPTIONS": {
+            # Seconds a connection waits on a locked database before erroring
+            "timeout": config('SQLITE_TIMEOUT', default=20, cast=int),
+        },
+        "CONN_MAX_AGE": config('CONN_MAX_AGE', default=600 if SQLITE_TUNING else 0, cast=int),
+        "CONN_HEALTH_CHECKS": True,
+    }
+}
+
+if SQLITE_TUNING and django.VERSION >= (5, 1):
+    # Take the write lock at BEGIN so a read transaction never has to be
+    # upgraded mid-flight, which fails immediately instead of waiting
+    DATABASES["default"]["OPTIONS"]["transaction_mode"] = "IMMEDIATE"
+
+# Optional read replica. Reads inside REPLICA_READ_VIEWS go to it unless the
+# request (or, for REPLICA_PIN_SECONDS, the browser) has just written.
+DATABASE_REPLICA_PATH = config('DATABASE_REPLICA_PATH', default='')
+REPLICA_DATABASE = 'replica'
+if DATABASE_REPLICA_PATH:
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES["default"],
+        "NAME": DATABASE_REPLICA_PATH,
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ['dating.routers.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
+REPLICA_READ_VIEWS = config(
+    'REPLICA_READ_VIEWS',
+    default='dating:discover,dating:deck,dating:generation_status,dating:matches,dating:matches_api,admin:*_changelist'
+).split(',')
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': config('SQLITE_TIMEOUT', default=20, cast=int) * 1000,
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+    'cache_size': config('SQLITE_CACHE_SIZE', default=-64000, cast=int),  # negative = KiB
+    'temp_store': 'MEMORY',
+}
+
+# Cache
+# Use a shared backend (file or memcached/redis) in production so that
+# invalidations made by one gunicorn worker are seen by the others.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='foodmatch'),
     }
 }
 
+VARIETY_CACHE_TTL = config('VARIETY_CACHE_TTL', default=86400, cast=int)
+MEAL_PLAN_CACHE_TTL = config('MEAL_PLAN_CACHE_TTL', default=86400, cast=int)
+# Rendered match grids; keys carry a per-user version, so this only bounds staleness
+# after edits to the foods themselves
+MATCHES_CACHE_TTL = config('MATCHES_CACHE_TTL', default=86400, cast=int)
+
+# Metrics exported in Prometheus format at /dating/metrics/. Point METRICS_DIR
+# at a directory shared by all gunicorn workers and the food generator so the
+# export covers every process; the endpoint needs METRICS_TOKEN as a bearer
+# token or a staff login.
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=float)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Sampled cProfile captures of slow requests, read with `manage.py slow_requests`
+PROFILE_DIR = config('PROFILE_DIR', default=str(BASE_DIR / 'logs' / 'profiles'))
+PROFILE_VIEWS = config(
+    'PROFILE_VIEWS', default='dating:discover,dating:deck,dating:swipe_food,dating:swipe_batch'
+).split(',')
+PROFILE_SAMPLE_RATE = config('PROFILE_SAMPLE_RATE', default=0.05, cast=float)
+PROFILE_MAX_PER_MINUTE = config('PROFILE_MAX_PER_MINUTE', default=6, cast=int)
+PROFILE_SLOW_MS = config('PROFILE_SLOW_MS', default=500, cast=int)
+PROFILE_KEEP = config('PROFILE_KEEP', default=200, cast=int)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -121,6 +202,71 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Background food generation
+GENERATION_BATCH_SIZE = config('GENERATION_BATCH_SIZE', default=10, cast=int)
+GENERATION_JOB_TIMEOUT = config('GENERATION_JOB_TIMEOUT', default=600, cast=int)
+GENERATION_JOB_MAX_ATTEMPTS = config('GENERATION_JOB_MAX_ATTEMPTS', default=3, cast=int)
+GENERATION_POLL_INTERVAL = config('GENERATION_POLL_INTERVAL', default=5, cast=int)
+# Seconds after a job ends before a still-empty deck queues another
+GENERATION_RETRY_COOLDOWN = config('GENERATION_RETRY_COOLDOWN', default=60, cast=int)
+GENERATION_CONCURRENCY = config('GENERATION_CONCURRENCY', default=5, cast=int)
+GENERATION_CALL_TIMEOUT = config('GENERATION_CALL_TIMEOUT', default=45, cast=float)
+# g4f, stub or replay (or a dotted path to a dating.backends.GenerationBackend);
+# stub and replay never touch the network
+GENERATION_BACKEND = config('GENERATION_BACKEND', default='g4f')
+GENERATION_STUB_LATENCY = config('GENERATION_STUB_LATENCY', default=0.0, cast=float)
+GENERATION_STUB_FAILURE_RATE = config('GENERATION_STUB_FAILURE_RATE', default=0.0, cast=float)
+GENERATION_STUB_SEED = config('GENERATION_STUB_SEED', default=0, cast=int)
+GENERATION_REPLAY_PATH = config('GENERATION_REPLAY_PATH', default=str(BASE_DIR / 'logs' / 'llm-recordings.jsonl'))
+GENERATION_RECORD_PATH = config('GENERATION_RECORD_PATH', default='')
+# Reuse parsed recipes across prompts with the same diet, cuisine, meal type,
+# calorie target and allergies. A hit stands for the catalog food the recipe
+# became and only counts while the requesting user has not swiped it, so it
+# saves an LLM call without adding a repeat dish.
+RECIPE_CACHE_ENABLED = config('RECIPE_CACHE_ENABLED', default=False, cast=bool)
+RECIPE_CACHE_VARIANTS = config('RECIPE_CACHE_VARIANTS', default=20, cast=int)
+RECIPE_CACHE_TTL = config('RECIPE_CACHE_TTL', default=7 * 86400, cast=int)
+RECIPE_CACHE_MAX_ENTRIES = config('RECIPE_CACHE_MAX_ENTRIES', default=5000, cast=int)
+RECIPE_CACHE_CALORIE_STEP = config('RECIPE_CACHE_CALORIE_STEP', default=1, cast=int)
+
+# Generated images are downloaded in the background and stored under
+# MEDIA_ROOT as resized card/thumbnail variants
+IMAGE_FETCH_TIMEOUT = config('IMAGE_FETCH_TIMEOUT', default=15, cast=float)
+IMAGE_MAX_BYTES = config('IMAGE_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+IMAGE_MAX_ATTEMPTS = config('IMAGE_MAX_ATTEMPTS', default=3, cast=int)
+IMAGE_BATCH_SIZE = config('IMAGE_BATCH_SIZE', default=20, cast=int)
+IMAGE_CONCURRENCY = config('IMAGE_CONCURRENCY', default=4, cast=int)
+# Image URLs come from the LLM, so private, loopback and link-local hosts are
+# refused unless this is set (tests serve images from 127.0.0.1)
+IMAGE_ALLOW_PRIVATE_HOSTS = config('IMAGE_ALLOW_PRIVATE_HOSTS', default=False, cast=bool)
+
+# Near-duplicate foods: same normalized name, or name-word + ingredient
+# Jaccard similarity at or above the threshold, within one diet
+DEDUP_ENABLED = config('DEDUP_ENABLED', default=True, cast=bool)
+DEDUP_THRESHOLD = config('DEDUP_THRESHOLD', default=0.8, cast=float)
+
+# Swipe deck served to the discover page
+DECK_SIZE = config('DECK_SIZE', default=10, cast=int)
+DECK_MAX_SIZE = config('DECK_MAX_SIZE', default=50, cast=int)
+DECK_REFILL_AT = config('DECK_REFILL_AT', default=3, cast=int)
+SWIPE_BATCH_MAX = config('SWIPE_BATCH_MAX', default=100, cast=int)
+# Candidates fetched and ranked for every deck batch
+RANKING_POOL_SIZE = config('RANKING_POOL_SIZE', default=200, cast=int)
+# How stale the per-user swipe history behind the ranking may get
+RANKING_HISTORY_TTL = config('RANKING_HISTORY_TTL', default=300, cast=int)
+
+# Keyset-paginated listings
+MATCHES_PAGE_SIZE = config('MATCHES_PAGE_SIZE', default=24, cast=int)
+MATCHES_PAGE_MAX_SIZE = config('MATCHES_PAGE_MAX_SIZE', default=100, cast=int)
+MEAL_PLAN_PAGE_SIZE = config('MEAL_PLAN_PAGE_SIZE', default=28, cast=int)
+
+# Pre-generated candidate pool, refilled per (diet, cuisine) bucket
+POOL_LOW_WATERMARK = config('POOL_LOW_WATERMARK', default=20, cast=int)
+POOL_REFILL_BATCH = config('POOL_REFILL_BATCH', default=10, cast=int)
+POOL_REFILL_INTERVAL = config('POOL_REFILL_INTERVAL', default=60, cast=int)
+POOL_ACTIVE_DAYS = config('POOL_ACTIVE_DAYS', default=14, cast=int)
+POOL_RATE_WINDOW_HOURS = config('POOL_RATE_WINDOW_HOURS', default=24, cast=int)
+
 # Custom User Model
 AUTH_USER_MODEL = 'dating.CustomUser'
 
@@ -6,7 +6,8 @@ from dating.views import login_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # The app must come before the admin catch-all mounted at ''
+    path('dating/', include('dating.urls')),
     #path('', lambda request: redirect('dating:discover')),
     path('', admin.site.urls),
-    path('dating/', include('dating.urls')),
 ]
\ No newline at end of file
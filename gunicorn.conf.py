@@ -0,0 +1,10 @@
+# gunicorn.conf.py
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodmatch.settings')
+
+
+def child_exit(server, worker):
+    # Runs in the master once a worker is gone, however it exited
+    from dating.metrics import archive_files
+    archive_files('web', worker.pid)
@@ -10,6 +10,7 @@ PRIMARY_DOMAIN="foodmatch.vetgaaf.tech"                              # Primary d
 WSGI_MODULE="foodmatch.wsgi:application"                    # Django WSGI module (usually projectname.wsgi:application)
 
 SERVICE_NAME="gunicorn-${PROJECT_NAME}"
+WORKER_SERVICE_NAME="food-generator-${PROJECT_NAME}"
 
 echo "================================"
 echo "${PROJECT_NAME} Django Deployment"
@@ -43,6 +44,8 @@ sudo mkdir -p $PROJECT_DIR/logs
 sudo mkdir -p $PROJECT_DIR/staticfiles
 sudo mkdir -p $PROJECT_DIR/media
 sudo mkdir -p $PROJECT_DIR/db
+sudo mkdir -p $PROJECT_DIR/cache
+sudo mkdir -p $PROJECT_DIR/metrics
 sudo mkdir -p $PROJECT_DIR/locale
 
 # Set ownership and permissions
@@ -111,6 +114,13 @@ sudo systemctl daemon-reload
 sudo systemctl enable ${SERVICE_NAME}
 sudo systemctl restart ${SERVICE_NAME}
 
+# Setup food generation worker
+echo "Setting up food generation worker..."
+sudo cp $PROJECT_DIR/food-generator.service /etc/systemd/system/${WORKER_SERVICE_NAME}.service
+sudo systemctl daemon-reload
+sudo systemctl enable ${WORKER_SERVICE_NAME}
+sudo systemctl restart ${WORKER_SERVICE_NAME}
+
 # Setup Nginx
 echo "Setting up Nginx..."
 sudo cp $PROJECT_DIR/nginx.conf /etc/nginx/sites-available/${PROJECT_NAME}
@@ -7,6 +7,7 @@ PROJECT_DIR="/var/www/foodmatch"                            # Project directory
 PRIMARY_DOMAIN="foodmatch.vetgaaf.tech"                              # Primary domain
 
 SERVICE_NAME="gunicorn-${PROJECT_NAME}"
+WORKER_SERVICE_NAME="food-generator-${PROJECT_NAME}"
 
 echo "================================"
 echo "${PROJECT_NAME} Update Script"
@@ -37,6 +38,9 @@ sudo -u www-data $PROJECT_DIR/venv/bin/python manage.py collectstatic --noinput
 echo "Restarting Gunicorn..."
 sudo systemctl restart ${SERVICE_NAME}
 
+echo "Restarting food generation worker..."
+sudo systemctl restart ${WORKER_SERVICE_NAME}
+
 echo "Reloading Nginx..."
 sudo systemctl reload nginx
 